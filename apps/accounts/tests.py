@@ -1,3 +1,39 @@
-from django.test import TestCase
+import tempfile
+from io import BytesIO
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from PIL import Image
+
+from apps.core.testing import QueryBudgetTestCase
+
+
+class AccountsQueryBudgetTests(QueryBudgetTestCase):
+	def test_register(self):
+		self.client.credentials()
+		payload = {"username": "newcomer", "email": "newcomer@example.com", "password": "secret1234"}
+		self.assertMaxQueries(11, "post", reverse("auth-register"), payload, status=201)
+
+	def test_login(self):
+		self.client.credentials()
+		self.assertMaxQueries(2, "post", reverse("auth-login"), {"login": "seeded", "password": "secret1234"})
+
+	def test_logout(self):
+		self.assertMaxQueries(2, "post", reverse("auth-logout"), status=204)
+
+	def test_profile(self):
+		self.assertMaxQueries(4, "get", reverse("profile"))
+
+	def test_profile_update(self):
+		self.assertMaxQueries(3, "patch", reverse("profile"), {"email": "seeded2@example.com"})
+
+	def test_avatar_delete(self):
+		self.assertMaxQueries(2, "delete", reverse("profile-avatar"), status=204)
+
+	def test_avatar_upload(self):
+		buf = BytesIO()
+		Image.new("RGB", (8, 8), "red").save(buf, format="PNG")
+		avatar = SimpleUploadedFile("avatar.png", buf.getvalue(), content_type="image/png")
+		with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+			self.assertMaxQueries(2, "post", reverse("profile-avatar"), {"avatar": avatar}, format="multipart")
@@ -6,8 +6,8 @@ from rest_framework.exceptions import ValidationError
 
 from apps.projects.models import Task
 from apps.projects.services import complete_task
-from apps.raids.services import attack_boss, ensure_active_boss, start_next_boss
-from apps.stats.services import ensure_user_stats
+from apps.raids.services import attack_boss, get_active_boss_readonly, start_next_boss
+from apps.stats.services import get_user_stats_readonly
 from apps.focus.services import start_focus_session, stop_focus_session
 
 
@@ -35,7 +35,7 @@ def execute_action(*, user, action: dict) -> dict:
     args = (action or {}).get("args") or {}
 
     if name == "hero_stats":
-        stats = ensure_user_stats(user)
+        stats = get_user_stats_readonly(user)
         return {
             "level": stats.level,
             "xp": stats.xp,
@@ -44,7 +44,7 @@ def execute_action(*, user, action: dict) -> dict:
         }
 
     if name == "boss_status":
-        boss = ensure_active_boss(user=user)
+        boss = get_active_boss_readonly(user=user)
         return {
             "id": boss.id,
             "name": boss.name,
@@ -0,0 +1,28 @@
+from unittest import mock
+
+from django.core import signing
+from django.urls import reverse
+
+from apps.core.testing import QueryBudgetTestCase
+
+
+class AIQueryBudgetTests(QueryBudgetTestCase):
+    def test_profile(self):
+        self.assertMaxQueries(3, "get", reverse("ai-profile"))
+
+    def test_profile_update(self):
+        self.assertMaxQueries(4, "put", reverse("ai-profile"), {"preferred_name": "Seed"})
+
+    def test_chat(self):
+        # Ollama не вызываем: меряется только работа с БД вокруг модели.
+        with mock.patch("apps.ai.views.ollama_chat", return_value="Привет"):
+            self.assertMaxQueries(3, "post", reverse("ai-chat"), {"message": "Как дела?"})
+
+    def test_act_hero_stats(self):
+        token = signing.dumps({"name": "hero_stats", "args": {}}, salt="ai-action")
+        self.assertMaxQueries(2, "post", reverse("ai-act"), {"action_token": token})
+
+    def test_act_boss_status(self):
+        token = signing.dumps({"name": "boss_status", "args": {}}, salt="ai-action")
+        # Босса нет: создание под блокировкой UserStats с повторной проверкой.
+        self.assertMaxQueries(7, "post", reverse("ai-act"), {"action_token": token})
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from apps.core.renderers import ApiRenderer, orjson
+from apps.finance.models import FinanceRecord
+from apps.finance.serializers import FinanceRecordSerializer
+from apps.focus.models import FocusSession
+from apps.focus.serializers import FocusSessionSerializer
+from apps.projects.models import Task
+from apps.projects.serializers import TaskSerializer
+from apps.skills.models import SkillNode, SkillTrack
+
+
+class LegacyApiRenderer(JSONRenderer):
+    # Прежний ApiRenderer: новый dict-конверт на каждый ответ + stdlib json.
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get("response")
+        status_code = getattr(response, "status_code", 200)
+        if isinstance(data, dict) and set(data.keys()) == {"success", "data", "errors"}:
+            wrapped = data
+        elif 200 <= status_code < 400:
+            wrapped = {"success": True, "data": data, "errors": None}
+        else:
+            wrapped = {"success": False, "data": None, "errors": data}
+        return super().render(wrapped, accepted_media_type, renderer_context)
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _page(results) -> dict:
+    return {"count": len(results), "next": "http://localhost/api/?page=2", "previous": None, "results": results}
+
+
+class Command(BaseCommand):
+    help = (
+        "ApiRenderer на ответах по --rows строк (задачи, фокус-сессии, финансы, сырые Decimal/datetime): "
+        "прежний рендерер против stdlib- и orjson-пути; проверяет, что байты совпадают."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def _payloads(self, rows: int) -> dict:
+        # Несохранённые объекты: сериализаторы не ходят в БД, меряется только рендер.
+        now = timezone.now()
+        today = timezone.localdate()
+        track = SkillTrack(id=1, code="backend", title="Backend")
+        node = SkillNode(id=1, track=track, code="python", title="Python")
+
+        tasks = [
+            Task(
+                id=i,
+                project_id=1 + i % 20,
+                title=f"Задача {i}",
+                difficulty=1 + i % 5,
+                notes="Заметка " * 5,
+                created_at=now,
+                updated_at=now,
+            )
+            for i in range(rows)
+        ]
+        sessions = [
+            FocusSession(
+                id=i,
+                skill_node=node,
+                note="фокус",
+                started_at=now - timedelta(minutes=50),
+                ended_at=now,
+                duration_seconds=3000,
+                xp_awarded=25,
+                created_at=now,
+            )
+            for i in range(rows)
+        ]
+        records = [
+            FinanceRecord(
+                id=i,
+                type=FinanceRecord.Type.EXPENSE,
+                amount=Decimal("1234.50") + i,
+                category=f"category-{i % 12}",
+                date=today - timedelta(days=i),
+                description="",
+                created_at=now,
+                updated_at=now,
+            )
+            for i in range(rows)
+        ]
+        raw = [
+            {"day": today - timedelta(days=i), "at": now - timedelta(seconds=i), "amount": Decimal("10.25") * i, "xp": i}
+            for i in range(rows)
+        ]
+        return {
+            "tasks": _page(TaskSerializer(tasks, many=True).data),
+            "focus": _page(FocusSessionSerializer(sessions, many=True).data),
+            "finance": _page(FinanceRecordSerializer(records, many=True).data),
+            "raw": {"series": raw},
+        }
+
+    def _time(self, renderer, data, context, repeat: int) -> tuple[bytes, list[float]]:
+        body = renderer.render(data, "application/json", context)
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            renderer.render(data, "application/json", context)
+            samples.append((time.perf_counter() - started) * 1000)
+        return body, samples
+
+    def handle(self, *args, **options):
+        rows = int(options["rows"])
+        repeat = int(options["repeat"])
+        context = {"response": SimpleNamespace(status_code=200)}
+
+        variants = [("legacy", LegacyApiRenderer(), {}), ("stdlib", ApiRenderer(), {"API_ORJSON": False})]
+        if orjson is not None:
+            variants.append(("orjson", ApiRenderer(), {"API_ORJSON": True}))
+        else:
+            self.stdout.write("orjson не установлен: только stdlib (pip install -r requirements-speedups.txt)")
+
+        for name, data in self._payloads(rows).items():
+            baseline = None
+            reference = None
+            for label, renderer, overrides in variants:
+                with override_settings(**overrides):
+                    body, samples = self._time(renderer, data, context, repeat)
+                p50 = _percentile(samples, 0.5)
+                baseline = baseline or p50
+                reference = reference if reference is not None else body
+                self.stdout.write(
+                    f"{name:<8} {label:<7} rows={rows} size={len(body) / 1024:7.1f}KiB "
+                    f"p50={p50:7.3f}ms p95={_percentile(samples, 0.95):7.3f}ms "
+                    f"x{baseline / p50:5.2f} same_bytes={body == reference}"
+                )
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import multiprocessing
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.test import override_settings
+
+from apps.dashboard.services import compute_dashboard
+from apps.stats.models import XPEvent
+from apps.stats.services import award_xp_event
+
+# Прежнее поведение: rollback journal, без busy_timeout (только таймаут драйвера).
+LEGACY_PRAGMAS = {"journal_mode": "delete", "synchronous": "full"}
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _worker(kind: str, user_id: int, deadline: float, results) -> None:
+    # Отдельный процесс (как воркер gunicorn): своё соединение, без общего GIL.
+    connection.close()
+    user = get_user_model().objects.get(pk=user_id)
+    samples: list[float] = []
+    errors = 0
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            if kind == "write":
+                award_xp_event(user=user, kind=XPEvent.Kind.WORKOUT, amount=1)
+            else:
+                compute_dashboard(user=user)
+        except OperationalError:
+            # "database is locked"
+            errors += 1
+            continue
+        samples.append((time.perf_counter() - started) * 1000)
+    connection.close()
+    results.put((kind, samples, errors))
+
+
+class Command(BaseCommand):
+    help = (
+        "SQLite: параллельные процессы-писатели (award_xp_event) и читатели (дашборд без кеша) "
+        "с прежним rollback journal и с settings.SQLITE_PRAGMAS (WAL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=2)
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=5.0, help="Длительность каждого прогона")
+        parser.add_argument("--timeout", type=float, default=1.0, help="Таймаут драйвера sqlite3, сек")
+
+    def _run(self, label: str, pragmas: dict, users, *, writers: int, readers: int, seconds: float) -> None:
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            connection.close()
+            connection.ensure_connection()  # journal_mode меняется до старта воркеров
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode")
+                journal = cursor.fetchone()[0]
+            connection.close()
+
+            ctx = multiprocessing.get_context("fork")
+            results = ctx.Queue()
+            deadline = time.time() + seconds
+            jobs = [("write", users[i % len(users)].pk) for i in range(writers)]
+            jobs += [("read", users[i % len(users)].pk) for i in range(readers)]
+            processes = [ctx.Process(target=_worker, args=(kind, user_id, deadline, results)) for kind, user_id in jobs]
+            for p in processes:
+                p.start()
+            collected = [results.get() for _ in processes]
+            for p in processes:
+                p.join()
+
+        for kind in ("write", "read"):
+            samples = [s for k, chunk, _ in collected if k == kind for s in chunk]
+            errors = sum(e for k, _, e in collected if k == kind)
+            self.stdout.write(
+                f"{label:<8} journal={journal:<6} {kind:<5} ok={len(samples):<6} errors={errors:<5} "
+                f"rate={len(samples) / seconds:8.1f}/s p50={_percentile(samples, 0.5):8.2f}ms "
+                f"p99={_percentile(samples, 0.99):8.2f}ms"
+            )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Бенчмарк только для SQLite")
+
+        original_options = dict(connection.settings_dict.get("OPTIONS", {}))
+        connection.settings_dict["OPTIONS"] = {**original_options, "timeout": float(options["timeout"])}
+
+        stamp = int(time.time())
+        User = get_user_model()
+        users = [
+            User.objects.create(username=f"bench_sqlite_{stamp}_{i}", email=f"bench_sqlite_{stamp}_{i}@example.com")
+            for i in range(max(1, int(options["writers"])))
+        ]
+        kwargs = {"writers": int(options["writers"]), "readers": int(options["readers"]), "seconds": float(options["seconds"])}
+        try:
+            self._run("legacy", LEGACY_PRAGMAS, users, **kwargs)
+            self._run("pragmas", getattr(settings, "SQLITE_PRAGMAS", {}), users, **kwargs)
+        finally:
+            connection.close()
+            connection.settings_dict["OPTIONS"] = original_options
+            for user in users:
+                user.delete()
@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import json
+import logging
+import random
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from apps.core import metrics
+from apps.core.seeding import seed_realistic_user
+from apps.projects.models import Project
+
+# Веса сценариев (см. run_scenario) в профиле трафика.
+PROFILES: dict[str, dict[str, int]] = {
+    "mixed": {"dashboard": 40, "analytics": 15, "focus": 15, "task": 15, "boss": 15},
+    "read-heavy": {"dashboard": 70, "analytics": 25, "boss": 5},
+    "write-heavy": {"dashboard": 10, "focus": 30, "task": 40, "boss": 20},
+}
+
+# Под нагрузкой их поток бесполезен: ошибки и превышения бюджета видны в отчёте.
+QUIET_LOGGERS = ("django.request", "apps.core.metrics")
+
+LOCK_MARKERS = ("database is locked", "deadlock", "could not obtain lock", "lock timeout", "lock_not_available")
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _is_lock_error(text: str) -> bool:
+    text = text.lower()
+    return any(marker in text for marker in LOCK_MARKERS)
+
+
+def _git_revision() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5
+        )
+    except OSError:
+        return ""
+    return out.stdout.strip()
+
+
+@contextmanager
+def _quiet_loggers():
+    loggers = [logging.getLogger(name) for name in QUIET_LOGGERS]
+    levels = [logger.level for logger in loggers]
+    for logger in loggers:
+        logger.setLevel(logging.CRITICAL)
+    try:
+        yield
+    finally:
+        for logger, level in zip(loggers, levels):
+            logger.setLevel(level)
+
+
+@dataclass
+class SimUser:
+    user_id: int
+    token: str
+    project_id: int
+
+
+@dataclass
+class EndpointStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    lock_errors: int = 0
+
+
+class InProcessTransport:
+    """django.test.Client в потоке воркера: весь стек middleware/DRF без сети."""
+
+    def __init__(self, sim: SimUser):
+        host = next((h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost")
+        self.client = Client(HTTP_AUTHORIZATION=f"Token {sim.token}", HTTP_HOST=host)
+
+    def request(self, method: str, path: str, body: dict | None) -> tuple[int, dict | None, str]:
+        try:
+            response = getattr(self.client, method.lower())(path, body or {}, content_type="application/json")
+        except Exception as e:
+            # raise_request_exception: исключение вью (в т.ч. "database is locked") вместо 500.
+            return 599, None, f"{type(e).__name__}: {e}"
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = None
+        return response.status_code, payload, "" if response.status_code < 500 else response.content.decode(errors="replace")
+
+    def close(self) -> None:
+        connection.close()
+
+
+class HttpTransport:
+    """Запросы к запущенному серверу (runserver/gunicorn) на той же БД."""
+
+    def __init__(self, sim: SimUser, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.headers = {"Authorization": f"Token {sim.token}", "Content-Type": "application/json"}
+
+    def request(self, method: str, path: str, body: dict | None) -> tuple[int, dict | None, str]:
+        data = json.dumps(body or {}).encode() if method != "GET" else None
+        req = urllib.request.Request(self.base_url + path, data=data, headers=self.headers, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=30) as response:
+                status, raw = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, raw = e.code, e.read()
+        except (urllib.error.URLError, OSError) as e:
+            return 599, None, str(e)
+        try:
+            payload = json.loads(raw) if raw else None
+        except ValueError:
+            payload = None
+        return status, payload, "" if status < 500 else raw.decode(errors="replace")
+
+    def close(self) -> None:
+        pass
+
+
+def _data(payload: dict | None) -> dict:
+    return (payload or {}).get("data") or {}
+
+
+def run_scenario(name: str, sim: SimUser, transport, record) -> None:
+    # Сценарий — одно "действие" пользователя из нескольких запросов;
+    # следующий шаг может зависеть от ответа предыдущего (id созданной задачи).
+    def step(label: str, method: str, path: str, body: dict | None = None) -> dict | None:
+        started = time.perf_counter()
+        status, payload, error = transport.request(method, path, body)
+        record(label, (time.perf_counter() - started) * 1000, status, error)
+        return payload if status < 400 else None
+
+    if name == "dashboard":
+        step("GET dashboard", "GET", "/api/dashboard/")
+        step("GET hero", "GET", "/api/hero/")
+    elif name == "analytics":
+        step("GET analytics-summary", "GET", "/api/analytics/summary/")
+    elif name == "focus":
+        step("POST focus-start", "POST", "/api/focus/start/", {"kind": "coding"})
+        step("POST focus-stop", "POST", "/api/focus/stop/")
+    elif name == "task":
+        created = step(
+            "POST tasks-list", "POST", "/api/tasks/", {"project": sim.project_id, "title": "loadtest", "difficulty": 2}
+        )
+        task_id = _data(created).get("id")
+        if task_id:
+            step("POST tasks-complete", "POST", f"/api/tasks/{task_id}/complete/")
+    elif name == "boss":
+        step("GET boss", "GET", "/api/boss/")
+        step("POST boss-attack", "POST", "/api/boss/attack/")
+    else:  # pragma: no cover
+        raise ValueError(name)
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный прогон API: N синтетических пользователей на пуле потоков воспроизводят профиль "
+        "трафика (дашборд, фокус, задачи, босс, аналитика). Пропускная способность, p50/p95/p99 "
+        "по эндпоинтам, ошибки блокировок; --output пишет JSON для сравнения между коммитами."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=8, help="Синтетических пользователей")
+        parser.add_argument("--concurrency", type=int, default=None, help="Потоков (по умолчанию = --users)")
+        parser.add_argument("--seconds", type=float, default=10.0)
+        parser.add_argument("--profile", choices=sorted(PROFILES), default="mixed")
+        parser.add_argument("--think-ms", type=float, default=0.0, help="Пауза между сценариями")
+        parser.add_argument("--history", type=int, default=2000, help="XP-событий в истории каждого пользователя")
+        parser.add_argument("--base-url", default="", help="Бить по запущенному серверу вместо test client")
+        parser.add_argument("--seed", type=int, default=0, help="Seed генератора сценариев")
+        parser.add_argument("--output", default="", help="Путь для JSON с результатами")
+        parser.add_argument("--keep", action="store_true", help="Не удалять пользователей после прогона")
+
+    def _setup_users(self, count: int, history: int) -> list[SimUser]:
+        stamp = int(time.time())
+        sims = []
+        for i in range(count):
+            user = seed_realistic_user(
+                username=f"loadtest_{stamp}_{i}",
+                xp_events=history,
+                tasks=history // 25,
+                skills=min(200, history // 10),
+                finance_records=history // 10,
+                workouts=history // 50,
+                learning_logs=history // 50,
+                focus_sessions=history // 50,
+            )
+            token, _ = Token.objects.get_or_create(user=user)
+            project = Project.objects.filter(user=user).order_by("id").first() or Project.objects.create(
+                user=user, name="loadtest"
+            )
+            sims.append(SimUser(user_id=user.pk, token=token.key, project_id=project.pk))
+        return sims
+
+    def handle(self, *args, **options):
+        users_n = max(1, int(options["users"]))
+        workers_n = max(1, min(int(options["concurrency"] or users_n), users_n))
+        seconds = float(options["seconds"])
+        profile = PROFILES[options["profile"]]
+        base_url = options["base_url"]
+        think = float(options["think_ms"]) / 1000
+
+        sims = self._setup_users(users_n, max(0, int(options["history"])))
+        stats: dict[str, EndpointStats] = {}
+        lock = threading.Lock()
+        scenario_counts: dict[str, int] = {name: 0 for name in profile}
+        failures: list[str] = []
+
+        def record(label: str, ms: float, status: int, error: str) -> None:
+            with lock:
+                s = stats.setdefault(label, EndpointStats())
+                if status >= 500:
+                    s.errors += 1
+                    s.lock_errors += int(_is_lock_error(error))
+                    if len(failures) < 5:
+                        failures.append(f"{label}: {status} {error[:200]}")
+                elif status >= 400:
+                    s.errors += 1
+                else:
+                    s.latencies.append(ms)
+
+        def worker(index: int, deadline: float) -> None:
+            rng = random.Random(int(options["seed"]) * 1000 + index)
+            mine = sims[index::workers_n]
+            transports = [HttpTransport(sim, base_url) if base_url else InProcessTransport(sim) for sim in mine]
+            names, weights = zip(*profile.items())
+            i = 0
+            try:
+                while time.perf_counter() < deadline:
+                    name = rng.choices(names, weights)[0]
+                    run_scenario(name, mine[i % len(mine)], transports[i % len(mine)], record)
+                    with lock:
+                        scenario_counts[name] += 1
+                    i += 1
+                    if think:
+                        time.sleep(think)
+            finally:
+                for transport in transports:
+                    transport.close()
+
+        if not base_url:
+            metrics.reset()
+        connection.close()
+        try:
+            started = time.perf_counter()
+            deadline = started + seconds
+            threads = [threading.Thread(target=worker, args=(i, deadline)) for i in range(workers_n)]
+            with _quiet_loggers():
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+            elapsed = time.perf_counter() - started
+            queries = {f"{method} {endpoint}": m for (endpoint, method), m in metrics.snapshot().items()} if not base_url else {}
+
+            result = self._report(stats, elapsed, queries)
+            result["meta"] = {
+                "revision": _git_revision(),
+                "started_at": timezone.now().isoformat(),
+                "target": base_url or "in-process",
+                "db": connection.vendor,
+                "profile": options["profile"],
+                "users": users_n,
+                "concurrency": workers_n,
+                "seconds": round(elapsed, 3),
+                "history": int(options["history"]),
+                "seed": int(options["seed"]),
+                "scenarios": scenario_counts,
+            }
+            for line in failures:
+                self.stdout.write(f"failure: {line}")
+            if options["output"]:
+                with open(options["output"], "w", encoding="utf-8") as f:
+                    json.dump(result, f, ensure_ascii=False, indent=2, sort_keys=True)
+                self.stdout.write(f"JSON: {options['output']}")
+        finally:
+            if not options["keep"]:
+                get_user_model().objects.filter(pk__in=[s.user_id for s in sims]).delete()
+
+    def _report(self, stats: dict[str, EndpointStats], elapsed: float, queries: dict) -> dict:
+        if not stats:
+            raise CommandError("Ни одного запроса не выполнено")
+
+        endpoints = {}
+        self.stdout.write(
+            f"{'endpoint':<24} {'ok':>7} {'err':>5} {'lock':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'sql':>5}"
+        )
+        for label in sorted(stats):
+            s = stats[label]
+            m = queries.get(label)
+            row = {
+                "requests": len(s.latencies) + s.errors,
+                "ok": len(s.latencies),
+                "errors": s.errors,
+                "lock_errors": s.lock_errors,
+                "throughput": round(len(s.latencies) / elapsed, 2),
+                "p50_ms": round(_percentile(s.latencies, 0.50), 3),
+                "p95_ms": round(_percentile(s.latencies, 0.95), 3),
+                "p99_ms": round(_percentile(s.latencies, 0.99), 3),
+                "max_ms": round(max(s.latencies, default=0.0), 3),
+                "queries_avg": round(m.queries / m.requests, 2) if m and m.requests else None,
+            }
+            endpoints[label] = row
+            sql = f"{row['queries_avg']:.1f}" if row["queries_avg"] is not None else "-"
+            self.stdout.write(
+                f"{label:<24} {row['ok']:>7} {row['errors']:>5} {row['lock_errors']:>5} {row['throughput']:>8.1f} "
+                f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {sql:>5}"
+            )
+
+        latencies = [ms for s in stats.values() for ms in s.latencies]
+        totals = {
+            "requests": sum(r["requests"] for r in endpoints.values()),
+            "ok": len(latencies),
+            "errors": sum(r["errors"] for r in endpoints.values()),
+            "lock_errors": sum(r["lock_errors"] for r in endpoints.values()),
+            "throughput": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(_percentile(latencies, 0.50), 3),
+            "p95_ms": round(_percentile(latencies, 0.95), 3),
+            "p99_ms": round(_percentile(latencies, 0.99), 3),
+        }
+        self.stdout.write(
+            f"{'TOTAL':<24} {totals['ok']:>7} {totals['errors']:>5} {totals['lock_errors']:>5} "
+            f"{totals['throughput']:>8.1f} {totals['p50_ms']:>8.2f} {totals['p95_ms']:>8.2f} {totals['p99_ms']:>8.2f}"
+        )
+        return {"endpoints": endpoints, "totals": totals}
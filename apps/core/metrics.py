@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("apps.core.metrics")
+
+
+@dataclass
+class RequestMetrics:
+    """Метрики одного запроса: SQL-запросы, время в БД и на рендер ответа.
+
+    render_seconds — только ApiRenderer (data -> байты). Сериализаторы DRF
+    (`to_representation`) работают внутри view и сюда не входят: их ленивые
+    запросы уже учтены в db_seconds, остальное — в общем времени.
+    """
+
+    queries: int = 0
+    db_seconds: float = 0.0
+    render_seconds: float = 0.0
+
+
+@dataclass
+class EndpointMetrics:
+    """Накопленные метрики эндпоинта (url name + метод) в этом процессе."""
+
+    requests: int = 0
+    queries: int = 0
+    queries_max: int = 0
+    seconds: float = 0.0
+    db_seconds: float = 0.0
+    render_seconds: float = 0.0
+    budget_exceeded: int = 0
+    statuses: dict[str, int] = field(default_factory=dict)
+
+
+_current: ContextVar[RequestMetrics | None] = ContextVar("request_metrics", default=None)
+_registry: dict[tuple[str, str], EndpointMetrics] = {}
+_lock = threading.Lock()
+
+
+def metrics_enabled() -> bool:
+    return bool(getattr(settings, "METRICS_ENABLED", True))
+
+
+def query_budget(endpoint: str, method: str = "GET") -> int | None:
+    # Ключ "POST finance-list" точнее ключа "finance-list" (любой метод).
+    budgets = getattr(settings, "QUERY_BUDGETS", {})
+    return budgets.get(f"{method} {endpoint}", budgets.get(endpoint))
+
+
+class _QueryCounter:
+    # connection.execute_wrapper: считает каждый execute/executemany и его длительность.
+    def __init__(self, metrics: RequestMetrics):
+        self.metrics = metrics
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.metrics.queries += 1
+            self.metrics.db_seconds += time.perf_counter() - started
+
+
+@contextmanager
+def track_request():
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    counter = _QueryCounter(metrics)
+    try:
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(counter))
+            yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def track_render():
+    """Время рендера ответа в байты (вызывается из ApiRenderer), без сериализаторов DRF."""
+    metrics = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.render_seconds += time.perf_counter() - started
+
+
+def record(*, endpoint: str, method: str, status: int, seconds: float, metrics: RequestMetrics) -> bool:
+    """Добавляет запрос в реестр. Возвращает True, если превышен бюджет запросов."""
+    budget = query_budget(endpoint, method)
+    exceeded = budget is not None and metrics.queries > budget
+    with _lock:
+        m = _registry.setdefault((endpoint, method), EndpointMetrics())
+        m.requests += 1
+        m.queries += metrics.queries
+        m.queries_max = max(m.queries_max, metrics.queries)
+        m.seconds += seconds
+        m.db_seconds += metrics.db_seconds
+        m.render_seconds += metrics.render_seconds
+        m.budget_exceeded += int(exceeded)
+        m.statuses[str(status)] = m.statuses.get(str(status), 0) + 1
+    if exceeded:
+        logger.warning(
+            "Query budget exceeded: %s %s made %d queries (budget %d)", method, endpoint, metrics.queries, budget
+        )
+    return exceeded
+
+
+def snapshot() -> dict[tuple[str, str], EndpointMetrics]:
+    with _lock:
+        return {
+            key: EndpointMetrics(**{**vars(m), "statuses": dict(m.statuses)}) for key, m in _registry.items()
+        }
+
+
+def reset() -> None:
+    with _lock:
+        _registry.clear()
+
+
+def _labels(**labels: str) -> str:
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def render_prometheus() -> str:
+    """Текстовый формат Prometheus (version 0.0.4)."""
+    data = sorted(snapshot().items())
+    lines: list[str] = []
+
+    def family(name: str, kind: str, help_text: str, rows) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in rows:
+            lines.append(f"{name}{_labels(**labels)} {value}")
+
+    family(
+        "solo_http_requests_total",
+        "counter",
+        "HTTP-запросы по эндпоинту и статусу.",
+        [
+            ({"endpoint": e, "method": meth, "status": status}, count)
+            for (e, meth), m in data
+            for status, count in sorted(m.statuses.items())
+        ],
+    )
+    family(
+        "solo_http_request_duration_seconds_sum",
+        "counter",
+        "Суммарное время обработки запросов.",
+        [({"endpoint": e, "method": meth}, f"{m.seconds:.6f}") for (e, meth), m in data],
+    )
+    family(
+        "solo_db_queries_total",
+        "counter",
+        "SQL-запросы, выполненные при обработке.",
+        [({"endpoint": e, "method": meth}, m.queries) for (e, meth), m in data],
+    )
+    family(
+        "solo_db_queries_max",
+        "gauge",
+        "Максимум SQL-запросов за один запрос.",
+        [({"endpoint": e, "method": meth}, m.queries_max) for (e, meth), m in data],
+    )
+    family(
+        "solo_db_duration_seconds_sum",
+        "counter",
+        "Суммарное время в БД.",
+        [({"endpoint": e, "method": meth}, f"{m.db_seconds:.6f}") for (e, meth), m in data],
+    )
+    family(
+        "solo_render_duration_seconds_sum",
+        "counter",
+        "Суммарное время рендера ответа в JSON (ApiRenderer, без сериализаторов DRF).",
+        [({"endpoint": e, "method": meth}, f"{m.render_seconds:.6f}") for (e, meth), m in data],
+    )
+    family(
+        "solo_query_budget_exceeded_total",
+        "counter",
+        "Запросы, превысившие бюджет QUERY_BUDGETS.",
+        [({"endpoint": e, "method": meth}, m.budget_exceeded) for (e, meth), m in data],
+    )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import time
+
+from .metrics import metrics_enabled, record, track_request
+
+
+class RequestMetricsMiddleware:
+    """Считает SQL-запросы, время в БД, рендер и общее время каждого запроса.
+
+    Ключ — имя URL (`dashboard`, `boss-attack`, ...). Результат уходит в заголовок
+    `Server-Timing` и в реестр процесса (`/api/system/metrics/`).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not metrics_enabled():
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        with track_request() as metrics:
+            response = self.get_response(request)
+        seconds = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        endpoint = (match.url_name or match.view_name) if match else "unresolved"
+        record(endpoint=endpoint, method=request.method, status=response.status_code, seconds=seconds, metrics=metrics)
+
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={metrics.db_seconds * 1000:.2f};desc="{metrics.queries} queries"',
+                f"render;dur={metrics.render_seconds * 1000:.2f}",
+                f"total;dur={seconds * 1000:.2f}",
+            ]
+        )
+        return response
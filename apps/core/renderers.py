@@ -1,6 +1,40 @@
 from __future__ import annotations
 
+import json
+
+from django.conf import settings
 from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .metrics import track_render
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson опционален (requirements-speedups.txt)
+    orjson = None
+
+# Конверт собирается вокруг уже сериализованного `data`, без промежуточного dict.
+SUCCESS_PREFIX = b'{"success":true,"data":'
+SUCCESS_SUFFIX = b',"errors":null}'
+ERROR_PREFIX = b'{"success":false,"data":null,"errors":'
+ERROR_SUFFIX = b"}"
+ENVELOPE_KEYS = frozenset(("success", "data", "errors"))
+
+# datetime/date/time/UUID orjson пишет сам (OPT_UTC_Z — "Z" вместо "+00:00", как у DRF);
+# остальное (Decimal -> float, timedelta, lazy-строки, QuerySet) — через default DRF-энкодера.
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+_drf_default = JSONEncoder().default
+
+
+def orjson_enabled() -> bool:
+    return orjson is not None and bool(getattr(settings, "API_ORJSON", True))
+
+
+def _escape_js_separators(body: bytes) -> bytes:
+    # Как JSONRenderer: U+2028/U+2029 экранируются, чтобы JSON оставался подмножеством JS.
+    if b"\xe2\x80\xa8" in body or b"\xe2\x80\xa9" in body:
+        body = body.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
+    return body
 
 
 class ApiRenderer(JSONRenderer):
@@ -11,10 +45,34 @@ class ApiRenderer(JSONRenderer):
 
     Error:
       {"success": false, "data": null, "errors": {"field": ["msg"]}}
+
+    With orjson installed the payload is encoded by orjson; otherwise by the
+    stdlib encoder with DRF's settings. For strings, ints, Decimal, dates and
+    UUIDs the bytes are the same; the known differences are:
+
+    * exponent floats: orjson writes ``1e16``, stdlib ``1e+16`` (same value);
+    * NaN/Infinity: orjson writes ``null``, strict stdlib raises ValueError;
+    * ints beyond 64 bits: orjson raises, so the stdlib encoder is used instead.
     """
 
     charset = "utf-8"
 
+    def dumps(self, data) -> bytes:
+        if orjson_enabled() and not self.ensure_ascii:
+            try:
+                return _escape_js_separators(orjson.dumps(data, default=_drf_default, option=ORJSON_OPTIONS))
+            except orjson.JSONEncodeError:
+                # int > 64 бит, вложенность > 254, тип без default — stdlib закодирует или бросит свою ошибку.
+                pass
+        body = json.dumps(
+            data,
+            cls=self.encoder_class,
+            ensure_ascii=self.ensure_ascii,
+            allow_nan=not self.strict,
+            separators=(",", ":"),
+        )
+        return body.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029").encode()
+
     def render(self, data, accepted_media_type=None, renderer_context=None):
         renderer_context = renderer_context or {}
         response = renderer_context.get("response")
@@ -28,13 +86,20 @@ class ApiRenderer(JSONRenderer):
         if status_code == 204:
             return b""
 
-        if isinstance(data, dict) and set(data.keys()) == {"success", "data", "errors"}:
-            wrapped = data
-        else:
-            is_success = 200 <= status_code < 400
-            if is_success:
-                wrapped = {"success": True, "data": data, "errors": None}
-            else:
-                wrapped = {"success": False, "data": None, "errors": data}
+        is_success = 200 <= status_code < 400
+        with track_render():
+            if self.get_indent(accepted_media_type, renderer_context) is not None or not self.compact:
+                # Красивый вывод (`; indent=4`) — редкий путь, через JSONRenderer целиком.
+                if not (isinstance(data, dict) and data.keys() == ENVELOPE_KEYS):
+                    if is_success:
+                        data = {"success": True, "data": data, "errors": None}
+                    else:
+                        data = {"success": False, "data": None, "errors": data}
+                return super().render(data, accepted_media_type, renderer_context)
 
-        return super().render(wrapped, accepted_media_type, renderer_context)
+            body = self.dumps(data)
+            if isinstance(data, dict) and len(data) == 3 and data.keys() == ENVELOPE_KEYS:
+                return body
+            if is_success:
+                return SUCCESS_PREFIX + body + SUCCESS_SUFFIX
+            return ERROR_PREFIX + body + ERROR_SUFFIX
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import F, Sum
+from django.utils import timezone
+
+# Засев "реалистичного" пользователя с историей в десятки тысяч строк.
+# Используется тестами бюджета запросов (apps.core.testing) и командой loadtest,
+# поэтому модуль не зависит от django.test.
+
+SEED_XP_EVENTS = 50_000
+SEED_TASKS = 2_000
+SEED_SKILLS = 200
+SEED_FINANCE_RECORDS = 5_000
+SEED_WORKOUTS = 1_000
+SEED_LEARNING_LOGS = 1_000
+SEED_FOCUS_SESSIONS = 1_000
+SEED_DAYS = 730
+
+
+def seed_realistic_user(
+    *,
+    username: str = "seeded",
+    xp_events: int = SEED_XP_EVENTS,
+    tasks: int = SEED_TASKS,
+    skills: int = SEED_SKILLS,
+    finance_records: int = SEED_FINANCE_RECORDS,
+    workouts: int = SEED_WORKOUTS,
+    learning_logs: int = SEED_LEARNING_LOGS,
+    focus_sessions: int = SEED_FOCUS_SESSIONS,
+):
+    """Пользователь с историей за SEED_DAYS дней: bulk_create + штатные пересборки агрегатов.
+
+    Денормализованные данные (UserStats, XPDailyRollup, стрики, снапшоты баланса,
+    счётчики dev_score) собираются теми же сервисами, что и в проде, поэтому
+    эндпоинты видят консистентное состояние.
+    """
+    from apps.finance.models import FinanceRecord
+    from apps.finance.services import rebuild_balance_snapshots
+    from apps.focus.models import FocusSession
+    from apps.logs.models import LearningLog
+    from apps.projects.models import Project, Task
+    from apps.skills.models import Skill, SkillNode
+    from apps.stats.models import XPEvent
+    from apps.stats.services import add_xp, rebuild_streaks, rebuild_xp_rollups, reconcile_dev_counters
+    from apps.workouts.models import Workout
+
+    user = get_user_model().objects.create_user(username=username, email=f"{username}@example.com", password="secret1234")
+    today = timezone.localdate()
+    tz = timezone.get_current_timezone()
+
+    def moment(i: int) -> datetime:
+        return datetime.combine(today - timedelta(days=i % SEED_DAYS), time(9 + i % 12), tzinfo=tz)
+
+    kinds = [XPEvent.Kind.WORKOUT, XPEvent.Kind.TASK_COMPLETE, XPEvent.Kind.LEARNING_LOG, XPEvent.Kind.FOCUS_SESSION]
+    XPEvent.objects.bulk_create(
+        [XPEvent(user=user, kind=kinds[i % len(kinds)], amount=5 + i % 20, occurred_at=moment(i)) for i in range(xp_events)],
+        batch_size=2000,
+    )
+    # created_at — auto_now_add, bulk_create его перезаписывает; разносим историю по дням.
+    XPEvent.objects.filter(user=user).update(created_at=F("occurred_at"))
+
+    projects = Project.objects.bulk_create(
+        [Project(user=user, name=f"project-{i}", is_commercial=i % 4 == 0) for i in range(20)]
+    )
+    Task.objects.bulk_create(
+        [
+            Task(
+                project=projects[i % len(projects)],
+                title=f"task-{i}",
+                difficulty=1 + i % 5,
+                status=Task.Status.DONE if i % 3 == 0 else Task.Status.TODO,
+                completed_at=moment(i) if i % 3 == 0 else None,
+            )
+            for i in range(tasks)
+        ],
+        batch_size=1000,
+    )
+
+    nodes = list(SkillNode.objects.order_by("id")[:skills])
+    Skill.objects.bulk_create(
+        [
+            Skill(
+                user=user,
+                node=nodes[i] if i < len(nodes) else None,
+                name=f"skill-{i}",
+                level=i % 101,
+                status=Skill.status_for_level(i % 101),
+            )
+            for i in range(skills)
+        ],
+        batch_size=1000,
+    )
+
+    FinanceRecord.objects.bulk_create(
+        [
+            FinanceRecord(
+                user=user,
+                type=FinanceRecord.Type.INCOME if i % 3 else FinanceRecord.Type.EXPENSE,
+                amount=Decimal("10.50") + i % 100,
+                category=f"category-{i % 12}",
+                date=today - timedelta(days=i % SEED_DAYS),
+            )
+            for i in range(finance_records)
+        ],
+        batch_size=1000,
+    )
+
+    Workout.objects.bulk_create(
+        [
+            Workout(user=user, type="run", duration=30 + i % 60, intensity=1 + i % 10, date=today - timedelta(days=i % SEED_DAYS))
+            for i in range(workouts)
+        ],
+        batch_size=1000,
+    )
+    LearningLog.objects.bulk_create(
+        [LearningLog(user=user, title=f"log-{i}", date=today - timedelta(days=i % SEED_DAYS)) for i in range(learning_logs)],
+        batch_size=1000,
+    )
+    FocusSession.objects.bulk_create(
+        [
+            FocusSession(
+                user=user,
+                skill_node=nodes[i % len(nodes)] if nodes else None,
+                started_at=moment(i),
+                ended_at=moment(i) + timedelta(minutes=50),
+                duration_seconds=50 * 60,
+                xp_awarded=25,
+            )
+            for i in range(focus_sessions)
+        ],
+        batch_size=1000,
+    )
+
+    rebuild_xp_rollups(user_ids=[user.pk])
+    rebuild_streaks(user_ids=[user.pk])
+    add_xp(user=user, amount=int(XPEvent.objects.filter(user=user).aggregate(total=Sum("amount"))["total"] or 0))
+    reconcile_dev_counters(user=user)
+    rebuild_balance_snapshots(user_ids=[user.pk])
+    return user
@@ -6,3 +6,4 @@ from rest_framework import serializers
 class SystemSerializer(serializers.Serializer):
     ranks = serializers.ListField(child=serializers.DictField())
     xp_rules = serializers.DictField()
+    level_thresholds = serializers.ListField(child=serializers.IntegerField())
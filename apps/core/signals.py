@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import re
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_PRAGMA_NAME = re.compile(r"^[a-z_]+$")
+_PRAGMA_VALUE = re.compile(r"^-?\w+$")
+
+
+def sqlite_pragmas() -> dict:
+    # Единственный источник значений — settings.SQLITE_PRAGMAS; нет настройки или {} — ничего не меняем.
+    return dict(getattr(settings, "SQLITE_PRAGMAS", None) or {})
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    pragmas = sqlite_pragmas()
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            # PRAGMA не принимает параметры запроса — проверяем, что подставляем.
+            if not _PRAGMA_NAME.match(str(name)) or not _PRAGMA_VALUE.match(str(value)):
+                raise ValueError(f"Некорректная SQLite PRAGMA: {name}={value!r}")
+            cursor.execute(f"PRAGMA {name} = {value}")
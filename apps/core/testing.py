@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from apps.core.seeding import seed_realistic_user
+
+# Общие помощники для тестов бюджета запросов: один "реалистичный" пользователь
+# (см. apps.core.seeding) и проверка верхней границы SQL на эндпоинт.
+
+
+class QueryBudgetTestCase(TestCase):
+    """База для тестов бюджета: один засеянный пользователь на класс и assertMaxQueries.
+
+    Бюджет — верхняя граница SQL на весь HTTP-запрос, включая проверку токена.
+    Процессные кэши (дашборд, каталог боссов) сбрасываются перед каждым тестом,
+    так что меряется холодный путь.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_realistic_user()
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        from apps.raids.catalogue import clear_boss_catalogue
+
+        cache.clear()
+        clear_boss_catalogue()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def assertMaxQueries(
+        self,
+        budget: int,
+        method: str,
+        url: str,
+        data=None,
+        *,
+        status: int | None = None,
+        format: str = "json",
+        using: str = DEFAULT_DB_ALIAS,
+    ):
+        with CaptureQueriesContext(connections[using]) as ctx:
+            response = getattr(self.client, method.lower())(url, data, format=format)
+
+        if status is not None:
+            self.assertEqual(response.status_code, status, response.content[:500])
+        else:
+            self.assertLess(response.status_code, 400, response.content[:500])
+
+        executed = len(ctx.captured_queries)
+        if executed > budget:
+            queries = "\n".join(f"{i}. {q['sql']}" for i, q in enumerate(ctx.captured_queries, start=1))
+            self.fail(f"{method.upper()} {url}: {executed} queries, budget {budget}\n{queries}")
+        return response
@@ -1,3 +1,204 @@
-from django.test import TestCase
+import datetime
+import os
+import re
+import tempfile
+import time
+import unittest
+from unittest import mock
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.db.transaction import TransactionManagementError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from apps.stats.models import XPDailyRollup, XPEvent
+from apps.stats.services import award_xp_event, ensure_user_stats
+from apps.workouts.services import create_workout
+
+from . import metrics, renderers
+from .renderers import ApiRenderer
+from .testing import QueryBudgetTestCase
+
+
+class CoreQueryBudgetTests(QueryBudgetTestCase):
+	def test_system(self):
+		self.client.credentials()
+		self.assertMaxQueries(0, "get", reverse("system"))
+
+	def test_system_metrics(self):
+		self.user.is_staff = True
+		self.user.save(update_fields=["is_staff"])
+		self.assertMaxQueries(1, "get", reverse("system-metrics"))
+
+	def test_system_metrics_forbidden_for_non_staff(self):
+		self.assertMaxQueries(1, "get", reverse("system-metrics"), status=403)
+
+	def test_schema(self):
+		self.assertMaxQueries(1, "get", reverse("schema"))
+
+	def test_api_root(self):
+		self.assertMaxQueries(1, "get", reverse("api-root"))
+
+
+class TransactionBoundaryTests(TransactionTestCase):
+	# TransactionTestCase: без обёртки TestCase, чтобы @use_case открывал транзакцию сам.
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(username="tx", email="tx@example.com", password="x")
+
+	def test_helper_outside_transaction_raises(self):
+		with self.assertRaises(TransactionManagementError):
+			ensure_user_stats(self.user)
+
+	def test_award_pipeline_has_no_savepoints(self):
+		# Первое начисление дня (вставка роллапа и дня активности) и повторное (обновление).
+		for _ in range(2):
+			with CaptureQueriesContext(connection) as ctx:
+				create_workout(user=self.user, validated_data={"type": "run", "duration": 30, "intensity": 3})
+			self.assertFalse([q["sql"] for q in ctx.captured_queries if "SAVEPOINT" in q["sql"].upper()])
+		self.assertEqual(XPEvent.objects.filter(user=self.user).count(), 2)
+		rollup = XPDailyRollup.objects.get(user=self.user, kind=XPEvent.Kind.WORKOUT)
+		self.assertEqual((rollup.xp, rollup.events), (180, 2))
+
+
+@unittest.skipIf(renderers.orjson is None, "orjson не установлен")
+class ApiRendererOrjsonTests(SimpleTestCase):
+	PAYLOAD = {
+		"amount": Decimal("1250.50"),
+		"created_at": datetime.datetime(2026, 3, 1, 12, 30, 5, 123456, tzinfo=datetime.timezone.utc),
+		"date": datetime.date(2026, 3, 1),
+		"title": "Жим лёжа — 100 кг ✓ \u2028",
+		"items": [1, 0.1, None, True, {"nested": "ok"}],
+	}
+
+	def _render(self, data, *, status: int = 200, use_orjson: bool) -> bytes:
+		with override_settings(API_ORJSON=use_orjson):
+			return ApiRenderer().render(data, renderer_context={"response": Response(status=status)})
+
+	def assertSameBytes(self, data, *, status: int = 200):
+		self.assertEqual(self._render(data, status=status, use_orjson=True), self._render(data, status=status, use_orjson=False))
+
+	def test_success_envelope_matches_stdlib(self):
+		self.assertSameBytes(self.PAYLOAD)
+		self.assertSameBytes([self.PAYLOAD, self.PAYLOAD])
+
+	def test_error_envelope_matches_stdlib(self):
+		self.assertSameBytes({"amount": ["Введите число."], "non_field_errors": ["Ошибка"]}, status=400)
+		self.assertSameBytes({"detail": "Не найдено."}, status=404)
+		self.assertSameBytes({"success": False, "data": None, "errors": {"detail": "Ошибка"}}, status=500)
+
+	def test_exponent_floats_differ_only_in_format(self):
+		self.assertIn(b'"data":1e16', self._render(1e16, use_orjson=True))
+		self.assertIn(b'"data":1e+16', self._render(1e16, use_orjson=False))
+
+	def test_nan_is_null_under_orjson_and_error_under_strict_stdlib(self):
+		self.assertIn(b'"data":null', self._render(float("nan"), use_orjson=True))
+		with self.assertRaises(ValueError):
+			self._render(float("nan"), use_orjson=False)
+
+	def test_big_int_falls_back_to_stdlib(self):
+		data = {"value": 2**70}
+		self.assertEqual(self._render(data, use_orjson=True), b'{"success":true,"data":{"value":%d},"errors":null}' % 2**70)
+		self.assertSameBytes(data)
+
+
+class RequestMetricsTests(TestCase):
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(username="metrics", email="metrics@example.com", password="x")
+		award_xp_event(user=self.user, kind=XPEvent.Kind.WORKOUT, amount=10)
+		self.client = APIClient()
+		self.client.force_authenticate(self.user)
+		metrics.reset()
+		self.addCleanup(metrics.reset)
+
+	def _timing(self, response) -> dict[str, float]:
+		return {name: float(dur) for name, dur in re.findall(r"(\w+);dur=([\d.]+)", response["Server-Timing"])}
+
+	def test_server_timing_matches_executed_queries(self):
+		with CaptureQueriesContext(connection) as ctx:
+			response = self.client.get(reverse("hero"))
+		self.assertEqual(response.status_code, 200)
+		self.assertIn(f'desc="{len(ctx.captured_queries)} queries"', response["Server-Timing"])
+		timing = self._timing(response)
+		self.assertGreater(timing["render"], 0)
+		self.assertLessEqual(timing["db"] + timing["render"], timing["total"])
+
+	def test_render_time_covers_renderer_only(self):
+		real_dumps = ApiRenderer.dumps
+
+		def slow_dumps(renderer, data):
+			time.sleep(0.05)
+			return real_dumps(renderer, data)
+
+		with mock.patch.object(ApiRenderer, "dumps", slow_dumps):
+			response = self.client.get(reverse("hero"))
+		timing = self._timing(response)
+		self.assertGreaterEqual(timing["render"], 50)
+		self.assertLess(timing["db"], 50)
+		self.assertGreaterEqual(timing["total"], timing["render"])
+
+	@override_settings(QUERY_BUDGETS={"hero": 0})
+	def test_registry_accumulates_requests(self):
+		counts = []
+		for _ in range(2):
+			with CaptureQueriesContext(connection) as ctx:
+				self.client.get(reverse("hero"))
+			counts.append(len(ctx.captured_queries))
+		self.client.post(reverse("hero-allocate"), {"strength": 100}, format="json")
+
+		data = metrics.snapshot()
+		hero = data[("hero", "GET")]
+		self.assertEqual((hero.requests, hero.queries, hero.queries_max), (2, sum(counts), max(counts)))
+		# Бюджет 0: каждый GET (хотя бы чтение статов) его превышает.
+		self.assertEqual(hero.budget_exceeded, 2)
+		self.assertEqual(hero.statuses, {"200": 2})
+		self.assertGreater(hero.render_seconds, 0)
+		self.assertLessEqual(hero.db_seconds + hero.render_seconds, hero.seconds)
+		self.assertEqual(data[("hero-allocate", "POST")].statuses, {"400": 1})
+
+		text = metrics.render_prometheus()
+		self.assertIn('solo_http_requests_total{endpoint="hero",method="GET",status="200"} 2', text)
+		self.assertIn(f'solo_db_queries_total{{endpoint="hero",method="GET"}} {sum(counts)}', text)
+
+
+@unittest.skipUnless(connections["default"].vendor == "sqlite", "PRAGMA — только SQLite")
+class SQLitePragmaTests(SimpleTestCase):
+	# Тестовая БД в памяти не умеет WAL: открываем отдельное соединение к файлу.
+	def _pragmas(self, *names: str) -> dict:
+		with tempfile.TemporaryDirectory() as tmp:
+			default = connections["default"]
+			wrapper = type(default)({**default.settings_dict, "NAME": os.path.join(tmp, "pragma.sqlite3")}, alias="pragma_test")
+			try:
+				with wrapper.cursor() as cursor:
+					values = {}
+					for name in names:
+						cursor.execute(f"PRAGMA {name}")
+						values[name] = cursor.fetchone()[0]
+					return values
+			finally:
+				wrapper.close()
+
+	def test_settings_pragmas_are_applied_on_connect(self):
+		self.assertEqual(
+			self._pragmas("journal_mode", "busy_timeout", "synchronous", "cache_size"),
+			{"journal_mode": "wal", "busy_timeout": 5000, "synchronous": 1, "cache_size": -20000},
+		)
+		with override_settings(SQLITE_PRAGMAS={"journal_mode": "wal", "busy_timeout": 1234}):
+			self.assertEqual(self._pragmas("journal_mode", "busy_timeout"), {"journal_mode": "wal", "busy_timeout": 1234})
+
+	@override_settings(SQLITE_PRAGMAS={})
+	def test_empty_setting_keeps_sqlite_defaults(self):
+		self.assertEqual(
+			self._pragmas("journal_mode", "synchronous", "cache_size"),
+			{"journal_mode": "delete", "synchronous": 2, "cache_size": -2000},
+		)
+
+	def test_invalid_pragma_is_rejected(self):
+		for pragmas in ({"journal_mode; DROP TABLE x": "wal"}, {"journal_mode": "wal; DROP TABLE x"}, {"Cache_Size": 1}):
+			with self.subTest(pragmas=pragmas), override_settings(SQLITE_PRAGMAS=pragmas):
+				with self.assertRaisesMessage(ValueError, "Некорректная SQLite PRAGMA"):
+					self._pragmas("journal_mode")
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from functools import wraps
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.transaction import TransactionManagementError
+
+
+def in_transaction(using: str = DEFAULT_DB_ALIAS) -> bool:
+    return transaction.get_connection(using).in_atomic_block
+
+
+def use_case(func):
+    """Граница транзакции сценария (создать тренировку, закрыть задачу, атаковать босса).
+
+    Вне транзакции открывает одну durable-транзакцию. Если транзакция уже открыта
+    (сценарий вызван из другого сценария, команды или теста) — присоединяется к ней
+    без savepoint: откат по исключению делает тот, кто её открыл.
+    """
+
+    @wraps(func)
+    def inner(*args, **kwargs):
+        if in_transaction():
+            return func(*args, **kwargs)
+        with transaction.atomic(durable=True):
+            return func(*args, **kwargs)
+
+    return inner
+
+
+def requires_transaction(func):
+    """Внутренний шаг сценария: работает в транзакции вызывающего и ничего не открывает сам."""
+
+    @wraps(func)
+    def inner(*args, **kwargs):
+        if not in_transaction():
+            raise TransactionManagementError(f"{func.__qualname__} вызывается только внутри транзакции (@use_case)")
+        return func(*args, **kwargs)
+
+    return inner
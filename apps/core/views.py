@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+from django.http import HttpResponse
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.stats.levels import get_level_curve
+
+from .metrics import render_prometheus
 from .serializers import SystemSerializer
 
 
@@ -14,6 +19,7 @@ class SystemAPIView(APIView):
 	serializer_class = SystemSerializer
 
 	def get(self, request):
+		curve = get_level_curve()
 		return Response(
 			{
 				"ranks": [
@@ -25,11 +31,25 @@ class SystemAPIView(APIView):
 					{"code": "S", "title": "Senior", "min_dev_score": 10000},
 				],
 				"xp_rules": {
-					"level_formula": "xp_to_next_level = level * 100",
+					"level_curve": curve.code,
+					"level_formula": curve.formula,
 					"task": {"formula": "difficulty * 50"},
 					"workout": {"formula": "duration * intensity"},
 					"learning_log": {"fixed": 25},
 					"skill": {"per_level": 2, "mastered_bonus": 100},
 				},
+				# level_thresholds[i] — сколько всего XP нужно для уровня i + 1.
+				"level_thresholds": list(curve.thresholds),
 			}
 		)
+
+
+class SystemMetricsAPIView(APIView):
+	"""Метрики эндпоинтов этого процесса в текстовом формате Prometheus (только staff)."""
+
+	permission_classes = [IsAdminUser]
+	serializer_class = None
+
+	def get(self, request):
+		# Мимо ApiRenderer: Prometheus ждёт text/plain, а не JSON-конверт.
+		return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
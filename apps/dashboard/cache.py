@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+# Версионированный кеш дашборда: сервисы записи не удаляют payload, а поднимают
+# версию пользователя — старые ключи просто перестают читаться и истекают по TTL.
+
+
+def _version_key(user_id: int) -> str:
+    return f"dashboard:version:{user_id}"
+
+
+def cache_timeout() -> int:
+    return int(getattr(settings, "DASHBOARD_CACHE_TIMEOUT", 300))
+
+
+def cache_enabled() -> bool:
+    """LocMemCache живёт в памяти процесса: сброс версии из другого процесса (gunicorn-воркер,
+    run_outbox_worker, rebuild_stats) в нём не виден. Поэтому вне DEBUG дашборд кешируется
+    только в общем кеше (CACHE_URL); DASHBOARD_CACHE_ALLOW_LOCAL=True — явное исключение
+    для одного процесса.
+    """
+    if settings.DEBUG or getattr(settings, "DASHBOARD_CACHE_ALLOW_LOCAL", False):
+        return True
+    return not isinstance(caches["default"], LocMemCache)
+
+
+def dashboard_version(user_id: int) -> int:
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Версия «с нуля» должна быть уникальной, иначе после вытеснения ключа из
+        # кеша можно прочитать чужой устаревший payload со старым номером.
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return int(version)
+
+
+def payload_key(user_id: int, version: int, day) -> str:
+    # День в ключе: workouts_this_week зависит от даты, а не только от записей.
+    return f"dashboard:{user_id}:v{version}:{day}"
+
+
+def invalidate_dashboard(user_id: int) -> None:
+    """Поднимает версию кеша дашборда после коммита текущей транзакции."""
+
+    def bump() -> None:
+        key = _version_key(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+    transaction.on_commit(bump)
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.dashboard.services import compute_dashboard, get_dashboard
+from apps.finance.models import FinanceRecord
+from apps.finance.services import rebuild_balance_snapshots
+from apps.projects.models import Project, Task
+from apps.skills.models import Skill
+from apps.stats.models import UserStats
+from apps.stats.services import reconcile_dev_counters
+from apps.workouts.models import Workout
+
+
+def _legacy_dashboard(user) -> dict:
+    # Прежняя реализация DashboardAPIView.get: шесть отдельных запросов.
+    stats = UserStats.objects.get(user=user)
+    today = timezone.localdate()
+    week_start = today - timedelta(days=today.weekday())
+    workouts_this_week = user.workouts.filter(date__gte=week_start, date__lte=today).count()
+    tasks_done = Task.objects.filter(project__user=user, status=Task.Status.DONE).count()
+    skills_in_progress = Skill.objects.filter(
+        user=user, status__in=[Skill.Status.LEARNING, Skill.Status.PRACTICING]
+    ).count()
+    income = FinanceRecord.objects.filter(user=user, type=FinanceRecord.Type.INCOME).aggregate(v=Sum("amount"))["v"]
+    expense = FinanceRecord.objects.filter(user=user, type=FinanceRecord.Type.EXPENSE).aggregate(v=Sum("amount"))["v"]
+    balance = (income or Decimal("0")) - (expense or Decimal("0"))
+    return {
+        "level": stats.level,
+        "xp": stats.xp,
+        "rank": stats.rank,
+        "dev_score": stats.dev_score,
+        "balance": float(balance),
+        "workouts_this_week": workouts_this_week,
+        "tasks_done": tasks_done,
+        "skills_in_progress": skills_in_progress,
+    }
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Бенчмарк дашборда: прежние 6 запросов vs один запрос vs кеш (данные откатываются)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000, help="Записей на таблицу")
+        parser.add_argument("--iterations", type=int, default=200)
+
+    def _seed(self, rows: int):
+        user = get_user_model().objects.create(username="bench_dashboard", email="bench_dashboard@example.com")
+        today = timezone.localdate()
+
+        Workout.objects.bulk_create(
+            [
+                Workout(user=user, type="run", duration=30, intensity=5, date=today - timedelta(days=i % 365))
+                for i in range(rows)
+            ],
+            batch_size=1000,
+        )
+        project = Project.objects.create(user=user, name="bench")
+        Task.objects.bulk_create(
+            [
+                Task(project=project, title=f"t{i}", difficulty=1 + i % 5, status=Task.Status.DONE if i % 2 else Task.Status.TODO)
+                for i in range(rows)
+            ],
+            batch_size=1000,
+        )
+        Skill.objects.bulk_create(
+            [
+                Skill(user=user, name=f"s{i}", level=i % 101, status=Skill.status_for_level(i % 101))
+                for i in range(rows)
+            ],
+            batch_size=1000,
+        )
+        FinanceRecord.objects.bulk_create(
+            [
+                FinanceRecord(
+                    user=user,
+                    type=FinanceRecord.Type.INCOME if i % 3 else FinanceRecord.Type.EXPENSE,
+                    amount=Decimal("10.50"),
+                    category=f"c{i % 12}",
+                    date=today - timedelta(days=i % 730),
+                )
+                for i in range(rows)
+            ],
+            batch_size=1000,
+        )
+        reconcile_dev_counters(user=user)
+        rebuild_balance_snapshots(user_ids=[user.pk])
+        return user
+
+    def _measure(self, label: str, fn, iterations: int) -> None:
+        samples = []
+        fn()  # прогрев: для кеша считаем запросы уже на попадании
+        with CaptureQueriesContext(connection) as ctx:
+            fn()
+        for _ in range(iterations):
+            started = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f"{label:<12} queries={len(ctx.captured_queries):<3} "
+            f"p50={_percentile(samples, 0.5):8.3f}ms p95={_percentile(samples, 0.95):8.3f}ms"
+        )
+
+    def handle(self, *args, **options):
+        rows = int(options["rows"])
+        iterations = int(options["iterations"])
+        try:
+            with transaction.atomic():
+                user = self._seed(rows)
+                if _legacy_dashboard(user) != compute_dashboard(user=user):
+                    raise AssertionError("Новый payload не совпадает с прежним")
+
+                self.stdout.write(f"rows per table={rows}, iterations={iterations}")
+                self._measure("legacy", lambda: _legacy_dashboard(user), iterations)
+                self._measure("one-query", lambda: compute_dashboard(user=user), iterations)
+                self._measure("cached", lambda: get_dashboard(user=user), iterations)
+                raise _Rollback
+        except _Rollback:
+            pass
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import F, Func, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.finance.services import balance_expression
+from apps.skills.models import Skill
+from apps.stats.models import UserStats
+from apps.stats.services import get_user_stats_readonly
+from apps.workouts.models import Workout
+
+from .cache import cache_enabled, cache_timeout, dashboard_version, payload_key
+
+
+def _scalar_subquery(qs, expression, output_field) -> Subquery:
+    # Агрегат как обычная функция: скалярный подзапрос без GROUP BY по OuterRef.
+    return Subquery(qs.order_by().annotate(v=expression).values("v")[:1], output_field=output_field)
+
+
+def _count_subquery(qs) -> Subquery:
+    return _scalar_subquery(qs, Func(F("id"), function="COUNT", output_field=IntegerField()), IntegerField())
+
+
+def compute_dashboard(*, user) -> dict:
+    """Весь payload дашборда одним запросом: UserStats + скалярные подзапросы.
+
+    tasks_done берётся из счётчика на UserStats (см. `bump_dev_counters`),
+    баланс — `balance_expression` (снапшоты закрытых месяцев + текущий месяц).
+    """
+    today = timezone.localdate()
+    week_start = today - timedelta(days=today.weekday())
+
+    workouts = Workout.objects.filter(user=OuterRef("user"), date__gte=week_start, date__lte=today)
+    skills = Skill.objects.filter(user=OuterRef("user"), status__in=[Skill.Status.LEARNING, Skill.Status.PRACTICING])
+
+    row = (
+        UserStats.objects.filter(user=user)
+        .annotate(
+            workouts_this_week=Coalesce(_count_subquery(workouts), 0),
+            skills_in_progress=Coalesce(_count_subquery(skills), 0),
+            balance=balance_expression(user_ref=OuterRef("user")),
+        )
+        .values("level", "xp", "rank", "dev_score", "tasks_done_count", "workouts_this_week", "skills_in_progress", "balance")
+        .first()
+    )
+    if row is None:
+        get_user_stats_readonly(user)
+        return compute_dashboard(user=user)
+
+    return {
+        "level": row["level"],
+        "xp": row["xp"],
+        "rank": row["rank"],
+        "dev_score": row["dev_score"],
+        "balance": float(row["balance"] or 0),
+        "workouts_this_week": int(row["workouts_this_week"]),
+        "tasks_done": int(row["tasks_done_count"]),
+        "skills_in_progress": int(row["skills_in_progress"]),
+    }
+
+
+def get_dashboard(*, user) -> dict:
+    """Payload дашборда из кеша; при промахе — `compute_dashboard` и запись в кеш."""
+    if not cache_enabled():
+        return compute_dashboard(user=user)
+    key = payload_key(user.pk, dashboard_version(user.pk), timezone.localdate())
+    data = cache.get(key)
+    if data is None:
+        data = compute_dashboard(user=user)
+        cache.set(key, data, cache_timeout())
+    return data
@@ -1,3 +1,160 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.testing import QueryBudgetTestCase
+from apps.finance.services import create_finance_record, delete_finance_record, get_balance, update_finance_record
+from apps.projects.models import Project, Task
+from apps.projects.services import complete_task
+from apps.skills.models import Skill
+from apps.skills.services import create_skill, update_skill
+from apps.stats.models import UserStats
+from apps.workouts.services import create_workout
+
+from .cache import dashboard_version, invalidate_dashboard
+from .services import compute_dashboard
+
+def legacy_dashboard(user) -> dict:
+	# Прежний DashboardAPIView: отдельный запрос на каждое поле.
+	stats = UserStats.objects.get(user=user)
+	today = timezone.localdate()
+	week_start = today - timedelta(days=today.weekday())
+	return {
+		"level": stats.level,
+		"xp": stats.xp,
+		"rank": stats.rank,
+		"dev_score": stats.dev_score,
+		"balance": float(get_balance(user=user)),
+		"workouts_this_week": user.workouts.filter(date__gte=week_start, date__lte=today).count(),
+		"tasks_done": Task.objects.filter(project__user=user, status=Task.Status.DONE).count(),
+		"skills_in_progress": Skill.objects.filter(
+			user=user, status__in=[Skill.Status.LEARNING, Skill.Status.PRACTICING]
+		).count(),
+	}
+
+
+SHARED_CACHE = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "test_dashboard_cache"}}
+
+
+class DashboardQueryBudgetTests(QueryBudgetTestCase):
+	def test_dashboard_cold(self):
+		self.assertMaxQueries(2, "get", reverse("dashboard"))
+
+	@override_settings(DASHBOARD_CACHE_ALLOW_LOCAL=True)
+	def test_dashboard_cached(self):
+		self.client.get(reverse("dashboard"))
+		# Остаётся только проверка токена.
+		self.assertMaxQueries(1, "get", reverse("dashboard"))
+
+	def test_payload_matches_per_field_computation(self):
+		self.assertEqual(compute_dashboard(user=self.user), legacy_dashboard(self.user))
+		self.assertEqual(self.client.get(reverse("dashboard")).json()["data"], legacy_dashboard(self.user))
+
+	def test_local_memory_cache_is_skipped_without_debug(self):
+		# LocMemCache + DEBUG=False: сброс версии из другого процесса не был бы виден — не кешируем.
+		self.client.get(reverse("dashboard"))
+		self.assertMaxQueries(2, "get", reverse("dashboard"))
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class DashboardSharedCacheTests(QueryBudgetTestCase):
+	def setUp(self):
+		call_command("createcachetable", verbosity=0)
+		super().setUp()
+
+	def test_version_bump_from_another_cache_handle_is_seen(self):
+		self.client.get(reverse("dashboard"))
+		before = dashboard_version(self.user.pk)
+
+		# Отдельный экземпляр бэкенда — как кеш другого процесса (воркер outbox, rebuild_stats).
+		other = caches.create_connection("default")
+		with mock.patch("apps.dashboard.cache.cache", other), self.captureOnCommitCallbacks(execute=True):
+			invalidate_dashboard(self.user.pk)
+
+		self.assertNotEqual(dashboard_version(self.user.pk), before)
+		response = self.client.get(reverse("dashboard"))
+		self.assertEqual(response.status_code, 200)
+
+
+@override_settings(DASHBOARD_CACHE_ALLOW_LOCAL=True)
+class DashboardInvalidationTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.user = get_user_model().objects.create_user(username="dash", email="dash@example.com", password="x")
+		self.client = APIClient()
+		self.client.force_authenticate(self.user)
+		today = timezone.localdate()
+		self.project = Project.objects.create(user=self.user, name="Pet")
+		self.task = Task.objects.create(project=self.project, title="Ship", difficulty=2)
+		self.skill = create_skill(user=self.user, validated_data={"category": "Backend", "name": "Django", "level": 30})
+		self.record = create_finance_record(
+			user=self.user, validated_data={"type": "income", "amount": Decimal("1000.00"), "category": "salary", "date": today}
+		)
+		# Прошлый месяц: баланс складывается из снапшота и текущего месяца.
+		last_month = today.replace(day=1) - timedelta(days=1)
+		create_finance_record(
+			user=self.user,
+			validated_data={"type": "expense", "amount": Decimal("250.50"), "category": "rent", "date": last_month},
+		)
+		create_workout(user=self.user, validated_data={"type": "run", "duration": 30, "intensity": 3, "date": today - timedelta(days=14)})
+
+	def _dashboard(self) -> dict:
+		response = self.client.get(reverse("dashboard"))
+		self.assertEqual(response.status_code, 200)
+		return response.json()["data"]
+
+	def assertWriteInvalidates(self, write, **expected):
+		before = self._dashboard()
+		version = dashboard_version(self.user.pk)
+		with self.captureOnCommitCallbacks(execute=True):
+			write()
+		self.assertNotEqual(dashboard_version(self.user.pk), version)
+		after = self._dashboard()
+		self.assertEqual(after, legacy_dashboard(self.user))
+		self.assertEqual({field: after[field] for field in expected}, expected)
+		self.assertNotEqual(after, before)
+
+	def test_initial_payload(self):
+		self.assertEqual(self._dashboard(), legacy_dashboard(self.user))
+		self.assertEqual(
+			{k: v for k, v in self._dashboard().items() if k in ("balance", "workouts_this_week", "tasks_done", "skills_in_progress")},
+			{"balance": 749.5, "workouts_this_week": 0, "tasks_done": 0, "skills_in_progress": 1},
+		)
+
+	def test_create_workout(self):
+		self.assertWriteInvalidates(
+			lambda: create_workout(user=self.user, validated_data={"type": "run", "duration": 0, "intensity": 1}),
+			workouts_this_week=1,
+		)
+
+	def test_complete_task(self):
+		self.assertWriteInvalidates(lambda: complete_task(task=self.task), tasks_done=1)
+
+	def test_update_skill(self):
+		self.assertWriteInvalidates(
+			lambda: update_skill(skill=self.skill, validated_data={"level": 90}), skills_in_progress=0
+		)
+
+	def test_create_finance_record(self):
+		self.assertWriteInvalidates(
+			lambda: create_finance_record(
+				user=self.user, validated_data={"type": "expense", "amount": Decimal("49.50"), "category": "food"}
+			),
+			balance=700.0,
+		)
+
+	def test_update_finance_record(self):
+		self.assertWriteInvalidates(
+			lambda: update_finance_record(record=self.record, validated_data={"amount": Decimal("1500.00")}), balance=1249.5
+		)
+
+	def test_delete_finance_record(self):
+		self.assertWriteInvalidates(lambda: delete_finance_record(record=self.record), balance=-250.5)
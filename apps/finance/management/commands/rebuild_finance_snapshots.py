@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from apps.finance.services import rebuild_balance_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобирает помесячные снапшоты баланса (FinanceBalanceSnapshot) из FinanceRecord: "
+        "по транзакции на пользователя, под его блокировкой, со сбросом кеша дашборда."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", nargs="+", type=int, help="ID пользователей (по умолчанию все)")
+
+    def handle(self, *args, **options):
+        months = rebuild_balance_snapshots(user_ids=options["users"])
+        self.stdout.write(self.style.SUCCESS(f"Записано месяцев: {months}"))
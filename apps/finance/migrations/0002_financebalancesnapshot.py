@@ -0,0 +1,65 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:00
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+def fill_balance_snapshots(apps, schema_editor):
+    FinanceRecord = apps.get_model("finance", "FinanceRecord")
+    FinanceBalanceSnapshot = apps.get_model("finance", "FinanceBalanceSnapshot")
+
+    rows = (
+        FinanceRecord.objects.annotate(month=TruncMonth("date"))
+        .values("user_id", "month")
+        .annotate(
+            income=Sum("amount", filter=Q(type="income")),
+            expense=Sum("amount", filter=Q(type="expense")),
+        )
+        .order_by("user_id", "month")
+    )
+    snapshots = []
+    user_id, running = None, Decimal("0")
+    for r in rows.iterator():
+        if r["user_id"] != user_id:
+            user_id, running = r["user_id"], Decimal("0")
+        income, expense = r["income"] or Decimal("0"), r["expense"] or Decimal("0")
+        running += income - expense
+        snapshots.append(
+            FinanceBalanceSnapshot(
+                user_id=user_id, month=r["month"], income=income, expense=expense, closing_balance=running
+            )
+        )
+    FinanceBalanceSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinanceBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='Первое число месяца')),
+                ('income', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expense', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('closing_balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Баланс за месяц',
+                'verbose_name_plural': 'Балансы по месяцам',
+                'constraints': [models.UniqueConstraint(fields=('user', 'month'), name='uniq_finance_snapshot_user_month')],
+            },
+        ),
+        migrations.RunPython(fill_balance_snapshots, migrations.RunPython.noop),
+    ]
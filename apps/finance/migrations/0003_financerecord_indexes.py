@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_financebalancesnapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='financerecord',
+            index=models.Index(fields=['user', 'date'], name='finance_fin_user_id_9284ad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='financerecord',
+            index=models.Index(fields=['user', 'type', 'date'], name='finance_fin_user_id_7bab4f_idx'),
+        ),
+    ]
@@ -22,6 +22,34 @@ class FinanceRecord(models.Model):
 
 	class Meta:
 		ordering = ["-date", "-id"]
+		indexes = [
+			models.Index(fields=["user", "date"]),
+			models.Index(fields=["user", "type", "date"]),
+		]
 
 	def __str__(self) -> str:  # pragma: no cover
 		return f"{self.user_id} {self.type} {self.amount}"
+
+
+class FinanceBalanceSnapshot(models.Model):
+	"""Итоги месяца и баланс на его конец (нарастающим итогом).
+
+	Поддерживается сервисами записей: правка прошлого месяца сдвигает
+	closing_balance всех последующих. Пересборка: `manage.py rebuild_finance_snapshots`.
+	"""
+
+	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="balance_snapshots")
+	month = models.DateField(help_text="Первое число месяца")
+	income = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+	expense = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+	closing_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+	class Meta:
+		verbose_name = "Баланс за месяц"
+		verbose_name_plural = "Балансы по месяцам"
+		constraints = [
+			models.UniqueConstraint(fields=["user", "month"], name="uniq_finance_snapshot_user_month"),
+		]
+
+	def __str__(self) -> str:  # pragma: no cover
+		return f"{self.user_id} {self.month:%Y-%m} {self.closing_balance}"
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
 
 from .models import FinanceRecord
+from .services import create_finance_record, update_finance_record
 
 
 class FinanceRecordSerializer(serializers.ModelSerializer):
@@ -21,4 +25,80 @@ class FinanceRecordSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "created_at", "updated_at")
 
     def create(self, validated_data):
-        return FinanceRecord.objects.create(user=self.context["request"].user, **validated_data)
+        return create_finance_record(user=self.context["request"].user, validated_data=validated_data)
+
+    def update(self, instance, validated_data):
+        return update_finance_record(record=instance, validated_data=validated_data)
+
+
+class FinanceSummaryQuerySerializer(serializers.Serializer):
+    """?from=YYYY-MM-DD&to=YYYY-MM-DD&group=category|month (по умолчанию последние 12 месяцев)."""
+
+    MAX_DAYS = 3660
+
+    group = serializers.ChoiceField(choices=["category", "month"], required=False, default="category")
+
+    def get_fields(self):
+        # `from` — ключевое слово Python, поэтому поля объявляем здесь.
+        fields = super().get_fields()
+        fields["from"] = serializers.DateField(required=False)
+        fields["to"] = serializers.DateField(required=False)
+        return fields
+
+    def validate(self, attrs):
+        date_to = attrs.get("to") or timezone.localdate()
+        date_from = attrs.get("from")
+        if date_from is None:
+            # Текущий месяц + 11 предыдущих целиком.
+            date_from = date_to.replace(day=1)
+            for _ in range(11):
+                date_from = (date_from - timedelta(days=1)).replace(day=1)
+        if date_from > date_to:
+            raise serializers.ValidationError({"from": ["Дата начала позже даты конца"]})
+        if (date_to - date_from).days + 1 > self.MAX_DAYS:
+            raise serializers.ValidationError({"from": [f"Окно не больше {self.MAX_DAYS} дней"]})
+        attrs["from"] = date_from
+        attrs["to"] = date_to
+        return attrs
+
+
+def _money(**kwargs):
+    return serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True, **kwargs)
+
+
+class FinanceTotalsSerializer(serializers.Serializer):
+    income = _money()
+    expense = _money()
+    net = _money()
+    count = serializers.IntegerField(read_only=True)
+
+
+class FinanceCategorySplitSerializer(serializers.Serializer):
+    category = serializers.CharField(read_only=True)
+    income = _money()
+    expense = _money()
+    net = _money()
+
+
+class FinanceCategorySummarySerializer(FinanceTotalsSerializer):
+    category = serializers.CharField(read_only=True)
+    # Доля категории в расходах окна, %
+    expense_share = _money()
+
+
+class FinanceMonthSummarySerializer(FinanceTotalsSerializer):
+    month = serializers.DateField(read_only=True)
+    income_delta = _money(allow_null=True)
+    expense_delta = _money(allow_null=True)
+    net_delta = _money(allow_null=True)
+    categories = FinanceCategorySplitSerializer(many=True, read_only=True)
+
+
+class FinanceSummarySerializer(serializers.Serializer):
+    date_from = serializers.DateField(read_only=True)
+    date_to = serializers.DateField(read_only=True)
+    group = serializers.CharField(read_only=True)
+    totals = FinanceTotalsSerializer(read_only=True)
+    # Присутствует только разбивка, запрошенная в `group`.
+    categories = FinanceCategorySummarySerializer(many=True, read_only=True)
+    months = FinanceMonthSummarySerializer(many=True, read_only=True)
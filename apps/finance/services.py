@@ -1,19 +1,317 @@
 from __future__ import annotations
 
+from datetime import date, timedelta
 from decimal import Decimal
 
-from django.db.models import Sum
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DecimalField, F, Func, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
 
-from .models import FinanceRecord
+from apps.core.transactions import requires_transaction, use_case
+from apps.dashboard.cache import invalidate_dashboard
+
+from .models import FinanceBalanceSnapshot, FinanceRecord
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def signed_amount():
+    # income — плюс, expense — минус: баланс считается одним проходом.
+    return Case(
+        When(type=FinanceRecord.Type.INCOME, then=F("amount")),
+        When(type=FinanceRecord.Type.EXPENSE, then=-F("amount")),
+        default=Value(0),
+        output_field=MONEY,
+    )
+
+
+def snapshots_enabled() -> bool:
+    return bool(getattr(settings, "FINANCE_BALANCE_SNAPSHOTS", True))
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
 
 
 def get_balance(*, user) -> Decimal:
-    income = (
-        FinanceRecord.objects.filter(user=user, type=FinanceRecord.Type.INCOME).aggregate(v=Sum("amount")).get("v")
-        or Decimal("0")
+    """Текущий баланс пользователя.
+
+    Со снапшотами: closing_balance последнего закрытого месяца + записи с начала
+    текущего месяца (включая датированные будущим). Без них — один Sum(Case) по всем записям.
+    """
+    records = FinanceRecord.objects.filter(user=user)
+    closed = Decimal("0")
+    if snapshots_enabled():
+        current = month_start(timezone.localdate())
+        closed = (
+            FinanceBalanceSnapshot.objects.filter(user=user, month__lt=current)
+            .order_by("-month")
+            .values_list("closing_balance", flat=True)
+            .first()
+        ) or Decimal("0")
+        records = records.filter(date__gte=current)
+    balance = closed + (records.aggregate(v=Sum(signed_amount())).get("v") or Decimal("0"))
+    return balance.quantize(Decimal("0.01"))
+
+
+def balance_expression(*, user_ref):
+    """То же, что `get_balance`, но выражением — для аннотаций (`user_ref` — OuterRef на пользователя)."""
+    records = FinanceRecord.objects.filter(user=user_ref)
+    closed = Value(Decimal("0"), output_field=MONEY)
+    if snapshots_enabled():
+        current = month_start(timezone.localdate())
+        closed = Coalesce(
+            Subquery(
+                FinanceBalanceSnapshot.objects.filter(user=user_ref, month__lt=current)
+                .order_by("-month")
+                .values("closing_balance")[:1],
+                output_field=MONEY,
+            ),
+            Decimal("0"),
+            output_field=MONEY,
+        )
+        records = records.filter(date__gte=current)
+    # SUM как обычная функция: скалярный подзапрос без GROUP BY.
+    recent = Subquery(
+        records.order_by().annotate(v=Func(signed_amount(), function="SUM", output_field=MONEY)).values("v")[:1],
+        output_field=MONEY,
+    )
+    return closed + Coalesce(recent, Decimal("0"), output_field=MONEY)
+
+
+def finance_summary(*, user, date_from: date, date_to: date, group: str = "category") -> dict:
+    """Итоги за [date_from, date_to] + разбивка `group`.
+
+    group=category — категории с долей в расходах; group=month — все месяцы окна
+    с дельтами к предыдущему и разбивкой по категориям.
+
+    Один GROUP BY (месяц, категория) по индексу (user, date); всё остальное —
+    свёртка этих строк в Python.
+    """
+    zero = Decimal("0")
+    rows = (
+        FinanceRecord.objects.filter(user=user, date__gte=date_from, date__lte=date_to)
+        .annotate(month=TruncMonth("date"))
+        .values("month", "category")
+        .annotate(
+            income=Sum("amount", filter=Q(type=FinanceRecord.Type.INCOME)),
+            expense=Sum("amount", filter=Q(type=FinanceRecord.Type.EXPENSE)),
+            count=Count("id"),
+        )
+        .order_by("month", "category")
+    )
+
+    def bucket() -> dict:
+        return {"income": zero, "expense": zero, "count": 0}
+
+    def add(target: dict, income: Decimal, expense: Decimal, count: int) -> None:
+        target["income"] += income
+        target["expense"] += expense
+        target["count"] += count
+
+    totals = bucket()
+    by_category: dict[str, dict] = {}
+    by_month: dict[date, dict] = {}
+    for r in rows:
+        income, expense, count = r["income"] or zero, r["expense"] or zero, int(r["count"])
+        add(totals, income, expense, count)
+        add(by_category.setdefault(r["category"], bucket()), income, expense, count)
+        month = by_month.setdefault(r["month"], {**bucket(), "categories": []})
+        add(month, income, expense, count)
+        month["categories"].append({"category": r["category"], "income": income, "expense": expense, "net": income - expense})
+
+    totals["net"] = totals["income"] - totals["expense"]
+
+    if group == "category":
+        return {"totals": totals, "categories": _category_groups(by_category, totals)}
+    return {"totals": totals, "months": _month_groups(by_month, date_from, date_to)}
+
+
+def _category_groups(by_category: dict, totals: dict) -> list[dict]:
+    zero = Decimal("0")
+    categories = []
+    for category, b in by_category.items():
+        spent = totals["expense"]
+        categories.append(
+            {
+                "category": category,
+                **b,
+                "net": b["income"] - b["expense"],
+                # Доля в расходах окна, %.
+                "expense_share": (b["expense"] * 100 / spent).quantize(Decimal("0.01")) if spent else zero,
+            }
+        )
+    categories.sort(key=lambda c: (-c["expense"], -c["income"], c["category"]))
+    return categories
+
+
+def _month_groups(by_month: dict, date_from: date, date_to: date) -> list[dict]:
+    months = []
+    previous = None
+    # Пустые месяцы окна — нулевые, чтобы дельты были именно месяц к месяцу.
+    month = month_start(date_from)
+    while month <= date_to:
+        b = by_month.get(month) or {"income": Decimal("0"), "expense": Decimal("0"), "count": 0, "categories": []}
+        net = b["income"] - b["expense"]
+        months.append(
+            {
+                "month": month,
+                **b,
+                "net": net,
+                # Дельта к предыдущему месяцу окна; для первого месяца — null.
+                "income_delta": b["income"] - previous["income"] if previous else None,
+                "expense_delta": b["expense"] - previous["expense"] if previous else None,
+                "net_delta": net - previous["net"] if previous else None,
+            }
+        )
+        previous = months[-1]
+        month = (month + timedelta(days=32)).replace(day=1)
+    return months
+
+
+def shift_balance_snapshots(*, user_id: int, day: date, income: Decimal, expense: Decimal) -> None:
+    """Применяет дельту записи к снапшоту её месяца и сдвигает все последующие."""
+    income, expense = Decimal(income), Decimal(expense)
+    if not income and not expense:
+        return
+    month = month_start(day)
+    net = income - expense
+    snapshot = FinanceBalanceSnapshot.objects.filter(user_id=user_id, month=month)
+    delta = {
+        "income": F("income") + income,
+        "expense": F("expense") + expense,
+        "closing_balance": F("closing_balance") + net,
+    }
+
+    if not snapshot.update(**delta):
+        opening = (
+            FinanceBalanceSnapshot.objects.filter(user_id=user_id, month__lt=month)
+            .order_by("-month")
+            .values_list("closing_balance", flat=True)
+            .first()
+        ) or Decimal("0")
+        try:
+            with transaction.atomic():
+                FinanceBalanceSnapshot.objects.create(
+                    user_id=user_id,
+                    month=month,
+                    income=income,
+                    expense=expense,
+                    closing_balance=opening + net,
+                )
+        except IntegrityError:
+            # Месяц создан параллельной записью — применяем дельту к нему.
+            snapshot.update(**delta)
+
+    if net:
+        FinanceBalanceSnapshot.objects.filter(user_id=user_id, month__gt=month).update(
+            closing_balance=F("closing_balance") + net
+        )
+
+
+def _apply_record(record: FinanceRecord, sign: int) -> None:
+    amount = Decimal(record.amount) * sign
+    is_income = record.type == FinanceRecord.Type.INCOME
+    shift_balance_snapshots(
+        user_id=record.user_id,
+        day=record.date,
+        income=amount if is_income else Decimal("0"),
+        expense=Decimal("0") if is_income else amount,
+    )
+
+
+@requires_transaction
+def lock_finance_user(user_id: int) -> None:
+    """Сериализует изменения финансов пользователя (записи и пересборку снапшотов).
+
+    FOR NO KEY UPDATE на строке пользователя: не мешает вставкам, которые ссылаются
+    на пользователя (FOR KEY SHARE), но две финансовые транзакции идут по очереди.
+    """
+    list(get_user_model().objects.select_for_update(no_key=True).filter(pk=user_id).values_list("pk", flat=True))
+
+
+def _lock_record(record: FinanceRecord) -> FinanceRecord:
+    # Запись и её пользователь одним запросом, в том же порядке блокировок, что и lock_finance_user.
+    return (
+        FinanceRecord.objects.select_for_update(no_key=True, of=("self", "user"))
+        .select_related("user")
+        .get(pk=record.pk)
     )
-    expense = (
-        FinanceRecord.objects.filter(user=user, type=FinanceRecord.Type.EXPENSE).aggregate(v=Sum("amount")).get("v")
-        or Decimal("0")
+
+
+@use_case
+def rebuild_user_balance_snapshots(*, user_id: int) -> int:
+    """Пересобирает снапшоты одного пользователя в одной транзакции. Возвращает число месяцев.
+
+    Читатели до коммита видят старые снапшоты, а не пустоту; конкурентная запись
+    ждёт блокировку и применяет свою дельту уже к пересобранным строкам.
+    """
+    lock_finance_user(user_id)
+    FinanceBalanceSnapshot.objects.filter(user_id=user_id).delete()
+    rows = (
+        FinanceRecord.objects.filter(user_id=user_id)
+        .annotate(month=TruncMonth("date"))
+        .values("month")
+        .annotate(
+            income=Sum("amount", filter=Q(type=FinanceRecord.Type.INCOME)),
+            expense=Sum("amount", filter=Q(type=FinanceRecord.Type.EXPENSE)),
+        )
+        .order_by("month")
     )
-    return income - expense
+
+    def build():
+        running = Decimal("0")
+        for r in rows.iterator():
+            income, expense = r["income"] or Decimal("0"), r["expense"] or Decimal("0")
+            running += income - expense
+            yield FinanceBalanceSnapshot(
+                user_id=user_id, month=r["month"], income=income, expense=expense, closing_balance=running
+            )
+
+    created = len(FinanceBalanceSnapshot.objects.bulk_create(build(), batch_size=1000))
+    invalidate_dashboard(user_id)
+    return created
+
+
+def rebuild_balance_snapshots(*, user_ids: list[int] | None = None) -> int:
+    """Пересобирает FinanceBalanceSnapshot из FinanceRecord — по транзакции на пользователя."""
+    if user_ids is None:
+        user_ids = sorted(
+            set(FinanceRecord.objects.values_list("user_id", flat=True).distinct())
+            | set(FinanceBalanceSnapshot.objects.values_list("user_id", flat=True).distinct())
+        )
+    return sum(rebuild_user_balance_snapshots(user_id=user_id) for user_id in user_ids)
+
+
+@use_case
+def create_finance_record(*, user, validated_data: dict) -> FinanceRecord:
+    lock_finance_user(user.pk)
+    record = FinanceRecord.objects.create(user=user, **validated_data)
+    _apply_record(record, +1)
+    invalidate_dashboard(user.pk)
+    return record
+
+
+@use_case
+def update_finance_record(*, record: FinanceRecord, validated_data: dict) -> FinanceRecord:
+    # Перечитываем под блокировкой: снимать со снапшотов надо то, что сейчас в БД.
+    record = _lock_record(record)
+    _apply_record(record, -1)
+    for field, value in validated_data.items():
+        setattr(record, field, value)
+    record.save()
+    _apply_record(record, +1)
+    invalidate_dashboard(record.user_id)
+    return record
+
+
+@use_case
+def delete_finance_record(*, record: FinanceRecord) -> None:
+    user_id = record.user_id
+    record = _lock_record(record)
+    _apply_record(record, -1)
+    record.delete()
+    invalidate_dashboard(user_id)
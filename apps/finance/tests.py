@@ -1,3 +1,139 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import OuterRef
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from apps.core.testing import QueryBudgetTestCase
+
+from .models import FinanceBalanceSnapshot, FinanceRecord
+from .services import balance_expression, finance_summary, get_balance, month_start, rebuild_balance_snapshots
+
+
+class FinanceQueryBudgetTests(QueryBudgetTestCase):
+	def setUp(self):
+		super().setUp()
+		self.record = FinanceRecord.objects.filter(user=self.user).order_by("-date", "-id").last()
+
+	def test_list(self):
+		self.assertMaxQueries(3, "get", reverse("finance-list"))
+
+	def test_create(self):
+		payload = {"type": "expense", "amount": "12.30", "category": "food", "date": "2026-01-15"}
+		# +1 — блокировка пользователя (lock_finance_user).
+		self.assertMaxQueries(5, "post", reverse("finance-list"), payload, status=201)
+
+	def test_update(self):
+		self.assertMaxQueries(8, "patch", reverse("finance-detail", args=[self.record.pk]), {"amount": "99.00"})
+
+	def test_delete(self):
+		self.assertMaxQueries(6, "delete", reverse("finance-detail", args=[self.record.pk]), status=204)
+
+	def test_summary(self):
+		self.assertMaxQueries(2, "get", reverse("finance-summary"))
+
+	def test_summary_by_month(self):
+		self.assertMaxQueries(2, "get", reverse("finance-summary"), {"group": "month"})
+
+	def test_detail(self):
+		self.assertMaxQueries(2, "get", reverse("finance-detail", args=[self.record.pk]))
+
+
+class FinanceSnapshotConsistencyTests(TestCase):
+	"""После каждой записи через API баланс, сводка и снапшоты равны полному пересчёту."""
+
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(username="money", email="money@example.com", password="x")
+		self.client = APIClient()
+		self.client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}")
+		self.today = timezone.localdate()
+
+	def _post(self, type_, amount, days_ago, category="food"):
+		day = self.today - timedelta(days=days_ago)
+		payload = {"type": type_, "amount": amount, "category": category, "date": day.isoformat()}
+		response = self.client.post(reverse("finance-list"), payload, format="json")
+		self.assertEqual(response.status_code, 201, response.content)
+		return response.json()["data"]["id"]
+
+	def _signed(self, record):
+		return record.amount if record.type == FinanceRecord.Type.INCOME else -record.amount
+
+	def assertConsistent(self):
+		records = list(FinanceRecord.objects.filter(user=self.user))
+		expected_balance = sum((self._signed(r) for r in records), Decimal("0"))
+
+		self.assertEqual(get_balance(user=self.user), expected_balance)
+		annotated = get_user_model().objects.annotate(b=balance_expression(user_ref=OuterRef("pk"))).get(pk=self.user.pk)
+		self.assertEqual(annotated.b, expected_balance)
+
+		by_month = {}
+		for r in records:
+			income, expense = by_month.get(month_start(r.date), (Decimal("0"), Decimal("0")))
+			if r.type == FinanceRecord.Type.INCOME:
+				income += r.amount
+			else:
+				expense += r.amount
+			by_month[month_start(r.date)] = (income, expense)
+
+		snapshots = list(FinanceBalanceSnapshot.objects.filter(user=self.user).order_by("month"))
+		self.assertLessEqual(set(by_month), {s.month for s in snapshots})
+		running = Decimal("0")
+		for snapshot in snapshots:
+			# Месяц, из которого всё удалили, остаётся нулевой строкой.
+			income, expense = by_month.get(snapshot.month, (Decimal("0"), Decimal("0")))
+			running += income - expense
+			self.assertEqual((snapshot.income, snapshot.expense, snapshot.closing_balance), (income, expense, running))
+
+		if records:
+			window = finance_summary(
+				user=self.user, date_from=min(r.date for r in records), date_to=max(r.date for r in records)
+			)
+			totals = window["totals"]
+			self.assertEqual(totals["income"] - totals["expense"], expected_balance)
+			self.assertEqual(totals["count"], len(records))
+
+	def test_create_update_delete_keep_snapshots_consistent(self):
+		first = self._post("income", "1000.00", 70)
+		second = self._post("expense", "120.50", 40)
+		self._post("expense", "30.25", 0, category="taxi")
+		self.assertConsistent()
+
+		# Другой месяц, тип и сумма разом.
+		response = self.client.patch(
+			reverse("finance-detail", args=[second]),
+			{"type": "income", "amount": "75.10", "date": (self.today - timedelta(days=100)).isoformat()},
+			format="json",
+		)
+		self.assertEqual(response.status_code, 200, response.content)
+		self.assertConsistent()
+
+		response = self.client.patch(reverse("finance-detail", args=[first]), {"date": self.today.isoformat()}, format="json")
+		self.assertEqual(response.status_code, 200, response.content)
+		self.assertConsistent()
+
+		self.assertEqual(self.client.delete(reverse("finance-detail", args=[second])).status_code, 204)
+		self.assertConsistent()
+
+	def test_rebuild_is_idempotent(self):
+		for days_ago, amount in ((95, "10.00"), (50, "20.00"), (3, "5.55")):
+			self._post("expense", amount, days_ago)
+		self._post("income", "300.00", 50)
+
+		def rows():
+			return list(
+				FinanceBalanceSnapshot.objects.filter(user=self.user)
+				.order_by("month")
+				.values_list("month", "income", "expense", "closing_balance")
+			)
 
-# Create your tests here.
+		incremental = rows()
+		rebuild_balance_snapshots(user_ids=[self.user.pk])
+		self.assertEqual(rows(), incremental)
+		rebuild_balance_snapshots()
+		self.assertEqual(rows(), incremental)
+		self.assertConsistent()
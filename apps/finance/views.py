@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 from rest_framework import viewsets
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from .models import FinanceRecord
-from .serializers import FinanceRecordSerializer
+from .serializers import FinanceRecordSerializer, FinanceSummaryQuerySerializer, FinanceSummarySerializer
+from .services import delete_finance_record, finance_summary
 
 
 class FinanceRecordViewSet(viewsets.ModelViewSet):
@@ -16,3 +19,21 @@ class FinanceRecordViewSet(viewsets.ModelViewSet):
 		if not user or not getattr(user, "is_authenticated", False):
 			return FinanceRecord.objects.none()
 		return FinanceRecord.objects.filter(user=user)
+
+	def perform_destroy(self, instance):
+		delete_finance_record(record=instance)
+
+
+class FinanceSummaryAPIView(APIView):
+	serializer_class = FinanceSummarySerializer
+
+	def get(self, request):
+		query = FinanceSummaryQuerySerializer(data=request.query_params)
+		query.is_valid(raise_exception=True)
+		date_from = query.validated_data["from"]
+		date_to = query.validated_data["to"]
+		group = query.validated_data["group"]
+
+		summary = finance_summary(user=request.user, date_from=date_from, date_to=date_to, group=group)
+		payload = {"date_from": date_from, "date_to": date_to, "group": group, **summary}
+		return Response(FinanceSummarySerializer(payload).data)
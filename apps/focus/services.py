@@ -2,10 +2,10 @@ from __future__ import annotations
 
 from datetime import timedelta
 
-from django.db import transaction
 from django.db.models import Sum
 from django.utils import timezone
 
+from apps.core.transactions import use_case
 from apps.stats.models import XPEvent
 from apps.stats.services import award_xp_event
 
@@ -26,7 +26,7 @@ def _today_bounds():
     return start, end
 
 
-@transaction.atomic
+@use_case
 def start_focus_session(
     *,
     user,
@@ -49,7 +49,7 @@ def start_focus_session(
     return session, True
 
 
-@transaction.atomic
+@use_case
 def cancel_focus_session(*, user) -> FocusSession | None:
     active = FocusSession.objects.select_for_update().filter(user=user, ended_at__isnull=True, canceled=False).first()
     if not active:
@@ -65,7 +65,7 @@ def cancel_focus_session(*, user) -> FocusSession | None:
     return active
 
 
-@transaction.atomic
+@use_case
 def stop_focus_session(*, user, source_url: str = "") -> tuple[FocusSession | None, int]:
     active = FocusSession.objects.select_for_update().filter(user=user, ended_at__isnull=True, canceled=False).first()
     if not active:
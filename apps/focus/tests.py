@@ -0,0 +1,25 @@
+from django.urls import reverse
+
+from apps.core.testing import QueryBudgetTestCase
+from apps.focus.services import start_focus_session
+
+
+class FocusQueryBudgetTests(QueryBudgetTestCase):
+    def test_list(self):
+        # FocusSessionSerializer читает skill_node.track — всё должно прийти одним JOIN.
+        self.assertMaxQueries(3, "get", reverse("focus-list"))
+
+    def test_active(self):
+        start_focus_session(user=self.user, kind="coding", note="", skill_node_id=None)
+        self.assertMaxQueries(2, "get", reverse("focus-active"))
+
+    def test_start(self):
+        self.assertMaxQueries(3, "post", reverse("focus-start"), {"kind": "coding"}, status=201)
+
+    def test_stop(self):
+        start_focus_session(user=self.user, kind="coding", note="", skill_node_id=None)
+        self.assertMaxQueries(4, "post", reverse("focus-stop"))
+
+    def test_cancel(self):
+        start_focus_session(user=self.user, kind="coding", note="", skill_node_id=None)
+        self.assertMaxQueries(3, "post", reverse("focus-cancel"))
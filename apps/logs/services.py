@@ -1,7 +1,6 @@
 from __future__ import annotations
 
-from django.db import transaction
-
+from apps.core.transactions import use_case
 from apps.stats.models import XPEvent
 from apps.stats.services import award_xp_event
 
@@ -10,7 +9,7 @@ from .models import LearningLog
 LEARNING_LOG_XP = 25
 
 
-@transaction.atomic
+@use_case
 def create_learning_log(*, user, validated_data: dict) -> LearningLog:
     log = LearningLog.objects.create(user=user, **validated_data)
     award_xp_event(
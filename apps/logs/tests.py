@@ -1,3 +1,12 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from apps.core.testing import QueryBudgetTestCase
+
+
+class LearningLogQueryBudgetTests(QueryBudgetTestCase):
+	def test_list(self):
+		self.assertMaxQueries(2, "get", reverse("logs-list"))
+
+	def test_create(self):
+		payload = {"title": "Индексы в PostgreSQL", "description": "B-tree vs BRIN"}
+		self.assertMaxQueries(6, "post", reverse("logs-list"), payload, status=201)
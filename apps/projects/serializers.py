@@ -3,7 +3,7 @@ from __future__ import annotations
 from rest_framework import serializers
 
 from .models import Project, Task
-from .services import create_project, create_task
+from .services import create_project, create_task, update_project
 
 
 class ProjectSerializer(serializers.ModelSerializer):
@@ -24,6 +24,9 @@ class ProjectSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         return create_project(user=self.context["request"].user, validated_data=validated_data)
 
+    def update(self, instance, validated_data):
+        return update_project(project=instance, validated_data=validated_data)
+
 
 class TaskSerializer(serializers.ModelSerializer):
     xp_reward = serializers.SerializerMethodField()
@@ -1,29 +1,50 @@
 from __future__ import annotations
 
-from django.db import transaction
-
+from apps.core.transactions import use_case
 from apps.stats.models import XPEvent
-from apps.stats.services import award_xp_event
+from apps.stats.services import award_xp_event, bump_dev_counters
 
 from .models import Project, Task
 
 
-@transaction.atomic
+@use_case
 def create_project(*, user, validated_data: dict) -> Project:
-    return Project.objects.create(user=user, **validated_data)
+    project = Project.objects.create(user=user, **validated_data)
+    if project.is_commercial:
+        bump_dev_counters(user=user, commercial_projects_count=1)
+    return project
+
+
+@use_case
+def update_project(*, project: Project, validated_data: dict) -> Project:
+    project = Project.objects.select_for_update().get(pk=project.pk)
+    was_commercial = bool(project.is_commercial)
 
+    for field, value in validated_data.items():
+        setattr(project, field, value)
+    project.save()
 
-@transaction.atomic
+    delta = int(bool(project.is_commercial)) - int(was_commercial)
+    if delta:
+        bump_dev_counters(user=project.user, commercial_projects_count=delta)
+    return project
+
+
+@use_case
 def create_task(*, user, validated_data: dict) -> Task:
     # Serializer guarantees project belongs to user.
-    return Task.objects.create(**validated_data)
+    task = Task.objects.create(**validated_data)
+    if task.status == Task.Status.DONE:
+        bump_dev_counters(user=user, tasks_done_count=1)
+    return task
 
 
-@transaction.atomic
+@use_case
 def complete_task(*, task: Task) -> Task:
     task = Task.objects.select_for_update().select_related("project").get(pk=task.pk)
     if task.status != Task.Status.DONE:
         task.mark_completed()
+        bump_dev_counters(user=task.project.user, tasks_done_count=1)
         xp = int(task.difficulty) * 50
         award_xp_event(
             user=task.project.user,
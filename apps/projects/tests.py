@@ -1,3 +1,38 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from apps.core.testing import QueryBudgetTestCase
+
+from .models import Project, Task
+
+
+class ProjectQueryBudgetTests(QueryBudgetTestCase):
+	def test_projects_list(self):
+		self.assertMaxQueries(3, "get", reverse("projects-list"))
+
+	def test_projects_create(self):
+		self.assertMaxQueries(2, "post", reverse("projects-list"), {"name": "Pet project"}, status=201)
+
+	def test_tasks_list(self):
+		# TaskSerializer не должен ходить в БД по строке (project — через select_related).
+		self.assertMaxQueries(3, "get", reverse("tasks-list"))
+
+	def test_tasks_list_by_project(self):
+		project = Project.objects.filter(user=self.user).first()
+		self.assertMaxQueries(3, "get", reverse("tasks-list"), {"project": project.pk})
+
+	def test_tasks_create(self):
+		project = Project.objects.filter(user=self.user).first()
+		payload = {"project": project.pk, "title": "Написать тесты", "difficulty": 3}
+		self.assertMaxQueries(3, "post", reverse("tasks-list"), payload, status=201)
+
+	def test_task_complete(self):
+		task = Task.objects.filter(project__user=self.user, status=Task.Status.TODO).first()
+		self.assertMaxQueries(13, "post", reverse("tasks-complete", args=[task.pk]))
+
+	def test_project_detail(self):
+		project = Project.objects.filter(user=self.user).first()
+		self.assertMaxQueries(2, "get", reverse("projects-detail", args=[project.pk]))
+
+	def test_task_detail(self):
+		task = Task.objects.filter(project__user=self.user).first()
+		self.assertMaxQueries(2, "get", reverse("tasks-detail", args=[task.pk]))
@@ -2,12 +2,12 @@ from __future__ import annotations
 
 from django.contrib import admin
 
-from .models import BossDamage, BossRun
+from .models import BossDamage, BossRun, BossTemplate
 
 
 @admin.register(BossRun)
 class BossRunAdmin(admin.ModelAdmin):
-    list_display = ("id", "user", "name", "rank", "hp_current", "hp_max", "status", "started_at", "defeated_at")
+    list_display = ("id", "user", "name", "rank", "hp_current", "hp_max", "total_damage", "status", "started_at", "defeated_at")
     list_filter = ("rank", "status")
     search_fields = ("user__username", "name")
 
@@ -16,3 +16,10 @@ class BossRunAdmin(admin.ModelAdmin):
 class BossDamageAdmin(admin.ModelAdmin):
     list_display = ("id", "boss", "xp_event", "amount", "created_at")
     search_fields = ("boss__name", "boss__user__username")
+
+
+@admin.register(BossTemplate)
+class BossTemplateAdmin(admin.ModelAdmin):
+    list_display = ("id", "rank", "min_level", "name", "hp_base", "hp_per_level", "is_active")
+    list_filter = ("rank", "is_active")
+    search_fields = ("name",)
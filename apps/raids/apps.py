@@ -7,3 +7,6 @@ class RaidsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.raids"
     verbose_name = "Рейды"
+
+    def ready(self):
+        from . import signals  # noqa: F401
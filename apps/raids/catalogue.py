@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+
+# Кеш каталога боссов на уровне процесса. В своём процессе сбрасывается сигналами
+# при изменении BossTemplate; другие процессы подхватят изменения через TTL.
+
+
+@dataclass(frozen=True)
+class BossProfile:
+    name: str
+    rank: str
+    min_level: int
+    hp_base: int
+    hp_per_level: int
+
+    def hp_for_level(self, level: int) -> int:
+        return self.hp_base + int(level) * self.hp_per_level
+
+
+# Если каталог пуст (например, всё выключили в админке).
+DEFAULT_PROFILE = BossProfile(name="Слайм Регрессии", rank="E", min_level=1, hp_base=1200, hp_per_level=40)
+
+_catalogue: dict[str, list[BossProfile]] | None = None
+_loaded_at = 0.0
+
+
+def catalogue_ttl() -> float:
+    return float(getattr(settings, "BOSS_CATALOGUE_TTL", 300))
+
+
+def get_boss_catalogue() -> dict[str, list[BossProfile]]:
+    """rank -> профили по возрастанию min_level."""
+    global _catalogue, _loaded_at
+    if _catalogue is None or time.monotonic() - _loaded_at > catalogue_ttl():
+        from .models import BossTemplate
+
+        catalogue: dict[str, list[BossProfile]] = {}
+        for t in BossTemplate.objects.filter(is_active=True).order_by("rank", "min_level", "id"):
+            catalogue.setdefault(t.rank, []).append(
+                BossProfile(
+                    name=t.name,
+                    rank=t.rank,
+                    min_level=int(t.min_level),
+                    hp_base=int(t.hp_base),
+                    hp_per_level=int(t.hp_per_level),
+                )
+            )
+        _catalogue, _loaded_at = catalogue, time.monotonic()
+    return _catalogue
+
+
+def clear_boss_catalogue() -> None:
+    global _catalogue
+    _catalogue = None
+
+
+def boss_profile_for(*, rank: str, level: int) -> BossProfile:
+    profiles = get_boss_catalogue().get(rank) or []
+    chosen = None
+    for profile in profiles:
+        if profile.min_level <= int(level):
+            chosen = profile
+    return chosen or (profiles[0] if profiles else DEFAULT_PROFILE)
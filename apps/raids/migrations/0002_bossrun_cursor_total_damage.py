@@ -0,0 +1,47 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:00
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def fill_cursor_and_total_damage(apps, schema_editor):
+    BossRun = apps.get_model("raids", "BossRun")
+    BossDamage = apps.get_model("raids", "BossDamage")
+
+    for boss in BossRun.objects.all().iterator():
+        damages = BossDamage.objects.filter(boss_id=boss.id)
+        boss.total_damage = int(damages.aggregate(v=Sum("amount"))["v"] or 0)
+        last = (
+            damages.order_by("-xp_event__created_at", "-xp_event_id")
+            .values_list("xp_event__created_at", "xp_event_id")
+            .first()
+        )
+        if last is not None:
+            boss.last_event_created_at, boss.last_event_id = last
+        boss.save(update_fields=["total_damage", "last_event_created_at", "last_event_id"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('raids', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bossrun',
+            name='last_event_created_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='bossrun',
+            name='last_event_id',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='bossrun',
+            name='total_damage',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_cursor_and_total_damage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('raids', '0002_bossrun_cursor_total_damage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BossTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.CharField(choices=[('E', 'Новичок'), ('D', 'Junior'), ('C', 'Junior+'), ('B', 'Middle'), ('A', 'Middle+'), ('S', 'Senior')], max_length=1)),
+                ('min_level', models.PositiveIntegerField(default=1)),
+                ('name', models.CharField(max_length=128)),
+                ('hp_base', models.PositiveIntegerField()),
+                ('hp_per_level', models.PositiveIntegerField(default=0)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'Шаблон босса',
+                'verbose_name_plural': 'Шаблоны боссов',
+                'ordering': ['rank', 'min_level', 'id'],
+                'constraints': [models.UniqueConstraint(fields=('rank', 'min_level'), name='uniq_boss_template_rank_level')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:00
+
+from __future__ import annotations
+
+from django.db import migrations
+
+
+# Прежний if-chain `_boss_profile_for`: (rank, name, hp_base, hp_per_level).
+BOSS_TEMPLATES = [
+    ("E", "Слайм Регрессии", 1200, 40),
+    ("D", "Критичный Баг", 2000, 50),
+    ("C", "Пожиратель Контекста", 3500, 70),
+    ("B", "Токсичный Ревьюер", 5000, 90),
+    ("A", "Лорд Продакшена", 8000, 120),
+    ("S", "Архитектор Дедлайнов", 12000, 150),
+]
+
+
+def seed_boss_templates(apps, schema_editor):
+    BossTemplate = apps.get_model("raids", "BossTemplate")
+
+    for rank, name, hp_base, hp_per_level in BOSS_TEMPLATES:
+        BossTemplate.objects.update_or_create(
+            rank=rank,
+            min_level=1,
+            defaults={"name": name, "hp_base": hp_base, "hp_per_level": hp_per_level},
+        )
+
+
+def unseed_boss_templates(apps, schema_editor):
+    # Шаблоны могли отредактировать в админке — не удаляем автоматически.
+    pass
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("raids", "0003_bosstemplate"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_boss_templates, unseed_boss_templates),
+    ]
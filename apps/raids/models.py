@@ -3,7 +3,33 @@ from __future__ import annotations
 from django.conf import settings
 from django.db import models
 
-from apps.stats.models import XPEvent
+from apps.stats.models import Rank, XPEvent
+
+
+class BossTemplate(models.Model):
+    """Каталог боссов: имя и HP-кривая `hp_base + level * hp_per_level` для ранга героя.
+
+    Для ранга берётся активный шаблон с наибольшим min_level <= уровня героя.
+    Читается через кеш процесса (`apps.raids.catalogue`).
+    """
+
+    rank = models.CharField(max_length=1, choices=Rank.choices)
+    min_level = models.PositiveIntegerField(default=1)
+    name = models.CharField(max_length=128)
+    hp_base = models.PositiveIntegerField()
+    hp_per_level = models.PositiveIntegerField(default=0)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        verbose_name = "Шаблон босса"
+        verbose_name_plural = "Шаблоны боссов"
+        ordering = ["rank", "min_level", "id"]
+        constraints = [
+            models.UniqueConstraint(fields=["rank", "min_level"], name="uniq_boss_template_rank_level"),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.rank}: {self.name} ({self.hp_base} + L*{self.hp_per_level})"
 
 
 class BossRun(models.Model):
@@ -21,6 +47,13 @@ class BossRun(models.Model):
 
     status = models.CharField(max_length=16, choices=Status.choices, default=Status.ACTIVE)
 
+    # Суммарный поглощённый урон и курсор (created_at, id): все XPEvent до него поглощены.
+    # Атака читает события строго после курсора, без NOT IN по всем BossDamage; курсор
+    # двигается не дальше now - RAIDS_CURSOR_LAG_SECONDS (см. apps.raids.services).
+    total_damage = models.PositiveIntegerField(default=0)
+    last_event_created_at = models.DateTimeField(null=True, blank=True)
+    last_event_id = models.PositiveBigIntegerField(null=True, blank=True)
+
     started_at = models.DateTimeField(auto_now_add=True)
     defeated_at = models.DateTimeField(null=True, blank=True)
 
@@ -14,6 +14,7 @@ class BossRunSerializer(serializers.ModelSerializer):
             "rank",
             "hp_max",
             "hp_current",
+            "total_damage",
             "status",
             "started_at",
             "defeated_at",
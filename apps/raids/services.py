@@ -1,106 +1,254 @@
 from __future__ import annotations
 
-from django.db import transaction
-from django.db.models import Sum
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import BigIntegerField, Case, DateTimeField, F, Q, Value, When
+from django.db.models.functions import Greatest
+from django.db.models.sql import InsertQuery
 from django.utils import timezone
 
-from apps.stats.models import Rank, UserStats, XPEvent
+from apps.core.transactions import requires_transaction, use_case
+from apps.stats.models import XPEvent
 from apps.stats.services import award_xp_event, ensure_user_stats
 
+from .catalogue import boss_profile_for
 from .models import BossDamage, BossRun
 
 
-def _boss_profile_for(stats: UserStats) -> tuple[str, str, int]:
-    # Очень простой генератор босса по рангу/уровню.
-    # Можно будет заменить на таблицу/seed.
-    rank = stats.rank
-    level = int(stats.level)
+def get_active_boss_readonly(*, user) -> BossRun:
+    """Активный босс для чтения: один запрос по частичному уникальному индексу, без блокировок.
 
-    if rank in (Rank.S,):
-        return "Архитектор Дедлайнов", "S", 12000 + level * 150
-    if rank in (Rank.A,):
-        return "Лорд Продакшена", "A", 8000 + level * 120
-    if rank in (Rank.B,):
-        return "Токсичный Ревьюер", "B", 5000 + level * 90
-    if rank in (Rank.C,):
-        return "Пожиратель Контекста", "C", 3500 + level * 70
-    if rank in (Rank.D,):
-        return "Критичный Баг", "D", 2000 + level * 50
-    return "Слайм Регрессии", "E", 1200 + level * 40
+    Если активного босса нет — создаём через `ensure_active_boss`.
+    """
+    boss = BossRun.objects.filter(user=user, status=BossRun.Status.ACTIVE).first()
+    return boss or ensure_active_boss(user=user)
 
 
-@transaction.atomic
+@use_case
 def ensure_active_boss(*, user) -> BossRun:
-    stats = ensure_user_stats(user)
-
     boss = BossRun.objects.select_for_update().filter(user=user, status=BossRun.Status.ACTIVE).first()
     if boss:
         return boss
 
-    name, rank, hp = _boss_profile_for(stats)
-    boss = BossRun.objects.create(user=user, name=name, rank=rank, hp_max=int(hp), hp_current=int(hp))
+    # Активного босса нет — блокировать нечего. Мьютекс на создание — строка UserStats:
+    # параллельный первый визит ждёт здесь, а после нас увидит уже созданного босса
+    # вместо IntegrityError на uniq_active_boss_per_user.
+    stats = ensure_user_stats(user)
+    boss = BossRun.objects.filter(user=user, status=BossRun.Status.ACTIVE).first()
+    if boss:
+        return boss
+
+    profile = boss_profile_for(rank=stats.rank, level=int(stats.level))
+    hp = profile.hp_for_level(int(stats.level))
+    boss = BossRun.objects.create(user=user, name=profile.name, rank=profile.rank, hp_max=int(hp), hp_current=int(hp))
     return boss
 
 
-@transaction.atomic
-def attack_boss(*, user, max_events: int = 200) -> dict:
-    boss = ensure_active_boss(user=user)
+def cursor_horizon():
+    """Граница, дальше которой курсор босса не двигается: now - RAIDS_CURSOR_LAG_SECONDS.
 
-    # Берём неиспользованные XP события пользователя, начиная со старта босса.
-    used_ids = BossDamage.objects.filter(boss=boss).values_list("xp_event_id", flat=True)
+    created_at ставится при INSERT, а видимым событие становится при COMMIT: транзакция,
+    начавшаяся раньше, может закоммитить событие с меньшим created_at уже после того,
+    как курсор прошёл дальше, и оно было бы пропущено навсегда. Курсор по id не спасает:
+    id из последовательности выдаётся тоже при INSERT. Поэтому курсор отстаёт на лаг,
+    который должен быть больше самой долгой транзакции начисления; свежие события
+    за горизонтом всё равно поглощаются, их повторное чтение отсекает BossDamage.
+    """
+    return timezone.now() - timedelta(seconds=float(getattr(settings, "RAIDS_CURSOR_LAG_SECONDS", 60)))
 
-    qs = (
-        XPEvent.objects.select_for_update()
-        .filter(user=user, created_at__gte=boss.started_at)
-        .exclude(id__in=used_ids)
-        .order_by("created_at")
+
+def _after_cursor(boss: BossRun):
+    # Range по индексу (user, created_at): всё строго после курсора (или с начала забега).
+    qs = XPEvent.objects.filter(user_id=boss.user_id)
+    if boss.last_event_created_at is None:
+        return qs.filter(created_at__gte=boss.started_at)
+    return qs.filter(
+        Q(created_at__gt=boss.last_event_created_at)
+        | Q(created_at=boss.last_event_created_at, id__gt=boss.last_event_id)
     )
 
-    events = list(qs[: int(max_events)])
-    damage = sum(max(0, int(e.amount)) for e in events)
 
-    # Записываем, какие события были "поглощены".
-    BossDamage.objects.bulk_create(
-        [BossDamage(boss=boss, xp_event=e, amount=max(0, int(e.amount))) for e in events],
-        ignore_conflicts=True,
+def _unconsumed_events(boss: BossRun):
+    """Ещё не поглощённые XP-события после курсора босса.
+
+    Курсор отсекает историю; LEFT JOIN на BossDamage внутри диапазона отбрасывает
+    события, которые уже ударили босса в push-режиме или за горизонтом курсора.
+    """
+    return _after_cursor(boss).filter(boss_damage__isnull=True).order_by("created_at", "id")
+
+
+def _insert_damage_once(*, boss_id: int, events: list[XPEvent]) -> list[XPEvent]:
+    """`INSERT INTO BossDamage ... ON CONFLICT (xp_event_id) DO NOTHING RETURNING xp_event_id`.
+
+    Возвращает события, для которых строка урона вставлена сейчас; уже поглощённые
+    (атакой, push-режимом, параллельной транзакцией) пропускаются. Где ON CONFLICT ...
+    RETURNING недоступен — INSERT в savepoint на каждое событие.
+    """
+    using = router.db_for_write(BossDamage)
+    conn = connections[using]
+    rows = [BossDamage(boss_id=boss_id, xp_event_id=e.pk, amount=max(0, int(e.amount))) for e in events]
+
+    if not (conn.features.supports_update_conflicts_with_target and conn.features.can_return_rows_from_bulk_insert):
+        inserted = set()
+        for row in rows:
+            try:
+                with transaction.atomic(using=using):
+                    row.save(force_insert=True, using=using)
+            except IntegrityError:
+                continue
+            inserted.add(row.xp_event_id)
+        return [e for e in events if e.pk in inserted]
+
+    fields = [f for f in BossDamage._meta.concrete_fields if not f.primary_key]
+    column = conn.ops.quote_name(BossDamage._meta.get_field("xp_event").column)
+    batch_size = max(1, min(500, conn.ops.bulk_batch_size(fields, rows)))
+
+    inserted = set()
+    for start in range(0, len(rows), batch_size):
+        query = InsertQuery(BossDamage)
+        query.insert_values(fields, rows[start : start + batch_size])
+        ((sql, params),) = query.get_compiler(using=using).as_sql()
+        with conn.cursor() as cursor:
+            cursor.execute(f"{sql} ON CONFLICT ({column}) DO NOTHING RETURNING {column}", params)
+            inserted.update(pk for (pk,) in cursor.fetchall())
+    return [e for e in events if e.pk in inserted]
+
+
+def _apply_damage(*, boss_id: int, events: list[XPEvent], cursor: tuple | None = None) -> int:
+    """Пишет BossDamage и списывает с активного босса урон только вставленных строк.
+
+    Сначала INSERT ... ON CONFLICT DO NOTHING: событие, уже поглощённое атакой или
+    push-режимом, второй раз HP не уменьшит. Затем один UPDATE: HP атомарно
+    (Greatest(hp - damage, 0)), курсор (created_at, id), если передан, — только вперёд.
+    Возвращает урон (0, если босс уже не активен).
+    """
+    if not events and cursor is None:
+        return 0
+    fresh = _insert_damage_once(boss_id=boss_id, events=events) if events else []
+    damage = sum(max(0, int(e.amount)) for e in fresh)
+    changes = {}
+    if damage:
+        changes["hp_current"] = Greatest(F("hp_current") - damage, 0)
+        changes["total_damage"] = F("total_damage") + damage
+    if cursor is not None:
+        created_at, event_id = cursor
+        ahead = (
+            Q(last_event_created_at__isnull=True)
+            | Q(last_event_created_at__lt=created_at)
+            | Q(last_event_created_at=created_at, last_event_id__lt=event_id)
+        )
+        changes["last_event_created_at"] = Case(
+            When(ahead, then=Value(created_at)), default=F("last_event_created_at"), output_field=DateTimeField()
+        )
+        changes["last_event_id"] = Case(
+            When(ahead, then=Value(event_id)), default=F("last_event_id"), output_field=BigIntegerField()
+        )
+    if not changes:
+        return 0
+
+    updated = BossRun.objects.filter(pk=boss_id, status=BossRun.Status.ACTIVE).update(**changes)
+    if not updated:
+        # Босс уже повержен: события не поглощены, строки урона убираем.
+        if fresh:
+            BossDamage.objects.filter(boss_id=boss_id, xp_event_id__in=[e.pk for e in fresh]).delete()
+        return 0
+    return damage
+
+
+def _settle_defeat(*, user, boss_id: int) -> int:
+    """Переводит босса с hp=0 в DEFEATED и начисляет бонус. Возвращает бонус XP.
+
+    Идемпотентно: статус меняет условный UPDATE (выигрывает ровно один вызов),
+    а бонус — событие с источником boss_run/<id>, которое не начислится дважды.
+    """
+    defeated_at = timezone.now()
+    won = BossRun.objects.filter(pk=boss_id, status=BossRun.Status.ACTIVE, hp_current=0).update(
+        status=BossRun.Status.DEFEATED, defeated_at=defeated_at
+    )
+    if not won:
+        return 0
+
+    boss = BossRun.objects.only("id", "name", "rank", "hp_max").get(pk=boss_id)
+    # Бонус: фикс + доля от HP.
+    bonus_xp = int(200 + boss.hp_max // 10)
+    award_xp_event(
+        user=user,
+        kind=XPEvent.Kind.BOSS_DEFEAT,
+        amount=bonus_xp,
+        source_type="boss_run",
+        source_id=str(boss.id),
+        metadata={"boss_name": boss.name, "boss_rank": boss.rank, "boss_hp_max": boss.hp_max},
+        occurred_at=defeated_at,
     )
+    return bonus_xp
 
-    boss.hp_current = max(0, int(boss.hp_current) - int(damage))
-
-    defeated = False
-    bonus_xp = 0
-    if boss.hp_current <= 0 and boss.status == BossRun.Status.ACTIVE:
-        boss.status = BossRun.Status.DEFEATED
-        boss.defeated_at = timezone.now()
-        defeated = True
-
-        # Бонус: фикс + доля от HP.
-        bonus_xp = int(200 + boss.hp_max // 10)
-        award_xp_event(
-            user=user,
-            kind=XPEvent.Kind.BOSS_DEFEAT,
-            amount=bonus_xp,
-            source_type="boss_run",
-            source_id=str(boss.id),
-            metadata={"boss_name": boss.name, "boss_rank": boss.rank, "boss_hp_max": boss.hp_max},
-            occurred_at=boss.defeated_at,
-        )
 
-    boss.save(update_fields=["hp_current", "status", "defeated_at"])
+@requires_transaction
+def apply_boss_damage(*, user, events: list[XPEvent]) -> int:
+    """Push-режим (settings.RAIDS_AUTO_DAMAGE): урон от только что созданных XP-событий.
+
+    Вызывается из `award_xp_event` / `award_xp_events_bulk` в их транзакции.
+    Строку босса заранее не блокирует — только сам UPDATE. Без активного босса — no-op.
+    Курсор не двигает: только что созданные события всегда новее горизонта
+    (`cursor_horizon`), а события до включения режима подберёт `attack_boss`.
+    """
+    boss = BossRun.objects.filter(user=user, status=BossRun.Status.ACTIVE).only("id", "started_at").first()
+    if boss is None:
+        return 0
+    events = [e for e in events if e.created_at >= boss.started_at]
+    if not events:
+        return 0
+
+    damage = _apply_damage(boss_id=boss.id, events=events)
+    if damage:
+        _settle_defeat(user=user, boss_id=boss.id)
+    return damage
 
-    total_used = BossDamage.objects.filter(boss=boss).aggregate(v=Sum("amount")).get("v") or 0
+
+@use_case
+def attack_boss(*, user, max_events: int = 200) -> dict:
+    """Ручная атака: поглощает события после курсора босса.
+
+    В push-режиме урон уже нанесён при начислении, и атака — догоняющий no-op
+    (подберёт только события, созданные до включения режима).
+    """
+    # Блокируется только строка босса (select_for_update в ensure_active_boss):
+    # параллельные атаки сериализуются на ней, сами XPEvent не блокируются.
+    boss = ensure_active_boss(user=user)
+    horizon = cursor_horizon()
+
+    events = list(_unconsumed_events(boss).only("id", "amount", "created_at")[: int(max_events)])
+    if len(events) < int(max_events):
+        # Всё видимое за курсором поглощено (в том числе push-режимом): курсор — на самое
+        # новое событие не позже горизонта.
+        cursor = (
+            _after_cursor(boss)
+            .filter(created_at__lte=horizon)
+            .order_by("-created_at", "-id")
+            .values_list("created_at", "id")
+            .first()
+        )
+    else:
+        # Пачка обрезана по max_events: дальше последнего поглощённого до горизонта нельзя.
+        settled = [e for e in events if e.created_at <= horizon]
+        cursor = (settled[-1].created_at, settled[-1].id) if settled else None
+    damage = _apply_damage(boss_id=boss.id, events=events, cursor=cursor)
+    bonus_xp = _settle_defeat(user=user, boss_id=boss.id)
+    boss.refresh_from_db()
 
     return {
         "boss": boss,
         "damage": int(damage),
         "events_used": len(events),
-        "total_damage": int(total_used),
-        "defeated": bool(defeated),
+        "total_damage": int(boss.total_damage),
+        "defeated": bonus_xp > 0,
         "bonus_xp": int(bonus_xp),
     }
 
 
-@transaction.atomic
+@use_case
 def start_next_boss(*, user) -> BossRun:
     # Явный переход к следующему боссу (после победы).
     BossRun.objects.select_for_update().filter(user=user, status=BossRun.Status.ACTIVE).update(status=BossRun.Status.DEFEATED)
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalogue import clear_boss_catalogue
+from .models import BossTemplate
+
+
+@receiver(post_save, sender=BossTemplate)
+@receiver(post_delete, sender=BossTemplate)
+def reset_boss_catalogue(sender, **kwargs):
+    clear_boss_catalogue()
@@ -0,0 +1,248 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core.testing import QueryBudgetTestCase
+from apps.raids.catalogue import DEFAULT_PROFILE, boss_profile_for, clear_boss_catalogue, get_boss_catalogue
+from apps.raids.models import BossDamage, BossRun, BossTemplate
+from apps.raids.services import _apply_damage, _settle_defeat, apply_boss_damage, attack_boss, ensure_active_boss
+from apps.stats.models import UserStats, XPEvent
+from apps.stats.services import award_xp_event, award_xp_events_bulk
+
+
+class RaidsQueryBudgetTests(QueryBudgetTestCase):
+    def test_boss_first_visit(self):
+        # Босса ещё нет: блокировка UserStats, повторная проверка и создание по каталогу
+        # (холодный кэш каталога).
+        self.assertMaxQueries(7, "get", reverse("boss"))
+
+    def test_boss(self):
+        ensure_active_boss(user=self.user)
+        self.assertMaxQueries(2, "get", reverse("boss"))
+
+    def test_boss_attack(self):
+        # 50k событий в истории: атака берёт не больше max_events одной выборкой,
+        # плюс одна выборка позиции курсора до горизонта.
+        ensure_active_boss(user=self.user)
+        self.assertMaxQueries(8, "post", reverse("boss-attack"))
+
+    def test_boss_next(self):
+        ensure_active_boss(user=self.user)
+        self.assertMaxQueries(6, "post", reverse("boss-next"), status=201)
+
+
+@override_settings(RAIDS_AUTO_DAMAGE=True)
+class BossPushDamageTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="raider", email="raider@example.com", password="x")
+        self.boss = ensure_active_boss(user=self.user)
+
+    def assertBossConsistent(self, boss: BossRun):
+        boss.refresh_from_db()
+        pushed = BossDamage.objects.filter(boss=boss).aggregate(total=Sum("amount"))["total"] or 0
+        self.assertEqual(boss.total_damage, pushed)
+        self.assertEqual(boss.hp_current, max(0, boss.hp_max - boss.total_damage))
+
+    def _workout(self, amount: int):
+        return {"kind": XPEvent.Kind.WORKOUT, "amount": amount}
+
+    def test_single_award_damages_boss(self):
+        event, _ = award_xp_event(user=self.user, kind=XPEvent.Kind.WORKOUT, amount=100)
+        self.assertBossConsistent(self.boss)
+        self.assertEqual(self.boss.total_damage, 100)
+        self.assertTrue(BossDamage.objects.filter(boss=self.boss, xp_event=event, amount=100).exists())
+
+    def test_bulk_award_damages_boss(self):
+        award_xp_events_bulk(user=self.user, events=[self._workout(30), self._workout(45), self._workout(0)])
+        self.assertBossConsistent(self.boss)
+        self.assertEqual(self.boss.total_damage, 75)
+        self.assertEqual(BossDamage.objects.filter(boss=self.boss).count(), 2)
+
+    def test_bulk_overkill_defeats_once_and_grants_bonus_once(self):
+        BossRun.objects.filter(pk=self.boss.pk).update(hp_max=50, hp_current=50)
+        award_xp_events_bulk(user=self.user, events=[self._workout(40), self._workout(40), self._workout(40)])
+
+        self.assertBossConsistent(self.boss)
+        self.assertEqual((self.boss.status, self.boss.hp_current, self.boss.total_damage), (BossRun.Status.DEFEATED, 0, 120))
+        bonus = XPEvent.objects.get(user=self.user, kind=XPEvent.Kind.BOSS_DEFEAT)
+        self.assertEqual((bonus.source_type, bonus.source_id), ("boss_run", str(self.boss.pk)))
+        # Бонус не бьёт ни побеждённого, ни следующего босса.
+        self.assertFalse(BossDamage.objects.filter(xp_event=bonus).exists())
+
+        # Повторное урегулирование и новые начисления бонус не дублируют.
+        self.assertEqual(_settle_defeat(user=self.user, boss_id=self.boss.pk), 0)
+        award_xp_event(user=self.user, kind=XPEvent.Kind.WORKOUT, amount=10)
+        self.assertEqual(XPEvent.objects.filter(user=self.user, kind=XPEvent.Kind.BOSS_DEFEAT).count(), 1)
+        self.assertEqual(UserStats.objects.get(user=self.user).xp, 120 + bonus.amount + 10)
+
+    def test_attack_skips_pushed_events(self):
+        award_xp_event(user=self.user, kind=XPEvent.Kind.WORKOUT, amount=60)
+        result = attack_boss(user=self.user)
+        self.assertEqual((result["damage"], result["events_used"], result["total_damage"]), (0, 0, 60))
+        self.assertBossConsistent(self.boss)
+
+    def test_push_after_attack_does_not_charge_twice(self):
+        # Outbox: событие уже записано, атака поглотила его раньше, чем воркер применил push.
+        with override_settings(RAIDS_AUTO_DAMAGE=False):
+            event, _ = award_xp_event(user=self.user, kind=XPEvent.Kind.WORKOUT, amount=100)
+        self.assertEqual(attack_boss(user=self.user)["damage"], 100)
+
+        with transaction.atomic():
+            self.assertEqual(apply_boss_damage(user=self.user, events=[event]), 0)
+        self.assertBossConsistent(self.boss)
+        self.assertEqual((self.boss.total_damage, self.boss.hp_current), (100, self.boss.hp_max - 100))
+        self.assertEqual(BossDamage.objects.filter(xp_event=event).count(), 1)
+
+    def test_damage_to_boss_defeated_meanwhile_leaves_no_damage_rows(self):
+        with override_settings(RAIDS_AUTO_DAMAGE=False):
+            event, _ = award_xp_event(user=self.user, kind=XPEvent.Kind.WORKOUT, amount=10)
+        # Босса победили между чтением и UPDATE: строки урона вставлены и должны откатиться.
+        BossRun.objects.filter(pk=self.boss.pk).update(status=BossRun.Status.DEFEATED)
+        self.assertEqual(_apply_damage(boss_id=self.boss.pk, events=[event]), 0)
+        self.assertFalse(BossDamage.objects.filter(xp_event=event).exists())
+
+    def test_attack_picks_up_only_backlog_from_before_push_mode(self):
+        with override_settings(RAIDS_AUTO_DAMAGE=False):
+            award_xp_event(user=self.user, kind=XPEvent.Kind.WORKOUT, amount=25)
+        award_xp_event(user=self.user, kind=XPEvent.Kind.WORKOUT, amount=60)
+
+        result = attack_boss(user=self.user)
+        self.assertEqual((result["damage"], result["events_used"], result["total_damage"]), (25, 1, 85))
+        self.assertEqual(attack_boss(user=self.user)["damage"], 0)
+        self.assertBossConsistent(self.boss)
+
+
+class BossCursorLagTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="cursor", email="cursor@example.com", password="x")
+        self.boss = ensure_active_boss(user=self.user)
+        BossRun.objects.filter(pk=self.boss.pk).update(started_at=timezone.now() - timedelta(hours=1))
+
+    def _award(self, amount: int, *, created_at=None) -> XPEvent:
+        event, _ = award_xp_event(user=self.user, kind=XPEvent.Kind.WORKOUT, amount=amount)
+        if created_at is not None:
+            XPEvent.objects.filter(pk=event.pk).update(created_at=created_at)
+            event.refresh_from_db()
+        return event
+
+    def test_cursor_stops_at_horizon_and_late_commit_is_not_skipped(self):
+        old = self._award(10, created_at=timezone.now() - timedelta(minutes=30))
+        fresh = self._award(20)
+
+        result = attack_boss(user=self.user)
+        self.assertEqual((result["damage"], result["events_used"]), (30, 2))
+        self.boss.refresh_from_db()
+        # Свежее событие поглощено, но курсор остановился на последнем событии до горизонта.
+        self.assertEqual((self.boss.last_event_created_at, self.boss.last_event_id), (old.created_at, old.pk))
+
+        # Транзакция, начатая раньше, закоммитила событие с created_at меньше, чем у fresh.
+        self._award(5, created_at=fresh.created_at - timedelta(seconds=1))
+        result = attack_boss(user=self.user)
+        self.assertEqual((result["damage"], result["events_used"], result["total_damage"]), (5, 1, 35))
+        self.assertEqual(attack_boss(user=self.user)["damage"], 0)
+
+    @override_settings(RAIDS_CURSOR_LAG_SECONDS=0)
+    def test_cursor_moves_over_pushed_events(self):
+        with override_settings(RAIDS_AUTO_DAMAGE=True):
+            self._award(10)
+            last = self._award(15)
+        self.assertEqual(attack_boss(user=self.user)["damage"], 0)
+        self.boss.refresh_from_db()
+        self.assertEqual(self.boss.last_event_id, last.pk)
+
+    @override_settings(RAIDS_CURSOR_LAG_SECONDS=0)
+    def test_truncated_batch_moves_cursor_to_last_consumed(self):
+        events = [self._award(1) for _ in range(3)]
+        self.assertEqual(attack_boss(user=self.user, max_events=2)["events_used"], 2)
+        self.boss.refresh_from_db()
+        self.assertEqual(self.boss.last_event_id, events[1].pk)
+        self.assertEqual(attack_boss(user=self.user, max_events=2)["events_used"], 1)
+
+
+class EnsureActiveBossTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="firstvisit", email="firstvisit@example.com", password="x")
+
+    def test_concurrent_first_visit_reuses_created_boss(self):
+        from apps.raids import services
+        from apps.stats.services import ensure_user_stats
+
+        def locked_after_rival(user):
+            # Параллельный первый визит создал босса, пока мы ждали блокировку UserStats.
+            BossRun.objects.create(user=user, name="Rival", hp_max=500, hp_current=500)
+            return ensure_user_stats(user)
+
+        with mock.patch.object(services, "ensure_user_stats", side_effect=locked_after_rival):
+            boss = ensure_active_boss(user=self.user)
+        self.assertEqual(boss.name, "Rival")
+        self.assertEqual(BossRun.objects.filter(user=self.user).count(), 1)
+
+    def test_returns_existing_boss_without_locking_stats(self):
+        boss = ensure_active_boss(user=self.user)
+        with mock.patch("apps.raids.services.ensure_user_stats") as lock:
+            self.assertEqual(ensure_active_boss(user=self.user).pk, boss.pk)
+        lock.assert_not_called()
+
+
+class BossCatalogueTests(TestCase):
+    # Шаблоны по одному на ранг с min_level=1 засеяны миграцией 0004.
+    def setUp(self):
+        clear_boss_catalogue()
+        self.addCleanup(clear_boss_catalogue)
+
+    def test_seeded_template_per_rank(self):
+        profile = boss_profile_for(rank="E", level=3)
+        self.assertEqual((profile.name, profile.hp_for_level(3)), ("Слайм Регрессии", 1200 + 3 * 40))
+        self.assertEqual(boss_profile_for(rank="S", level=50).name, "Архитектор Дедлайнов")
+
+    def test_highest_min_level_not_above_hero_level(self):
+        BossTemplate.objects.create(rank="D", min_level=10, name="Ветеран Багов", hp_base=3000, hp_per_level=60)
+        BossTemplate.objects.create(rank="D", min_level=20, name="Выключенный", hp_base=1, is_active=False)
+        self.assertEqual(boss_profile_for(rank="D", level=9).name, "Критичный Баг")
+        self.assertEqual(boss_profile_for(rank="D", level=10).name, "Ветеран Багов")
+        self.assertEqual(boss_profile_for(rank="D", level=40).name, "Ветеран Багов")
+
+    def test_level_below_every_template_takes_lowest(self):
+        BossTemplate.objects.filter(rank="C").update(min_level=5)
+        BossTemplate.objects.create(rank="C", min_level=15, name="Старший Пожиратель", hp_base=4000)
+        self.assertEqual(boss_profile_for(rank="C", level=1).name, "Пожиратель Контекста")
+
+    def test_default_profile_when_rank_or_table_is_empty(self):
+        BossTemplate.objects.filter(rank="B").update(is_active=False)
+        self.assertEqual(boss_profile_for(rank="B", level=5), DEFAULT_PROFILE)
+        BossTemplate.objects.all().delete()
+        self.assertEqual(boss_profile_for(rank="A", level=5), DEFAULT_PROFILE)
+
+    def test_cache_is_reset_on_template_save_and_delete(self):
+        get_boss_catalogue()
+        with self.assertNumQueries(0):
+            get_boss_catalogue()
+
+        template = BossTemplate.objects.create(rank="E", min_level=5, name="Босс-новичок", hp_base=100)
+        with self.assertNumQueries(1):
+            self.assertEqual(boss_profile_for(rank="E", level=5).name, "Босс-новичок")
+
+        template.name = "Переименован"
+        template.save()
+        self.assertEqual(boss_profile_for(rank="E", level=5).name, "Переименован")
+
+        template.delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(boss_profile_for(rank="E", level=5).name, "Слайм Регрессии")
+
+    @override_settings(BOSS_CATALOGUE_TTL=60)
+    def test_cache_expires_after_ttl(self):
+        with mock.patch("apps.raids.catalogue.time.monotonic", return_value=1000.0):
+            get_boss_catalogue()
+        # Изменение мимо сигналов (как из другого процесса): видно только после TTL.
+        BossTemplate.objects.filter(rank="E").update(name="Обновлён")
+        with mock.patch("apps.raids.catalogue.time.monotonic", return_value=1059.0):
+            self.assertEqual(boss_profile_for(rank="E", level=1).name, "Слайм Регрессии")
+        with mock.patch("apps.raids.catalogue.time.monotonic", return_value=1061.0):
+            self.assertEqual(boss_profile_for(rank="E", level=1).name, "Обновлён")
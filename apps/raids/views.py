@@ -5,14 +5,14 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .serializers import BossAttackSerializer, BossRunSerializer
-from .services import attack_boss, ensure_active_boss, start_next_boss
+from .services import attack_boss, get_active_boss_readonly, start_next_boss
 
 
 class BossAPIView(APIView):
     serializer_class = BossRunSerializer
 
     def get(self, request):
-        boss = ensure_active_boss(user=request.user)
+        boss = get_active_boss_readonly(user=request.user)
         return Response(BossRunSerializer(boss).data)
 
 
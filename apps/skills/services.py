@@ -1,14 +1,13 @@
 from __future__ import annotations
 
-from django.db import transaction
-
+from apps.core.transactions import use_case
 from apps.stats.models import XPEvent
-from apps.stats.services import award_xp_event
+from apps.stats.services import award_xp_event, bump_dev_counters
 
 from .models import Skill
 
 
-@transaction.atomic
+@use_case
 def create_skill(*, user, validated_data: dict) -> Skill:
     # Если навык создаётся из дерева, фиксируем канонические category/name.
     node = validated_data.get("node")
@@ -20,11 +19,17 @@ def create_skill(*, user, validated_data: dict) -> Skill:
         }
 
     skill = Skill.objects.create(user=user, **validated_data)
+    bump_dev_counters(
+        user=user,
+        skill_count=1,
+        skill_level_sum=int(skill.level),
+        skills_mastered_count=1 if skill.status == Skill.Status.MASTERED else 0,
+    )
     # First creation doesn't necessarily mean progress; keep XP neutral.
     return skill
 
 
-@transaction.atomic
+@use_case
 def update_skill(*, skill: Skill, validated_data: dict) -> Skill:
     skill = Skill.objects.select_for_update().get(pk=skill.pk)
     before_level = int(skill.level)
@@ -38,6 +43,14 @@ def update_skill(*, skill: Skill, validated_data: dict) -> Skill:
 
     skill.save()
 
+    was_mastered = before_status == Skill.Status.MASTERED
+    is_mastered = skill.status == Skill.Status.MASTERED
+    bump_dev_counters(
+        user=skill.user,
+        skill_level_sum=int(skill.level) - before_level,
+        skills_mastered_count=int(is_mastered) - int(was_mastered),
+    )
+
     gained = 0
     after_level = int(skill.level)
     if after_level > before_level:
@@ -1,3 +1,37 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from apps.core.testing import QueryBudgetTestCase
+
+from .models import Skill, SkillNode, SkillTrack
+
+
+class SkillQueryBudgetTests(QueryBudgetTestCase):
+	def test_skills_list(self):
+		self.assertMaxQueries(3, "get", reverse("skills-list"))
+
+	def test_skills_create(self):
+		self.assertMaxQueries(3, "post", reverse("skills-list"), {"name": "Kafka", "level": 10}, status=201)
+
+	def test_skills_update(self):
+		skill = Skill.objects.filter(user=self.user, level__lt=50).first()
+		# Два события (level-up и mastered), каждое — XPEvent, роллап, стрик и XP.
+		self.assertMaxQueries(14, "patch", reverse("skills-detail", args=[skill.pk]), {"level": 80})
+
+	def test_skill_tracks(self):
+		self.assertMaxQueries(3, "get", reverse("skill-tracks-list"))
+
+	def test_skill_nodes(self):
+		# prerequisites — через prefetch_related, а не запрос на узел.
+		self.assertMaxQueries(4, "get", reverse("skill-nodes-list"))
+
+	def test_skill_detail(self):
+		skill = Skill.objects.filter(user=self.user).first()
+		self.assertMaxQueries(2, "get", reverse("skills-detail", args=[skill.pk]))
+
+	def test_skill_track_detail(self):
+		track = SkillTrack.objects.first()
+		self.assertMaxQueries(2, "get", reverse("skill-tracks-detail", args=[track.pk]))
+
+	def test_skill_node_detail(self):
+		node = SkillNode.objects.filter(prerequisites__isnull=False).first() or SkillNode.objects.first()
+		self.assertMaxQueries(3, "get", reverse("skill-nodes-detail", args=[node.pk]))
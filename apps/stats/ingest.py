@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import codecs
+import json
+from collections.abc import Iterator
+
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+
+# Потоковый разбор тела запроса для пакетной загрузки XP-событий:
+# ни JSON-массив, ни NDJSON не читаются в память целиком.
+
+READ_CHUNK_SIZE = 64 * 1024
+INGEST_MAX_EVENTS = 10_000
+INGEST_WRITE_CHUNK = 500
+
+
+class IngestParseError(ValueError):
+    pass
+
+
+def ingest_max_bytes() -> int:
+    return int(getattr(settings, "XP_INGEST_MAX_BYTES", 16 * 1024 * 1024))
+
+
+class BoundedStream:
+    """Читает из `stream` не больше `max_bytes`; дальше — IngestParseError.
+
+    Content-Length может отсутствовать (chunked), поэтому предел считается по
+    фактически прочитанному. Читаем на байт больше остатка, чтобы отличить
+    тело ровно в предел от превышения.
+    """
+
+    def __init__(self, stream, max_bytes: int):
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.remaining = max_bytes
+
+    def _take(self, data: bytes) -> bytes:
+        self.remaining -= len(data)
+        if self.remaining < 0:
+            raise IngestParseError(f"Тело запроса больше {self.max_bytes} байт")
+        return data
+
+    def _size(self, size: int) -> int:
+        return self.remaining + 1 if size is None or size < 0 else min(size, self.remaining + 1)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._take(self.stream.read(self._size(size)))
+
+    def readline(self, size: int = -1) -> bytes:
+        return self._take(self.stream.readline(self._size(size)))
+
+
+def iter_ndjson(stream) -> Iterator[tuple[int, object]]:
+    """NDJSON: одна JSON-строка на событие.
+
+    Возвращает (index, value). Битая строка отдаётся как IngestParseError вместо
+    value, чтобы отклонить только её, а не весь пакет. Пустые строки пропускаются.
+    """
+    index = 0
+    for raw in iter(stream.readline, b""):
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            yield index, json.loads(line)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            yield index, IngestParseError(f"Некорректный JSON: {e}")
+        index += 1
+
+
+def iter_json_array(stream, *, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[tuple[int, object]]:
+    """JSON-массив `[{...}, {...}]`, разбираемый по элементам по мере чтения.
+
+    В отличие от NDJSON, после ошибки синтаксиса продолжить нельзя — бросаем
+    IngestParseError; уже отданные элементы остаются валидными.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill() -> None:
+        nonlocal buf, pos, eof
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        try:
+            buf = buf[pos:] + utf8.decode(chunk or b"", final=eof)
+        except UnicodeDecodeError as e:
+            raise IngestParseError(f"Тело запроса не в UTF-8: {e}")
+        pos = 0
+
+    def skip_ws() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if eof:
+                return ""
+            fill()
+
+    if skip_ws() != "[":
+        raise IngestParseError("Ожидается JSON-массив событий")
+    pos += 1
+
+    index = 0
+    expect_value = True
+    while True:
+        ch = skip_ws()
+        if ch == "]" and (index == 0 or not expect_value):
+            pos += 1
+            # После массива допустимы только пробелы: `[...]garbage` — не JSON.
+            if skip_ws():
+                raise IngestParseError("Лишние данные после JSON-массива")
+            return
+        if not ch:
+            raise IngestParseError("Неожиданный конец JSON-массива")
+
+        if not expect_value:
+            if ch != ",":
+                raise IngestParseError(f"Ожидается ',' после элемента {index - 1}")
+            pos += 1
+            expect_value = True
+            continue
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise IngestParseError(f"Некорректный JSON в элементе {index}: {e.msg}")
+                fill()
+                continue
+            # Значение упёрлось в конец буфера — могло быть обрезано (например, число).
+            if end == len(buf) and not eof:
+                fill()
+                continue
+            break
+
+        pos = end
+        yield index, value
+        index += 1
+        expect_value = False
+
+
+def ingest_xp_events(*, user, items: Iterator[tuple[int, object]]) -> dict:
+    """Валидирует строки по одной и пишет их пачками по INGEST_WRITE_CHUNK.
+
+    Каждая пачка — отдельная транзакция (`award_xp_events_bulk`), поэтому
+    ошибка в хвосте большого тела не откатывает уже принятые события.
+    Возвращает статус по каждой строке: created / duplicate / rejected.
+    """
+    from .serializers import XPEventIngestSerializer
+    from .services import award_xp_events_bulk
+
+    # Один экземпляр сериализатора на весь поток: поля строятся один раз, а не на каждую строку.
+    validator = XPEventIngestSerializer()
+    results: list[dict] = []
+    chunk: list[tuple[int, dict]] = []
+    truncated = False
+
+    def flush() -> None:
+        if not chunk:
+            return
+        bulk = award_xp_events_bulk(user=user, events=[row for _, row in chunk])
+        for (index, _), (event, created) in zip(chunk, bulk.results):
+            results.append(
+                {
+                    "index": index,
+                    "status": "created" if created else "duplicate",
+                    "id": event.id if event is not None else None,
+                }
+            )
+        chunk.clear()
+
+    try:
+        for index, value in items:
+            if index >= INGEST_MAX_EVENTS:
+                truncated = True
+                break
+
+            if isinstance(value, IngestParseError):
+                results.append({"index": index, "status": "rejected", "errors": {"non_field_errors": [str(value)]}})
+                continue
+
+            try:
+                row = validator.run_validation(value)
+            except ValidationError as e:
+                errors = {
+                    field: [str(x) for x in messages] if isinstance(messages, list) else [str(messages)]
+                    for field, messages in e.detail.items()
+                }
+                results.append({"index": index, "status": "rejected", "errors": errors})
+                continue
+
+            chunk.append((index, dict(row)))
+            if len(chunk) >= INGEST_WRITE_CHUNK:
+                flush()
+    except IngestParseError as e:
+        flush()
+        results.append({"index": len(results), "status": "rejected", "errors": {"non_field_errors": [str(e)]}})
+    else:
+        flush()
+
+    results.sort(key=lambda r: r["index"])
+    return {
+        "created": sum(1 for r in results if r["status"] == "created"),
+        "duplicates": sum(1 for r in results if r["status"] == "duplicate"),
+        "rejected": sum(1 for r in results if r["status"] == "rejected"),
+        "truncated": truncated,
+        "results": results,
+    }
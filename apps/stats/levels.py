@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from functools import cached_property
+from math import isqrt
+
+from django.conf import settings
+
+# Сколько уровней держим в предрасчитанной таблице порогов (для UI и быстрых lookup'ов).
+LEVEL_TABLE_SIZE = 100
+
+
+class LevelCurve:
+    """Кривая уровней: сколько всего XP нужно, чтобы *быть* на уровне.
+
+    Наследник обязан реализовать `xp_for_level`. `level_for_xp` по умолчанию ищет
+    уровень бинарным поиском по таблице порогов; кривые с обратной формулой
+    переопределяют его на O(1).
+    """
+
+    code = ""
+    formula = ""
+
+    def xp_for_level(self, level: int) -> int:
+        raise NotImplementedError
+
+    @cached_property
+    def thresholds(self) -> tuple[int, ...]:
+        # thresholds[i] — XP для уровня i + 1.
+        return tuple(self.xp_for_level(level) for level in range(1, LEVEL_TABLE_SIZE + 1))
+
+    def threshold(self, level: int) -> int:
+        if 1 <= level <= len(self.thresholds):
+            return self.thresholds[level - 1]
+        return self.xp_for_level(level)
+
+    def level_for_xp(self, xp: int) -> int:
+        xp = max(0, int(xp))
+        if xp < self.thresholds[-1]:
+            return bisect_right(self.thresholds, xp)
+
+        # За пределами таблицы: экспоненциальный + бинарный поиск.
+        lo = len(self.thresholds)
+        hi = lo * 2
+        while self.xp_for_level(hi) <= xp:
+            lo, hi = hi, hi * 2
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if self.xp_for_level(mid) <= xp:
+                lo = mid
+            else:
+                hi = mid
+        return lo
+
+    def xp_to_next_level(self, level: int) -> int:
+        return self.threshold(level + 1) - self.threshold(level)
+
+
+class TriangularCurve(LevelCurve):
+    """Уровень L требует step * (1 + 2 + ... + (L - 1)) XP.
+
+    Level 1 -> 0 XP
+    Level 2 -> 100 XP
+    Level 3 -> 100 + 200 = 300 XP
+    ...
+    """
+
+    code = "triangular"
+
+    def __init__(self, step: int = 100):
+        self.step = int(step)
+        self.formula = f"xp_to_next_level = level * {self.step}"
+
+    def xp_for_level(self, level: int) -> int:
+        if level <= 1:
+            return 0
+        return ((level - 1) * level // 2) * self.step
+
+    def level_for_xp(self, xp: int) -> int:
+        # Наибольший L с L * (L - 1) <= 2 * xp / step — обращение треугольного числа.
+        n = 2 * max(0, int(xp)) // self.step
+        return (1 + isqrt(1 + 4 * n)) // 2
+
+
+# Все кривые в одном месте; активная выбирается через settings.LEVEL_CURVE.
+LEVEL_CURVES: dict[str, LevelCurve] = {
+    "triangular": TriangularCurve(step=100),
+}
+
+
+def get_level_curve() -> LevelCurve:
+    return LEVEL_CURVES[getattr(settings, "LEVEL_CURVE", "triangular")]
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import csv
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand
+
+from apps.stats.services import audit_xp_page
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверяет UserStats.xp с SUM(amount) по XPEvent: страницы по user_id (keyset), расхождения — "
+        "одним запросом на страницу. --fix переписывает xp и зависящие от него поля через bulk_update."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk", type=int, default=1000, help="Пользователей на страницу (одна транзакция)")
+        parser.add_argument("--fix", action="store_true", help="Исправить найденные расхождения")
+        parser.add_argument("--show", type=int, default=20, help="Сколько расхождений вывести")
+        parser.add_argument("--output", default="", help="CSV со всеми расхождениями (user_id,stored,expected,delta)")
+
+    def handle(self, *args, **options):
+        chunk = max(1, int(options["chunk"]))
+        fix = bool(options["fix"])
+        show = max(0, int(options["show"]))
+
+        scanned = 0
+        drifted = 0
+        delta_total = 0
+        after = 0
+        started = time.perf_counter()
+
+        with open(options["output"], "w", newline="") if options["output"] else nullcontext() as fh:
+            writer = csv.writer(fh) if fh is not None else None
+            if writer is not None:
+                writer.writerow(["user_id", "stored", "expected", "delta"])
+
+            while True:
+                page = audit_xp_page(after_user_id=after, limit=chunk, fix=fix)
+                if page.last_user_id is None:
+                    break
+                after = page.last_user_id
+                scanned += page.scanned
+
+                for row in page.drift:
+                    delta = row.expected - row.stored
+                    if drifted < show:
+                        self.stdout.write(f"user={row.user_id} stored={row.stored} expected={row.expected} delta={delta:+d}")
+                    if writer is not None:
+                        writer.writerow([row.user_id, row.stored, row.expected, delta])
+                    drifted += 1
+                    delta_total += abs(delta)
+
+        if drifted > show:
+            self.stdout.write(f"... ещё {drifted - show}")
+        style = self.style.WARNING if drifted and not fix else self.style.SUCCESS
+        self.stdout.write(
+            style(
+                f"scanned={scanned} drifted={drifted} abs_delta={delta_total} "
+                f"{'fixed' if fix else 'fix=off'} elapsed={time.perf_counter() - started:.2f}s"
+            )
+        )
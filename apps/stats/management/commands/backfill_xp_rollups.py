@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from apps.stats.services import rebuild_streaks, rebuild_xp_rollups
+
+
+class Command(BaseCommand):
+    help = "Пересобирает дневные агрегаты XP (XPDailyRollup) из истории XPEvent и стрики на UserStats."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", nargs="+", type=int, help="ID пользователей (по умолчанию все)")
+
+    def handle(self, *args, **options):
+        rows = rebuild_xp_rollups(user_ids=options["users"])
+        streaks = rebuild_streaks(user_ids=options["users"])
+        self.stdout.write(self.style.SUCCESS(f"Записано агрегатов: {rows}, пересчитано стриков: {streaks}"))
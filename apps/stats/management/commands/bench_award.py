@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+
+from apps.stats.models import XPEvent
+from apps.stats.services import award_xp_event
+
+
+class Command(BaseCommand):
+    help = (
+        "Пропускная способность award_xp_event под конкуренцией: N потоков, у каждого свой "
+        "пользователь или (--same-user) один общий — проверка блокировок строки UserStats."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--awards", type=int, default=200, help="Начислений на поток")
+        parser.add_argument("--same-user", action="store_true", help="Все потоки начисляют одному пользователю")
+
+    def handle(self, *args, **options):
+        threads_n = int(options["threads"])
+        awards = int(options["awards"])
+        stamp = int(time.time())
+
+        User = get_user_model()
+        users = [
+            User.objects.create(username=f"bench_award_{stamp}_{i}", email=f"bench_award_{stamp}_{i}@example.com")
+            for i in range(1 if options["same_user"] else threads_n)
+        ]
+        errors: list[str] = []
+        latencies: list[float] = []
+        lock = threading.Lock()
+
+        def worker(index: int) -> None:
+            user = users[index % len(users)]
+            local: list[float] = []
+            try:
+                for _ in range(awards):
+                    started = time.perf_counter()
+                    try:
+                        award_xp_event(user=user, kind=XPEvent.Kind.WORKOUT, amount=10)
+                    except OperationalError as e:
+                        # SQLite: "database is locked" при параллельных писателях.
+                        with lock:
+                            errors.append(str(e))
+                        continue
+                    local.append((time.perf_counter() - started) * 1000)
+            finally:
+                connection.close()
+                with lock:
+                    latencies.extend(local)
+
+        try:
+            workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads_n)]
+            started = time.perf_counter()
+            for t in workers:
+                t.start()
+            for t in workers:
+                t.join()
+            elapsed = time.perf_counter() - started
+
+            latencies.sort()
+            p50 = latencies[len(latencies) // 2] if latencies else 0.0
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0
+            self.stdout.write(
+                f"db={connection.vendor} threads={threads_n} users={len(users)} "
+                f"ok={len(latencies)} errors={len(errors)} "
+                f"throughput={len(latencies) / elapsed:.1f}/s p50={p50:.2f}ms p95={p95:.2f}ms"
+            )
+            if errors:
+                self.stdout.write(f"first error: {errors[0]}")
+        finally:
+            for user in users:
+                user.delete()
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from apps.stats.levels import get_level_curve
+
+
+def _level_by_loop(curve, xp: int) -> int:
+    # Старый алгоритм из add_xp: шагаем по уровням, пока хватает XP.
+    level = 1
+    while xp >= curve.xp_for_level(level + 1):
+        level += 1
+    return level
+
+
+class Command(BaseCommand):
+    help = "Микро-бенчмарк: уровень по XP через цикл vs закрытую формулу активной кривой."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Повторов на каждое значение XP")
+        parser.add_argument("--max-power", type=int, default=9, help="Максимальная степень 10 для XP")
+
+    def handle(self, *args, **options):
+        curve = get_level_curve()
+        repeat = max(1, int(options["repeat"]))
+
+        self.stdout.write(f"curve={curve.code}")
+        self.stdout.write(f"{'xp':>14} {'level':>8} {'loop, us':>12} {'closed, us':>12} {'speedup':>10}")
+        for power in range(1, int(options["max_power"]) + 1):
+            xp = 10**power
+            level = curve.level_for_xp(xp)
+            if level != _level_by_loop(curve, xp):
+                raise AssertionError(f"Несовпадение уровня для xp={xp}")
+
+            loop = min(timeit.repeat(lambda: _level_by_loop(curve, xp), number=1, repeat=repeat))
+            closed = min(timeit.repeat(lambda: curve.level_for_xp(xp), number=100, repeat=repeat)) / 100
+            self.stdout.write(
+                f"{xp:>14} {level:>8} {loop * 1e6:>12.2f} {closed * 1e6:>12.3f} {loop / closed if closed else 0:>9.0f}x"
+            )
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection, transaction
+
+from apps.raids.services import ensure_active_boss, get_active_boss_readonly
+from apps.stats.models import XPEvent
+from apps.stats.services import award_xp_event, ensure_user_stats, get_user_stats_readonly
+
+
+def _legacy_read(user) -> None:
+    # Как раньше делали HeroAPIView.get / BossAPIView.get: select_for_update в транзакции.
+    with transaction.atomic():
+        ensure_user_stats(user)
+    ensure_active_boss(user=user)
+
+
+def _readonly_read(user) -> None:
+    get_user_stats_readonly(user)
+    get_active_boss_readonly(user=user)
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Контеншен чтения: GET-пути (статы + босс) на фоне длинной транзакции начисления XP. "
+        "Сравнивает прежние select_for_update-чтения и read-only аксессоры."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hold", type=float, default=1.0, help="Сколько секунд держать транзакцию начисления")
+        parser.add_argument("--readers", type=int, default=4, help="Параллельных читателей")
+        parser.add_argument("--reads", type=int, default=20, help="Чтений на читателя")
+
+    def _run(self, label: str, user, read, *, hold: float, readers: int, reads: int) -> None:
+        award_started = threading.Event()
+        samples: list[float] = []
+        lock = threading.Lock()
+
+        def writer() -> None:
+            try:
+                with transaction.atomic():
+                    award_xp_event(user=user, kind=XPEvent.Kind.WORKOUT, amount=1)
+                    award_started.set()
+                    time.sleep(hold)
+            finally:
+                award_started.set()
+                connection.close()
+
+        def reader() -> None:
+            award_started.wait()
+            try:
+                for _ in range(reads):
+                    started = time.perf_counter()
+                    read(user)
+                    with lock:
+                        samples.append((time.perf_counter() - started) * 1000)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.stdout.write(
+            f"{label:<10} reads={len(samples):<4} "
+            f"p50={_percentile(samples, 0.5):9.2f}ms p95={_percentile(samples, 0.95):9.2f}ms "
+            f"max={max(samples):9.2f}ms (hold={hold:.1f}s)"
+        )
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.create(username=f"bench_reads_{int(time.time())}")
+        try:
+            ensure_active_boss(user=user)
+            self.stdout.write(f"db={connection.vendor}")
+            for label, read in (("legacy", _legacy_read), ("readonly", _readonly_read)):
+                self._run(
+                    label,
+                    user,
+                    read,
+                    hold=float(options["hold"]),
+                    readers=int(options["readers"]),
+                    reads=int(options["reads"]),
+                )
+        finally:
+            close_old_connections()
+            user.delete()
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import importlib
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.projects.models import Project, Task
+from apps.stats.models import XPEvent
+
+SERVICE_MODULES = (
+    "apps.stats.services",
+    "apps.workouts.services",
+    "apps.projects.services",
+    "apps.raids.services",
+)
+
+# До плоских границ каждая из этих функций была @transaction.atomic: вложенный вызов — savepoint.
+LEGACY_ATOMIC = (
+    ("apps.stats.services", "ensure_user_stats"),
+    ("apps.stats.services", "add_xp"),
+    ("apps.stats.services", "award_xp_event"),
+    ("apps.stats.services", "recalculate_dev_score"),
+    ("apps.workouts.services", "create_workout"),
+    ("apps.projects.services", "complete_task"),
+    ("apps.raids.services", "ensure_active_boss"),
+)
+
+
+@contextmanager
+def legacy_savepoints():
+    # Подменяет функции в пространствах имён модулей-сервисов (в том числе импортированные
+    # `from ... import`) на версии с прежним @transaction.atomic.
+    modules = [importlib.import_module(name) for name in SERVICE_MODULES]
+    with ExitStack() as stack:
+        for module_name, name in LEGACY_ATOMIC:
+            current = getattr(importlib.import_module(module_name), name)
+            legacy = transaction.atomic(current.__wrapped__)
+            for module in modules:
+                for attr, value in list(vars(module).items()):
+                    if value is current:
+                        stack.enter_context(mock.patch.object(module, attr, legacy))
+        yield
+
+
+class _StatementCounter:
+    # connection.execute_wrapper: SAVEPOINT / RELEASE SAVEPOINT отдельно от остальных запросов.
+    def __init__(self):
+        self.statements = 0
+        self.savepoints = 0
+        self.releases = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        head = sql.lstrip()[:9].upper()
+        if head == "SAVEPOINT":
+            self.savepoints += 1
+        elif head == "RELEASE S":
+            self.releases += 1
+        self.statements += 1
+        return execute(sql, params, many, context)
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Цена вложенных транзакций в цепочке начисления: прежние @transaction.atomic на каждом уровне "
+        "(savepoint на вызов) против одной границы @use_case. Считает SAVEPOINT/RELEASE и SQL "
+        "на вызов, p50/p95 для award_xp_event, create_workout и complete_task."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--calls", type=int, default=300, help="Вызовов на сценарий и режим")
+        parser.add_argument("--warmup", type=int, default=20)
+
+    def _scenarios(self, user, project) -> dict:
+        # Функции берутся из модулей в момент вызова: в режиме legacy они подменены.
+        stats = importlib.import_module("apps.stats.services")
+        workouts = importlib.import_module("apps.workouts.services")
+        projects = importlib.import_module("apps.projects.services")
+
+        def award():
+            return lambda: stats.award_xp_event(user=user, kind=XPEvent.Kind.WORKOUT, amount=10)
+
+        def workout():
+            data = {"type": "run", "duration": 30, "intensity": 3}
+            return lambda: workouts.create_workout(user=user, validated_data=data)
+
+        def task():
+            # Задача создаётся вне замера: меряется только закрытие.
+            created = Task.objects.create(project=project, title="bench", difficulty=2)
+            return lambda: projects.complete_task(task=created)
+
+        return {"award": award, "workout": workout, "task": task}
+
+    def _measure(self, prepare, *, calls: int, warmup: int) -> tuple[_StatementCounter, list[float]]:
+        counter = _StatementCounter()
+        samples: list[float] = []
+        for i in range(warmup + calls):
+            call = prepare()
+            if i < warmup:
+                call()
+                continue
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                call()
+                samples.append((time.perf_counter() - started) * 1000)
+        return counter, samples
+
+    def handle(self, *args, **options):
+        calls = max(1, int(options["calls"]))
+        warmup = max(0, int(options["warmup"]))
+        stamp = int(time.time())
+        User = get_user_model()
+        users = []
+        try:
+            for mode in ("legacy", "flat"):
+                user = User.objects.create(username=f"bench_tx_{stamp}_{mode}", email=f"bench_tx_{stamp}_{mode}@example.com")
+                users.append(user)
+                project = Project.objects.create(user=user, name="bench")
+
+                with legacy_savepoints() if mode == "legacy" else nullcontext():
+                    for name, prepare in self._scenarios(user, project).items():
+                        counter, samples = self._measure(prepare, calls=calls, warmup=warmup)
+                        self.stdout.write(
+                            f"{name:<8} {mode:<6} db={connection.vendor} calls={calls} "
+                            f"sql={counter.statements / calls:5.1f} savepoints={counter.savepoints / calls:4.1f} "
+                            f"releases={counter.releases / calls:4.1f} "
+                            f"p50={_percentile(samples, 0.5):7.3f}ms p95={_percentile(samples, 0.95):7.3f}ms"
+                        )
+        finally:
+            for user in users:
+                user.delete()
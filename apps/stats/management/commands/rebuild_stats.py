@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from apps.stats.services import rebuild_user_stats
+
+
+def _init_worker() -> None:
+    # spawn (macOS/Windows): процесс стартует без Django; fork: setup() — no-op.
+    import django
+
+    django.setup()
+
+
+def _rebuild_batch(user_ids: list[int], chunk_size: int) -> tuple[int, int, int, int, float]:
+    started = time.perf_counter()
+    try:
+        result = rebuild_user_stats(user_ids=user_ids, chunk_size=chunk_size)
+    finally:
+        connections.close_all()
+    return result.users, result.events, result.changed, result.overallocated, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобирает UserStats (xp, level, stat_points, dev_score, rank) из журнала XPEvent. "
+        "Пользователи делятся на пачки и раздаются пулу процессов; события каждого читаются "
+        "потоком и сворачиваются по кривой уровней add_xp. Выводит скорость в событиях/с."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", nargs="+", type=int, help="ID пользователей (по умолчанию все)")
+        parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="Процессов в пуле")
+        parser.add_argument("--batch", type=int, default=200, help="Пользователей на задачу (одна транзакция)")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Строк на fetch при чтении событий")
+
+    def handle(self, *args, **options):
+        user_ids = options["users"] or list(get_user_model().objects.order_by("pk").values_list("pk", flat=True))
+        batch = max(1, int(options["batch"]))
+        chunk_size = max(1, int(options["chunk_size"]))
+        workers = max(1, int(options["workers"]))
+        if workers > 1 and connection.vendor == "sqlite":
+            # Несколько процессов-писателей на SQLite упираются в "database is locked".
+            self.stdout.write("db=sqlite: один писатель, --workers 1")
+            workers = 1
+
+        batches = [user_ids[i : i + batch] for i in range(0, len(user_ids), batch)]
+        totals = {"users": 0, "events": 0, "changed": 0, "overallocated": 0}
+        started = time.perf_counter()
+
+        def collect(users: int, events: int, changed: int, overallocated: int, seconds: float) -> None:
+            totals["users"] += users
+            totals["events"] += events
+            totals["changed"] += changed
+            totals["overallocated"] += overallocated
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"users={totals['users']}/{len(user_ids)} events={totals['events']} "
+                f"batch={seconds:.2f}s rate={totals['events'] / elapsed if elapsed else 0:.0f} events/s"
+            )
+
+        if workers == 1:
+            for ids in batches:
+                collect(*_rebuild_batch(ids, chunk_size))
+        else:
+            # Соединения родителя не должны достаться дочерним процессам (fork).
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                futures = [pool.submit(_rebuild_batch, ids, chunk_size) for ids in batches]
+                for future in as_completed(futures):
+                    collect(*future.result())
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"db={connection.vendor} workers={workers} users={totals['users']} events={totals['events']} "
+                f"changed={totals['changed']} overallocated={totals['overallocated']} "
+                f"elapsed={elapsed:.2f}s rate={totals['events'] / elapsed if elapsed else 0:.0f} events/s"
+            )
+        )
+        if totals["overallocated"]:
+            self.stdout.write(
+                "overallocated: распределённых очков больше, чем дают пересчитанные уровни; stat_points = 0"
+            )
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from apps.stats.services import reconcile_dev_counters
+
+
+class Command(BaseCommand):
+    help = "Пересобирает счётчики dev_score (навыки/задачи/проекты) с нуля и показывает расхождения."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", nargs="+", type=int, help="ID пользователей (по умолчанию все)")
+        parser.add_argument("--dry-run", action="store_true", help="Только показать расхождения, ничего не записывать")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by("pk")
+        if options["users"]:
+            users = users.filter(pk__in=options["users"])
+
+        fix = not options["dry_run"]
+        checked = drifted = 0
+        for user in users.iterator():
+            checked += 1
+            drift = reconcile_dev_counters(user=user, fix=fix)
+            if not drift:
+                continue
+            drifted += 1
+            details = ", ".join(f"{field}: {stored} -> {actual}" for field, (stored, actual) in drift.items())
+            self.stdout.write(f"user={user.pk}: {details}")
+
+        verb = "найдено" if not fix else "исправлено"
+        self.stdout.write(self.style.SUCCESS(f"Проверено пользователей: {checked}, {verb} расхождений: {drifted}"))
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection
+
+from apps.stats.outbox import drain_outbox_batch, supports_skip_locked
+
+logger = logging.getLogger("apps.stats.outbox")
+
+
+class Command(BaseCommand):
+    help = (
+        "Разбирает XPOutbox: пул потоков забирает пачки через SELECT ... FOR UPDATE SKIP LOCKED "
+        "и применяет последствия начисления (XP/ранг, стрик, роллапы, урон боссу). Без брокера: "
+        "очередь — таблица в той же БД. На SQLite (нет SKIP LOCKED) — один поток."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument("--batch", type=int, default=200, help="Строк outbox на транзакцию")
+        parser.add_argument("--poll", type=float, default=1.0, help="Пауза, когда очередь пуста (сек)")
+        parser.add_argument("--max-attempts", type=int, default=5)
+        parser.add_argument("--once", action="store_true", help="Разобрать очередь и выйти")
+
+    def handle(self, *args, **options):
+        threads_n = max(1, int(options["threads"]))
+        if threads_n > 1 and not supports_skip_locked():
+            self.stdout.write(f"db={connection.vendor}: нет SKIP LOCKED, воркер работает в один поток")
+            threads_n = 1
+        batch = max(1, int(options["batch"]))
+        poll = max(0.0, float(options["poll"]))
+        max_attempts = max(1, int(options["max_attempts"]))
+        once = bool(options["once"])
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        totals = {"batches": 0, "processed": 0, "failed": 0}
+
+        def worker() -> None:
+            try:
+                while not stop.is_set():
+                    close_old_connections()
+                    try:
+                        result = drain_outbox_batch(batch_size=batch, max_attempts=max_attempts)
+                    except OperationalError as e:
+                        # SQLite "database is locked" / обрыв соединения: пачка откатилась, повторим.
+                        logger.warning("outbox batch failed: %s", e)
+                        stop.wait(poll)
+                        continue
+                    if result.claimed:
+                        with lock:
+                            totals["batches"] += 1
+                            totals["processed"] += result.processed
+                            totals["failed"] += result.failed
+                    # Цикл — по взятым строкам, а не по обработанным: пачка из одних ошибок не значит,
+                    # что очередь пуста. Упавшие строки получают attempts + 1 и после max_attempts
+                    # перестают выбираться, так что повторы ограничены.
+                    if result.claimed:
+                        continue
+                    if once:
+                        return
+                    stop.wait(poll)
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        workers = [threading.Thread(target=worker, name=f"outbox-{i}", daemon=True) for i in range(threads_n)]
+        for t in workers:
+            t.start()
+        try:
+            while any(t.is_alive() for t in workers):
+                for t in workers:
+                    t.join(timeout=0.5)
+        except KeyboardInterrupt:
+            stop.set()
+            for t in workers:
+                t.join()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"threads={threads_n} batches={totals['batches']} processed={totals['processed']} "
+                f"failed={totals['failed']} elapsed={time.perf_counter() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,70 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:00
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def fill_dev_counters(apps, schema_editor):
+    UserStats = apps.get_model("stats", "UserStats")
+    Skill = apps.get_model("skills", "Skill")
+    Task = apps.get_model("projects", "Task")
+    Project = apps.get_model("projects", "Project")
+
+    for stats in UserStats.objects.all().iterator():
+        skills = Skill.objects.filter(user_id=stats.user_id).aggregate(
+            level_sum=Sum("level"),
+            count=Count("id"),
+            mastered=Count("id", filter=Q(status="mastered")),
+        )
+        stats.skill_level_sum = int(skills["level_sum"] or 0)
+        stats.skill_count = int(skills["count"] or 0)
+        stats.skills_mastered_count = int(skills["mastered"] or 0)
+        stats.tasks_done_count = Task.objects.filter(project__user_id=stats.user_id, status="done").count()
+        stats.commercial_projects_count = Project.objects.filter(user_id=stats.user_id, is_commercial=True).count()
+        stats.save(
+            update_fields=[
+                "skill_level_sum",
+                "skill_count",
+                "skills_mastered_count",
+                "tasks_done_count",
+                "commercial_projects_count",
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0004_alter_xpevent_kind'),
+        ('skills', '0004_seed_backend_skill_tree'),
+        ('projects', '0002_project_description_project_role_project_stack_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='commercial_projects_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='skill_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='skill_level_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='skills_mastered_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='tasks_done_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_dev_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_xp_rollups(apps, schema_editor):
+    XPEvent = apps.get_model("stats", "XPEvent")
+    XPDailyRollup = apps.get_model("stats", "XPDailyRollup")
+
+    rows = (
+        XPEvent.objects.annotate(day=TruncDate("created_at"))
+        .values("user_id", "day", "kind")
+        .annotate(xp=Sum("amount"), events=Count("id"))
+        .order_by()
+    )
+    XPDailyRollup.objects.bulk_create(
+        (
+            XPDailyRollup(user_id=r["user_id"], day=r["day"], kind=r["kind"], xp=r["xp"] or 0, events=r["events"])
+            for r in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0005_userstats_dev_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='XPDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('kind', models.CharField(choices=[('workout', 'Тренировка'), ('task_complete', 'Завершение задачи'), ('skill_level_up', 'Повышение уровня навыка'), ('skill_mastered', 'Навык освоен'), ('learning_log', 'Запись обучения'), ('focus_session', 'Сессия фокуса'), ('boss_defeat', 'Победа над боссом'), ('github_commit', 'GitHub commit'), ('github_pr', 'GitHub PR')], max_length=32)),
+                ('xp', models.IntegerField(default=0)),
+                ('events', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='xp_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'XP за день',
+                'verbose_name_plural': 'XP по дням',
+                'constraints': [models.UniqueConstraint(fields=('user', 'day', 'kind'), name='uniq_xp_rollup_user_day_kind')],
+            },
+        ),
+        migrations.RunPython(backfill_xp_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:00
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def fill_streaks(apps, schema_editor):
+    UserStats = apps.get_model("stats", "UserStats")
+    XPDailyRollup = apps.get_model("stats", "XPDailyRollup")
+
+    for stats in UserStats.objects.all().iterator():
+        days = (
+            XPDailyRollup.objects.filter(user_id=stats.user_id, xp__gt=0)
+            .values_list("day", flat=True)
+            .distinct()
+            .order_by("day")
+        )
+        current = best = 0
+        last = None
+        for day in days:
+            current = current + 1 if last is not None and day - last == timedelta(days=1) else 1
+            best = max(best, current)
+            last = day
+        stats.streak_current = current
+        stats.streak_best = best
+        stats.last_active_day = last
+        stats.save(update_fields=["streak_current", "streak_best", "last_active_day"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0006_xpdailyrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='last_active_day',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='streak_best',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='streak_current',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_streaks, migrations.RunPython.noop),
+    ]
@@ -30,6 +30,19 @@ class UserStats(models.Model):
 	dev_score = models.PositiveIntegerField(default=0)
 	rank = models.CharField(max_length=1, choices=Rank.choices, default=Rank.E)
 
+	# Счётчики для dev_score: обновляются дельтами из сервисов навыков/задач/проектов,
+	# чтобы пересчёт не делал агрегаты по всем таблицам. Сверка: `manage.py reconcile_dev_score`.
+	skill_level_sum = models.PositiveIntegerField(default=0)
+	skill_count = models.PositiveIntegerField(default=0)
+	tasks_done_count = models.PositiveIntegerField(default=0)
+	skills_mastered_count = models.PositiveIntegerField(default=0)
+	commercial_projects_count = models.PositiveIntegerField(default=0)
+
+	# Стрики активности (дни с XP > 0), обновляются инкрементально при начислении.
+	streak_current = models.PositiveIntegerField(default=0)
+	streak_best = models.PositiveIntegerField(default=0)
+	last_active_day = models.DateField(null=True, blank=True)
+
 	created_at = models.DateTimeField(auto_now_add=True)
 	updated_at = models.DateTimeField(auto_now=True)
 
@@ -88,3 +101,48 @@ class XPEvent(models.Model):
 
 	def __str__(self) -> str:  # pragma: no cover
 		return f"XPEvent(user={self.user_id}, kind={self.kind}, amount={self.amount})"
+
+
+class XPDailyRollup(models.Model):
+	"""Сумма XP по (пользователь, день, kind) — материализованная аналитика.
+
+	Обновляется в той же транзакции, что и XPEvent; пересборка из истории:
+	`manage.py backfill_xp_rollups`.
+	"""
+
+	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="xp_rollups")
+	day = models.DateField()
+	kind = models.CharField(max_length=32, choices=XPEvent.Kind.choices)
+	xp = models.IntegerField(default=0)
+	events = models.PositiveIntegerField(default=0)
+
+	class Meta:
+		verbose_name = "XP за день"
+		verbose_name_plural = "XP по дням"
+		constraints = [
+			models.UniqueConstraint(fields=["user", "day", "kind"], name="uniq_xp_rollup_user_day_kind"),
+		]
+
+	def __str__(self) -> str:  # pragma: no cover
+		return f"XPDailyRollup(user={self.user_id}, day={self.day}, kind={self.kind}, xp={self.xp})"
+
+
+class XPOutbox(models.Model):
+	"""Отложенные последствия начисления: XP/уровень/ранг, стрик, роллапы, урон боссу.
+
+	Строка пишется в одной транзакции с XPEvent (settings.XP_OUTBOX_ENABLED);
+	разбирает `manage.py run_outbox_worker` и удаляет после применения.
+	"""
+
+	event = models.OneToOneField(XPEvent, on_delete=models.CASCADE, related_name="outbox")
+	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="xp_outbox")
+	attempts = models.PositiveIntegerField(default=0)
+	last_error = models.TextField(blank=True, default="")
+	created_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		verbose_name = "Очередь начислений"
+		verbose_name_plural = "Очередь начислений"
+
+	def __str__(self) -> str:  # pragma: no cover
+		return f"XPOutbox(event={self.event_id}, user={self.user_id}, attempts={self.attempts})"
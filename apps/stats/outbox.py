@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F
+
+from apps.core.transactions import requires_transaction, use_case
+
+from .models import XPEvent, XPOutbox
+
+
+def outbox_enabled() -> bool:
+    return bool(getattr(settings, "XP_OUTBOX_ENABLED", False))
+
+
+def supports_skip_locked() -> bool:
+    # SQLite: select_for_update игнорируется, параллельные воркеры взяли бы одни и те же строки.
+    return connection.features.has_select_for_update_skip_locked
+
+
+@requires_transaction
+def enqueue_xp_events(events: list[XPEvent]) -> None:
+    """Ставит созданные события в outbox — в транзакции, которая их записала."""
+    XPOutbox.objects.bulk_create([XPOutbox(event_id=e.pk, user_id=e.user_id) for e in events], batch_size=500)
+
+
+@dataclass(frozen=True)
+class DrainResult:
+    claimed: int
+    processed: int
+    failed: int
+
+
+@use_case
+def drain_outbox_batch(*, batch_size: int = 200, max_attempts: int = 5) -> DrainResult:
+    """Забирает до `batch_size` строк (FOR UPDATE SKIP LOCKED) и применяет последствия начисления.
+
+    Пользователи обрабатываются по одному в savepoint: ошибка одного увеличивает
+    attempts его строк и не откатывает остальных. Строки с attempts >= max_attempts
+    больше не берутся (видны в админке/БД с last_error).
+    """
+    from .services import apply_award_effects
+
+    rows = list(
+        XPOutbox.objects.select_for_update(skip_locked=True, of=("self",))
+        .filter(attempts__lt=max_attempts)
+        .select_related("event")
+        .order_by("id")[:batch_size]
+    )
+    if not rows:
+        return DrainResult(claimed=0, processed=0, failed=0)
+
+    by_user: dict[int, list[XPOutbox]] = {}
+    for row in rows:
+        by_user.setdefault(row.user_id, []).append(row)
+    users = get_user_model().objects.in_bulk(list(by_user))
+
+    done: list[int] = []
+    failed = 0
+    for user_id, user_rows in by_user.items():
+        try:
+            with transaction.atomic():
+                apply_award_effects(user=users[user_id], events=[row.event for row in user_rows])
+        except Exception as e:
+            failed += len(user_rows)
+            XPOutbox.objects.filter(pk__in=[row.pk for row in user_rows]).update(
+                attempts=F("attempts") + 1, last_error=f"{type(e).__name__}: {e}"[:2000]
+            )
+            continue
+        done.extend(row.pk for row in user_rows)
+
+    if done:
+        XPOutbox.objects.filter(pk__in=done).delete()
+    return DrainResult(claimed=len(rows), processed=len(done), failed=failed)
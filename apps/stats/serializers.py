@@ -1,17 +1,27 @@
 from __future__ import annotations
 
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
 
-from .models import UserStats
+from .levels import get_level_curve
+from .models import UserStats, XPEvent
 
 
 class HeroStatsSerializer(serializers.ModelSerializer):
+	# Границы текущего уровня по общей таблице порогов (та же, что в /api/system/).
+	level_xp_start = serializers.SerializerMethodField()
+	level_xp_end = serializers.SerializerMethodField()
+
 	class Meta:
 		model = UserStats
 		fields = (
 			"level",
 			"xp",
 			"xp_to_next_level",
+			"level_xp_start",
+			"level_xp_end",
 			"rank",
 			"dev_score",
 			"strength",
@@ -21,6 +31,12 @@ class HeroStatsSerializer(serializers.ModelSerializer):
 			"stat_points",
 		)
 
+	def get_level_xp_start(self, obj) -> int:
+		return get_level_curve().threshold(int(obj.level))
+
+	def get_level_xp_end(self, obj) -> int:
+		return get_level_curve().threshold(int(obj.level) + 1)
+
 
 class AllocateStatsSerializer(serializers.Serializer):
 	strength = serializers.IntegerField(required=False, min_value=0, max_value=999)
@@ -34,9 +50,56 @@ class AllocateStatsSerializer(serializers.Serializer):
 			raise serializers.ValidationError({"non_field_errors": ["Укажите, куда распределить очки"]})
 		return attrs
 
+class AnalyticsQuerySerializer(serializers.Serializer):
+	"""?from=YYYY-MM-DD&to=YYYY-MM-DD&granularity=day|week|month (по умолчанию последние 30 дней)."""
+
+	MAX_DAYS = 731
+
+	granularity = serializers.ChoiceField(choices=["day", "week", "month"], required=False, default="day")
+
+	def get_fields(self):
+		# `from` — ключевое слово Python, поэтому поля объявляем здесь.
+		fields = super().get_fields()
+		fields["from"] = serializers.DateField(required=False)
+		fields["to"] = serializers.DateField(required=False)
+		return fields
+
+	def validate(self, attrs):
+		date_to = attrs.get("to") or timezone.localdate()
+		date_from = attrs.get("from") or date_to - timedelta(days=29)
+		if date_from > date_to:
+			raise serializers.ValidationError({"from": ["Дата начала позже даты конца"]})
+		if (date_to - date_from).days + 1 > self.MAX_DAYS:
+			raise serializers.ValidationError({"from": [f"Окно не больше {self.MAX_DAYS} дней"]})
+		attrs["from"] = date_from
+		attrs["to"] = date_to
+		return attrs
+
+
 class AnalyticsSummarySerializer(serializers.Serializer):
-	# Последние N дней
+	# Окно [from, to] (по умолчанию последние 30 дней)
+	date_from = serializers.DateField(read_only=True)
+	date_to = serializers.DateField(read_only=True)
+	granularity = serializers.CharField(read_only=True)
+	xp_total = serializers.IntegerField(read_only=True)
 	xp_by_day = serializers.ListField(child=serializers.DictField(), read_only=True)
+	xp_by_period = serializers.ListField(child=serializers.DictField(), read_only=True)
 	xp_by_kind = serializers.ListField(child=serializers.DictField(), read_only=True)
 	streak_current = serializers.IntegerField(read_only=True)
+	streak_best = serializers.IntegerField(read_only=True)
+	streak_best_window = serializers.IntegerField(read_only=True)
+	# Устаревшее имя: то же, что streak_best_window (по умолчанию окно = 30 дней).
 	streak_best_30d = serializers.IntegerField(read_only=True)
+	last_active_day = serializers.DateField(read_only=True, allow_null=True)
+
+
+class XPEventIngestSerializer(serializers.Serializer):
+	"""Одна строка пакетной загрузки XP-событий из внешних источников."""
+
+	kind = serializers.ChoiceField(choices=[XPEvent.Kind.GITHUB_COMMIT, XPEvent.Kind.GITHUB_PR])
+	amount = serializers.IntegerField(min_value=1, max_value=1000)
+	source_type = serializers.CharField(max_length=32)
+	source_id = serializers.CharField(max_length=128)
+	source_url = serializers.URLField(required=False, allow_blank=True, default="")
+	metadata = serializers.DictField(required=False, default=dict)
+	occurred_at = serializers.DateTimeField(required=False, allow_null=True, default=None)
@@ -1,11 +1,22 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from datetime import date, timedelta
 
-from django.db import transaction
-from django.db.models import Avg
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Case, CharField, Count, ExpressionWrapper, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.lookups import Exact, GreaterThanOrEqual
+from django.db.models.sql import InsertQuery, Query, UpdateQuery
+from django.db.models.functions import Coalesce, Greatest, TruncDate
+from django.utils import timezone
 
-from .models import Rank, UserStats, XPEvent
+from apps.core.transactions import requires_transaction, use_case
+from apps.dashboard.cache import invalidate_dashboard
+
+from .levels import get_level_curve
+from .models import Rank, UserStats, XPDailyRollup, XPEvent
+from .outbox import enqueue_xp_events, outbox_enabled
 
 
 @dataclass(frozen=True)
@@ -30,17 +41,9 @@ RANK_THRESHOLDS = [
 
 
 def xp_required_to_reach_level(level: int) -> int:
-    """Total XP required to *be* at `level`.
-
-    Level 1 -> 0 XP
-    Level 2 -> 100 XP
-    Level 3 -> 100 + 200 = 300 XP
-    ...
-    """
+    """Total XP required to *be* at `level` (see `apps.stats.levels`)."""
 
-    if level <= 1:
-        return 0
-    return ((level - 1) * level // 2) * 100
+    return get_level_curve().xp_for_level(level)
 
 
 def rank_for_dev_score(dev_score: int) -> str:
@@ -50,40 +53,212 @@ def rank_for_dev_score(dev_score: int) -> str:
     return Rank.E
 
 
-@transaction.atomic
+@requires_transaction
 def ensure_user_stats(user) -> UserStats:
+    # Для записи: строка блокируется до конца транзакции вызывающего.
     stats, _ = UserStats.objects.select_for_update().get_or_create(user=user)
     return stats
 
 
-@transaction.atomic
-def add_xp(*, user, amount: int) -> UserStats:
-    if amount <= 0:
-        return ensure_user_stats(user)
+def get_user_stats_readonly(user) -> UserStats:
+    """Для чтения (GET, AI, аналитика): обычный SELECT без блокировок и транзакции.
 
-    stats = ensure_user_stats(user)
-    stats.xp += int(amount)
+    Не ждёт длинных транзакций начисления; строку создаёт только при промахе.
+    """
+    stats = UserStats.objects.filter(user=user).first()
+    return stats if stats is not None else UserStats.objects.get_or_create(user=user)[0]
 
-    # Level-up based on total XP.
-    before_level = int(stats.level)
-    while stats.xp >= xp_required_to_reach_level(stats.level + 1):
-        stats.level += 1
 
-    levels_gained = int(stats.level) - before_level
-    if levels_gained > 0:
-        # Базовое правило: 5 очков характеристик за уровень.
-        stats.stat_points += levels_gained * 5
+def _supports_update_returning(conn) -> bool:
+    # PostgreSQL и SQLite >= 3.35 умеют UPDATE ... RETURNING; MySQL/MariaDB — нет.
+    return conn.vendor != "mysql" and conn.features.can_return_columns_from_insert
 
-    stats.xp_to_next_level = stats.level * 100
 
-    breakdown = recalculate_dev_score(user=user, stats=stats, save=False)
-    stats.dev_score = breakdown.dev_score
-    stats.rank = breakdown.rank
-    stats.save(update_fields=["xp", "level", "xp_to_next_level", "stat_points", "dev_score", "rank", "updated_at"])
+def update_stats_returning(*, user_id: int, values: dict, **conditions) -> UserStats | None:
+    """Один `UPDATE ... SET <values> WHERE user_id = ? [AND conditions] RETURNING *`.
+
+    values — выражения ORM (F, Case, ...), вычисляемые в SQL над текущей строкой.
+    Возвращает обновлённую строку как UserStats или None, если строка не подошла.
+    Где RETURNING недоступен — UPDATE и отдельный SELECT.
+    """
+    queryset = UserStats.objects.filter(user_id=user_id, **conditions)
+    conn = connections[queryset.db]
+    values = {**values, "updated_at": timezone.now()}
+
+    if not _supports_update_returning(conn):
+        if not queryset.update(**values):
+            return None
+        return UserStats.objects.get(user_id=user_id)
+
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(values)
+    sql, params = query.get_compiler(using=queryset.db).as_sql()
+
+    fields = UserStats._meta.concrete_fields
+    columns = ", ".join(conn.ops.quote_name(f.column) for f in fields)
+    with conn.cursor() as cursor:
+        cursor.execute(f"{sql} RETURNING {columns}", params)
+        row = cursor.fetchone()
+    if row is None:
+        return None
+
+    # Те же конвертеры, что применяет ORM при обычном SELECT (даты в SQLite и т.п.).
+    converted = []
+    for field, value in zip(fields, row):
+        col = field.get_col(UserStats._meta.db_table)
+        for converter in conn.ops.get_db_converters(col) + field.get_db_converters(conn):
+            value = converter(value, col, conn)
+        converted.append(value)
+    return UserStats.from_db(queryset.db, [f.attname for f in fields], converted)
+
+
+XP_EVENT_SOURCE_CONSTRAINT = "uniq_xp_event_source_per_user"
+
+
+def _supports_insert_on_conflict(conn) -> bool:
+    # ON CONFLICT (cols) WHERE ... DO NOTHING RETURNING: PostgreSQL и SQLite >= 3.35.
+    return conn.features.supports_update_conflicts_with_target and conn.features.can_return_rows_from_bulk_insert
+
+
+def _source_conflict_clause(conn) -> str:
+    # Цель конфликта — частичный уникальный индекс: столбцы и предикат берём из самого
+    # UniqueConstraint. Значения предиката подставляются литералами, как в DDL индекса:
+    # с параметром PostgreSQL не докажет, что WHERE покрывает предикат индекса.
+    constraint = next(c for c in XPEvent._meta.constraints if c.name == XP_EVENT_SOURCE_CONSTRAINT)
+    query = Query(XPEvent, alias_cols=False)
+    predicate, params = query.build_where(constraint.condition).as_sql(query.get_compiler(connection=conn), conn)
+    schema_editor = conn.SchemaEditorClass(conn)
+    predicate = (predicate % tuple(schema_editor.quote_value(p) for p in params)).replace("%", "%%")
+    columns = ", ".join(conn.ops.quote_name(XPEvent._meta.get_field(name).column) for name in constraint.fields)
+    return f"ON CONFLICT ({columns}) WHERE {predicate} DO NOTHING"
+
+
+def insert_xp_events_once(events: list[XPEvent]) -> list[XPEvent]:
+    """`INSERT ... ON CONFLICT (user, source_type, source_id) WHERE ... DO NOTHING RETURNING id`.
+
+    Для событий с непустыми source_type/source_id. Возвращает реально вставленные
+    (с проставленным id); дубликаты, в том числе от параллельной транзакции, молча
+    пропускаются — без IntegrityError и savepoint'а, внешняя транзакция не ломается.
+    Где ON CONFLICT ... RETURNING недоступен — INSERT в savepoint на каждое событие.
+    """
+    if not events:
+        return []
+    using = router.db_for_write(XPEvent)
+    conn = connections[using]
+
+    if not _supports_insert_on_conflict(conn):
+        inserted = []
+        for event in events:
+            try:
+                with transaction.atomic(using=using):
+                    event.save(force_insert=True, using=using)
+            except IntegrityError:
+                continue
+            inserted.append(event)
+        return inserted
+
+    fields = [f for f in XPEvent._meta.concrete_fields if not f.primary_key]
+    conflict_sql = _source_conflict_clause(conn)
+    returning = ", ".join(
+        conn.ops.quote_name(XPEvent._meta.get_field(name).column) for name in ("id", "user", "source_type", "source_id")
+    )
+    batch_size = max(1, min(500, conn.ops.bulk_batch_size(fields, events)))
+
+    inserted = []
+    for start in range(0, len(events), batch_size):
+        batch = events[start : start + batch_size]
+        query = InsertQuery(XPEvent)
+        query.insert_values(fields, batch)
+        # Компилятор ORM: pre_save (created_at) и подготовка значений (JSON) — как у bulk_create.
+        ((sql, params),) = query.get_compiler(using=using).as_sql()
+        with conn.cursor() as cursor:
+            cursor.execute(f"{sql} {conflict_sql} RETURNING {returning}", params)
+            rows = cursor.fetchall()
+
+        # Порядок строк RETURNING не гарантирован — сопоставляем по ключу источника.
+        by_key = {(event.user_id, event.source_type, event.source_id): event for event in batch}
+        for pk, user_id, source_type, source_id in rows:
+            event = by_key[(user_id, source_type, source_id)]
+            event.pk = pk
+            event._state.adding = False
+            event._state.db = using
+            inserted.append(event)
+    return inserted
+
+
+def dev_score_expression(xp, counters: dict | None = None):
+    """SQL-версия `dev_score_breakdown` (для UPDATE без чтения строки в Python).
+
+    `counters` подменяет F(field) счётчиков: в одном UPDATE правые части видят
+    значения до записи, поэтому новые счётчики передаются как F(field) + delta.
+    """
+    c = {field: F(field) for field in DEV_COUNTER_FIELDS} | (counters or {})
+    avg_skill_level = Case(
+        When(Exact(c["skill_count"], 0), then=Value(0)),
+        default=c["skill_level_sum"] / c["skill_count"],
+        output_field=IntegerField(),
+    )
+    return ExpressionWrapper(
+        xp
+        + avg_skill_level * 5
+        + c["tasks_done_count"] * 20
+        + c["skills_mastered_count"] * 100
+        + c["commercial_projects_count"] * 300,
+        output_field=IntegerField(),
+    )
+
+
+def rank_expression(dev_score):
+    return Case(
+        *[When(GreaterThanOrEqual(dev_score, threshold), then=Value(rank)) for rank, threshold in RANK_THRESHOLDS],
+        default=Value(Rank.E),
+        output_field=CharField(),
+    )
+
+
+@use_case
+def add_xp(*, user, amount: int) -> UserStats:
+    """Атомарное начисление: xp, dev_score и rank — одним UPDATE ... RETURNING.
+
+    Строка не читается заранее под select_for_update; уровень считается по
+    вернувшемуся xp, и только при level-up идёт второй, условный UPDATE.
+    """
+    if amount <= 0:
+        return get_user_stats_readonly(user)
+
+    xp = F("xp") + int(amount)
+    dev_score = dev_score_expression(xp)
+    values = {"xp": xp, "dev_score": dev_score, "rank": rank_expression(dev_score)}
+
+    stats = update_stats_returning(user_id=user.pk, values=values)
+    if stats is None:
+        ensure_user_stats(user)
+        stats = update_stats_returning(user_id=user.pk, values=values)
+
+    # Level-up based on total XP (closed form, no per-level loop).
+    curve = get_level_curve()
+    new_level = curve.level_for_xp(int(stats.xp))
+    if new_level > int(stats.level):
+        # Условие level < new_level: при гонке очки за те же уровни не начислятся дважды.
+        # Базовое правило: 5 очков характеристик за уровень.
+        stats = (
+            update_stats_returning(
+                user_id=user.pk,
+                values={
+                    "level": Value(new_level),
+                    "stat_points": F("stat_points") + (Value(new_level) - F("level")) * 5,
+                    "xp_to_next_level": Value(curve.xp_to_next_level(new_level)),
+                },
+                level__lt=new_level,
+            )
+            or stats
+        )
+
+    invalidate_dashboard(stats.user_id)
     return stats
 
 
-@transaction.atomic
+@use_case
 def award_xp_event(
     *,
     user,
@@ -100,62 +275,510 @@ def award_xp_event(
     Это основа "честной" прокачки: каждое начисление имеет причину/источник,
     может быть проверено и использовано в аналитике.
 
-    Возвращает (event|None, stats). event=None если amount<=0.
+    Возвращает (event|None, stats). event=None если amount<=0. При XP_OUTBOX_ENABLED
+    stats — ещё без этого начисления: его применит воркер outbox.
     """
     if int(amount) <= 0:
-        return None, ensure_user_stats(user)
+        return None, get_user_stats_readonly(user)
 
     metadata = metadata or {}
 
-    # Идемпотентность: если пришёл тот же внешний источник, не начисляем повторно.
-    if source_type and source_id:
-        event, created = XPEvent.objects.get_or_create(
-            user=user,
-            source_type=str(source_type),
-            source_id=str(source_id),
-            defaults={
-                "kind": kind,
-                "amount": int(amount),
-                "source_url": source_url or "",
-                "metadata": metadata,
-                "occurred_at": occurred_at,
-            },
-        )
-        if not created:
-            # Событие уже было — возвращаем текущие статы без повторного начисления.
-            return event, ensure_user_stats(user)
+    event = XPEvent(
+        user=user,
+        kind=kind,
+        amount=int(amount),
+        source_type=str(source_type or ""),
+        source_id=str(source_id or ""),
+        source_url=source_url or "",
+        metadata=metadata,
+        occurred_at=occurred_at,
+    )
+    if event.source_type and event.source_id:
+        # Идемпотентность: повтор того же внешнего источника — один INSERT без вставки
+        # (ON CONFLICT DO NOTHING) и чтение уже записанного события, без начисления.
+        if not insert_xp_events_once([event]):
+            existing = XPEvent.objects.get(user=user, source_type=event.source_type, source_id=event.source_id)
+            return existing, get_user_stats_readonly(user)
     else:
-        event = XPEvent.objects.create(
+        event.save(force_insert=True)
+
+    if outbox_enabled():
+        enqueue_xp_events([event])
+        return event, get_user_stats_readonly(user)
+    return event, apply_award_effects(user=user, events=[event])
+
+
+@requires_transaction
+def apply_award_effects(*, user, events: list[XPEvent]) -> UserStats:
+    """Последствия начисления: роллапы, стрик, урон боссу и XP/уровень/ранг.
+
+    Синхронно — в транзакции начисления; при settings.XP_OUTBOX_ENABLED — в воркере
+    outbox (`manage.py run_outbox_worker`), а запрос пишет только событие.
+    """
+    bump_xp_rollups(user=user, events=events)
+    record_activity_days(user=user, days=[timezone.localdate(event.created_at) for event in events])
+    push_boss_damage(user=user, events=events)
+    return add_xp(user=user, amount=sum(int(event.amount) for event in events))
+
+
+def push_boss_damage(*, user, events: list[XPEvent]) -> None:
+    """Если включён settings.RAIDS_AUTO_DAMAGE — урон активному боссу в этой же транзакции."""
+    if not getattr(settings, "RAIDS_AUTO_DAMAGE", False):
+        return
+    # Ленивый импорт: raids сам зависит от stats.services.
+    from apps.raids.services import apply_boss_damage
+
+    # Бонус за победу не бьёт следующего босса.
+    apply_boss_damage(user=user, events=[e for e in events if e.kind != XPEvent.Kind.BOSS_DEFEAT])
+
+
+@requires_transaction
+def bump_xp_rollups(*, user, events: list[XPEvent]) -> None:
+    """Добавляет только что созданные события в XPDailyRollup (в текущей транзакции).
+
+    Один `INSERT ... ON CONFLICT (user, day, kind) DO UPDATE SET xp = xp + excluded.xp`
+    на все (день, kind) пачки — без savepoint'а и на первом начислении дня.
+    Где ON CONFLICT недоступен — UPDATE, а если строки нет, INSERT в savepoint
+    (при гонке с параллельной вставкой повторяем UPDATE).
+    """
+    totals: dict[tuple, list[int]] = {}
+    for event in events:
+        key = (timezone.localdate(event.created_at), event.kind)
+        bucket = totals.setdefault(key, [0, 0])
+        bucket[0] += int(event.amount)
+        bucket[1] += 1
+    if not totals:
+        return
+
+    using = router.db_for_write(XPDailyRollup)
+    conn = connections[using]
+    if conn.features.supports_update_conflicts_with_target:
+        rows = [
+            XPDailyRollup(user_id=user.pk, day=day, kind=kind, xp=xp, events=count)
+            for (day, kind), (xp, count) in totals.items()
+        ]
+        fields = [f for f in XPDailyRollup._meta.concrete_fields if not f.primary_key]
+        query = InsertQuery(XPDailyRollup)
+        query.insert_values(fields, rows)
+        ((sql, params),) = query.get_compiler(using=using).as_sql()
+        qn = conn.ops.quote_name
+        table = qn(XPDailyRollup._meta.db_table)
+        target = ", ".join(qn(XPDailyRollup._meta.get_field(name).column) for name in ("user", "day", "kind"))
+        updates = ", ".join(f"{qn(name)} = {table}.{qn(name)} + EXCLUDED.{qn(name)}" for name in ("xp", "events"))
+        with conn.cursor() as cursor:
+            cursor.execute(f"{sql} ON CONFLICT ({target}) DO UPDATE SET {updates}", params)
+        return
+
+    for (day, kind), (xp, count) in totals.items():
+        qs = XPDailyRollup.objects.filter(user=user, day=day, kind=kind)
+        if qs.update(xp=F("xp") + xp, events=F("events") + count):
+            continue
+        try:
+            with transaction.atomic():
+                XPDailyRollup.objects.create(user=user, day=day, kind=kind, xp=xp, events=count)
+        except IntegrityError:
+            qs.update(xp=F("xp") + xp, events=F("events") + count)
+
+
+def record_activity_days(*, user, days: list[date]) -> None:
+    """Продлевает стрик на `UserStats` одним UPDATE на каждый новый день.
+
+    Повторное начисление в тот же день ничего не меняет (0 строк по фильтру),
+    а дни раньше last_active_day игнорируются — их учитывает только пересборка.
+    """
+    for day in sorted(set(days)):
+        next_streak = Case(
+            When(last_active_day=day - timedelta(days=1), then=F("streak_current") + 1),
+            default=Value(1),
+        )
+        UserStats.objects.filter(user=user).filter(
+            Q(last_active_day__isnull=True) | Q(last_active_day__lt=day)
+        ).update(
+            streak_current=next_streak,
+            streak_best=Greatest(F("streak_best"), next_streak),
+            last_active_day=day,
+        )
+
+
+def effective_streak(stats: UserStats, today: date | None = None) -> int:
+    # Стрик «живой», только если сегодня уже был XP.
+    today = today or timezone.localdate()
+    return int(stats.streak_current) if stats.last_active_day == today else 0
+
+
+def streaks_from_days(days: list[date]) -> tuple[int, int, date | None]:
+    """(стрик, заканчивающийся последним днём; лучший стрик; последний день) по отсортированным дням."""
+    current = best = 0
+    last = None
+    for day in days:
+        current = current + 1 if last is not None and day - last == timedelta(days=1) else 1
+        best = max(best, current)
+        last = day
+    return current, best, last
+
+
+@use_case
+def rebuild_streaks(*, user_ids: list[int] | None = None) -> int:
+    """Пересчитывает стрики на UserStats по XPDailyRollup. Возвращает число обновлённых строк."""
+    stats_qs = UserStats.objects.all()
+    if user_ids is not None:
+        stats_qs = stats_qs.filter(user_id__in=user_ids)
+
+    updated = []
+    for stats in stats_qs.iterator():
+        days = list(
+            XPDailyRollup.objects.filter(user_id=stats.user_id, xp__gt=0)
+            .values_list("day", flat=True)
+            .distinct()
+            .order_by("day")
+        )
+        stats.streak_current, stats.streak_best, stats.last_active_day = streaks_from_days(days)
+        updated.append(stats)
+
+    UserStats.objects.bulk_update(updated, ["streak_current", "streak_best", "last_active_day"], batch_size=500)
+    return len(updated)
+
+
+@use_case
+def rebuild_xp_rollups(*, user_ids: list[int] | None = None) -> int:
+    """Пересобирает XPDailyRollup из XPEvent. Возвращает число строк-агрегатов."""
+    events = XPEvent.objects.all()
+    rollups = XPDailyRollup.objects.all()
+    if user_ids is not None:
+        events = events.filter(user_id__in=user_ids)
+        rollups = rollups.filter(user_id__in=user_ids)
+
+    rollups.delete()
+    rows = (
+        events.annotate(day=TruncDate("created_at"))
+        .values("user_id", "day", "kind")
+        .annotate(xp=Sum("amount"), events=Count("id"))
+        .order_by()
+    )
+    created = XPDailyRollup.objects.bulk_create(
+        (
+            XPDailyRollup(user_id=r["user_id"], day=r["day"], kind=r["kind"], xp=r["xp"] or 0, events=r["events"])
+            for r in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+    return len(created)
+
+
+HERO_ATTRIBUTES = ("strength", "agility", "intelligence", "vitality")
+REBUILT_STATS_FIELDS = ["xp", "level", "xp_to_next_level", "stat_points", "dev_score", "rank", "updated_at"]
+
+
+def fold_xp_amounts(amounts) -> tuple[int, int]:
+    """Свёртка потока сумм XPEvent как у `add_xp` (amount <= 0 не начисляется). Возвращает (xp, events)."""
+    xp = 0
+    events = 0
+    for amount in amounts:
+        events += 1
+        if amount > 0:
+            xp += amount
+    return xp, events
+
+
+def set_xp_total(stats: UserStats, xp: int, *, curve=None) -> bool:
+    """Выставляет xp и всё, что от него зависит: level, xp_to_next_level, stat_points, dev_score, rank.
+
+    Без записи в БД. Возвращает False, если распределено больше очков, чем дают
+    уровни (тогда stat_points = 0).
+    """
+    curve = curve or get_level_curve()
+    level = curve.level_for_xp(xp)
+    allocated = sum(int(getattr(stats, field)) - 1 for field in HERO_ATTRIBUTES)
+    earned = (level - 1) * 5
+
+    stats.xp = xp
+    stats.level = level
+    stats.xp_to_next_level = curve.xp_to_next_level(level)
+    stats.stat_points = max(0, earned - allocated)
+    breakdown = dev_score_breakdown(stats)
+    stats.dev_score = breakdown.dev_score
+    stats.rank = breakdown.rank
+    return allocated <= earned
+
+
+@dataclass(frozen=True)
+class RebuildStatsResult:
+    users: int
+    events: int
+    changed: int
+    # Уже распределили больше очков, чем дают пересчитанные уровни: stat_points обнулены.
+    overallocated: int
+
+
+@use_case
+def rebuild_user_stats(*, user_ids: list[int], chunk_size: int = 5000) -> RebuildStatsResult:
+    """Пересобирает xp, level, stat_points, dev_score и rank из журнала XPEvent.
+
+    События каждого пользователя читаются потоком (`.iterator(chunk_size)`) и сворачиваются
+    по текущей кривой уровней; изменённые строки пишутся одним `bulk_update`. События,
+    ещё ждущие воркера outbox, пропускаются — их применит воркер. Счётчики dev_score
+    берутся как есть (сверка — `manage.py reconcile_dev_score`).
+    """
+    curve = get_level_curve()
+    UserStats.objects.bulk_create([UserStats(user_id=user_id) for user_id in user_ids], ignore_conflicts=True)
+
+    users = 0
+    events_total = 0
+    overallocated = 0
+    changed: list[UserStats] = []
+    for stats in UserStats.objects.filter(user_id__in=user_ids).order_by("user_id"):
+        users += 1
+        amounts = (
+            XPEvent.objects.filter(user_id=stats.user_id, outbox__isnull=True)
+            .order_by("created_at", "id")
+            .values_list("amount", flat=True)
+            .iterator(chunk_size=chunk_size)
+        )
+        xp, events = fold_xp_amounts(amounts)
+        events_total += events
+
+        before = tuple(getattr(stats, field) for field in REBUILT_STATS_FIELDS[:-1])
+        if not set_xp_total(stats, xp, curve=curve):
+            overallocated += 1
+        if tuple(getattr(stats, field) for field in REBUILT_STATS_FIELDS[:-1]) != before:
+            stats.updated_at = timezone.now()
+            changed.append(stats)
+
+    UserStats.objects.bulk_update(changed, REBUILT_STATS_FIELDS, batch_size=500)
+    for stats in changed:
+        invalidate_dashboard(stats.user_id)
+    return RebuildStatsResult(users=users, events=events_total, changed=len(changed), overallocated=overallocated)
+
+
+def expected_xp_expression():
+    """SUM(amount) событий пользователя так, как его складывает `add_xp`.
+
+    Только amount > 0; события в outbox ещё не применены и не считаются.
+    """
+    totals = (
+        XPEvent.objects.filter(user_id=OuterRef("user_id"), amount__gt=0, outbox__isnull=True)
+        .order_by()
+        .values("user_id")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    return Coalesce(Subquery(totals, output_field=IntegerField()), Value(0))
+
+
+@dataclass(frozen=True)
+class XPDrift:
+    user_id: int
+    stored: int
+    expected: int
+
+
+@dataclass(frozen=True)
+class XPAuditPage:
+    last_user_id: int | None
+    scanned: int
+    drift: list[XPDrift]
+
+
+@use_case
+def audit_xp_page(*, after_user_id: int = 0, limit: int = 1000, fix: bool = False) -> XPAuditPage:
+    """Страница аудита UserStats.xp против журнала XPEvent (keyset по user_id).
+
+    Ключи страницы — отдельный узкий запрос; расхождения — один запрос с суммой событий
+    в подзапросе и фильтром xp <> expected, так что в память попадают только строки
+    с дрейфом. При fix=True эти строки блокируются и переписываются одним `bulk_update`
+    вместе с level / stat_points / dev_score / rank: начисление, которое ждёт
+    блокировку, добавит свой XP уже поверх исправленного значения.
+    """
+    keys = list(
+        UserStats.objects.filter(user_id__gt=after_user_id)
+        .order_by("user_id")
+        .values_list("user_id", flat=True)[: max(1, int(limit))]
+    )
+    if not keys:
+        return XPAuditPage(last_user_id=None, scanned=0, drift=[])
+
+    qs = (
+        UserStats.objects.filter(user_id__gt=after_user_id, user_id__lte=keys[-1])
+        .annotate(expected_xp=expected_xp_expression())
+        .exclude(xp=F("expected_xp"))
+        .order_by("user_id")
+    )
+    if fix:
+        qs = qs.select_for_update(of=("self",))
+    rows = list(qs)
+    drift = [XPDrift(user_id=row.user_id, stored=int(row.xp), expected=int(row.expected_xp)) for row in rows]
+
+    if fix and rows:
+        curve = get_level_curve()
+        now = timezone.now()
+        for stats in rows:
+            set_xp_total(stats, int(stats.expected_xp), curve=curve)
+            stats.updated_at = now
+        UserStats.objects.bulk_update(rows, REBUILT_STATS_FIELDS, batch_size=500)
+        for stats in rows:
+            invalidate_dashboard(stats.user_id)
+
+    return XPAuditPage(last_user_id=keys[-1], scanned=len(keys), drift=drift)
+
+
+@dataclass(frozen=True)
+class BulkAwardResult:
+    # Выровнено по входному списку: (event|None, created). event=None если amount<=0.
+    results: list[tuple[XPEvent | None, bool]]
+    xp_awarded: int
+    stats: UserStats
+
+    @property
+    def created_count(self) -> int:
+        return sum(1 for _, created in self.results if created)
+
+
+@use_case
+def award_xp_events_bulk(*, user, events: list[dict]) -> BulkAwardResult:
+    """Пакетная версия `award_xp_event` для импортов и интеграций.
+
+    Идемпотентность по (source_type, source_id) — `insert_xp_events_once`: RETURNING
+    сразу говорит, какие строки вставили мы; дубликаты дочитываются одним IN-запросом.
+    Последствия (`apply_award_effects`, один `add_xp`) — на весь пакет сразу или через outbox.
+    """
+    results: list[tuple[XPEvent | None, bool]] = [(None, False)] * len(events)
+
+    pending: list[tuple[int, XPEvent]] = []
+    first_index_by_key: dict[tuple[str, str], int] = {}
+    repeated: list[tuple[int, tuple[str, str]]] = []
+
+    for index, data in enumerate(events):
+        amount = int(data.get("amount") or 0)
+        if amount <= 0:
+            continue
+
+        event = XPEvent(
             user=user,
-            kind=kind,
-            amount=int(amount),
-            source_type=str(source_type or ""),
-            source_id=str(source_id or ""),
-            source_url=source_url or "",
-            metadata=metadata,
-            occurred_at=occurred_at,
+            kind=data["kind"],
+            amount=amount,
+            source_type=str(data.get("source_type") or ""),
+            source_id=str(data.get("source_id") or ""),
+            source_url=data.get("source_url") or "",
+            metadata=data.get("metadata") or {},
+            occurred_at=data.get("occurred_at"),
         )
+        if event.source_type and event.source_id:
+            key = (event.source_type, event.source_id)
+            if key in first_index_by_key:
+                # Повтор внутри самого пакета.
+                repeated.append((index, key))
+                continue
+            first_index_by_key[key] = index
+        pending.append((index, event))
+
+    sourced: list[tuple[int, XPEvent]] = []
+    plain: list[tuple[int, XPEvent]] = []
+    for index, event in pending:
+        if event.source_type and event.source_id:
+            sourced.append((index, event))
+        else:
+            plain.append((index, event))
+
+    if plain:
+        XPEvent.objects.bulk_create([event for _, event in plain], batch_size=500)
+        for index, event in plain:
+            results[index] = (event, True)
+
+    if sourced:
+        inserted = {id(event) for event in insert_xp_events_once([event for _, event in sourced])}
+        conflicted = [(index, event) for index, event in sourced if id(event) not in inserted]
+        for index, event in sourced:
+            if id(event) in inserted:
+                results[index] = (event, True)
+
+        if conflicted:
+            # Уже были (ретрай, параллельная вставка): одно чтение только по дубликатам.
+            stored = {
+                (event.source_type, event.source_id): event
+                for event in XPEvent.objects.filter(
+                    user=user,
+                    source_id__in={event.source_id for _, event in conflicted},
+                )
+            }
+            for index, event in conflicted:
+                results[index] = (stored.get((event.source_type, event.source_id)), False)
+
+    for index, key in repeated:
+        event, _ = results[first_index_by_key[key]]
+        results[index] = (event, False)
+
+    created_events = [event for event, created in results if created]
+    xp_awarded = sum(int(event.amount) for event in created_events)
+    if not created_events:
+        stats = get_user_stats_readonly(user)
+    elif outbox_enabled():
+        enqueue_xp_events(created_events)
+        stats = get_user_stats_readonly(user)
+    else:
+        stats = apply_award_effects(user=user, events=created_events)
+    return BulkAwardResult(results=results, xp_awarded=xp_awarded, stats=stats)
 
-    stats = add_xp(user=user, amount=int(amount))
-    return event, stats
 
+DEV_COUNTER_FIELDS = (
+    "skill_level_sum",
+    "skill_count",
+    "tasks_done_count",
+    "skills_mastered_count",
+    "commercial_projects_count",
+)
 
-@transaction.atomic
-def recalculate_dev_score(*, user, stats: UserStats | None = None, save: bool = True) -> DevScoreBreakdown:
+
+@requires_transaction
+def bump_dev_counters(*, user, **deltas: int) -> None:
+    """Применяет дельты к счётчикам dev_score одним UPDATE через F().
+
+    Вызывается из сервисов навыков/задач/проектов в их транзакции, поэтому
+    `recalculate_dev_score` больше не агрегирует Skill/Task/Project. dev_score и
+    rank пересчитываются в том же UPDATE, не дожидаясь следующего начисления XP.
+    """
+    unknown = set(deltas) - set(DEV_COUNTER_FIELDS)
+    if unknown:
+        raise ValueError(f"Неизвестные счётчики: {', '.join(sorted(unknown))}")
+
+    updates = {field: F(field) + int(delta) for field, delta in deltas.items() if int(delta)}
+    if not updates:
+        return
+    dev_score = dev_score_expression(F("xp"), updates)
+    updates |= {"dev_score": dev_score, "rank": rank_expression(dev_score)}
+
+    if not UserStats.objects.filter(user=user).update(**updates):
+        ensure_user_stats(user)
+        UserStats.objects.filter(user=user).update(**updates)
+    invalidate_dashboard(user.pk)
+
+
+def count_dev_counters(*, user) -> dict[str, int]:
+    """Считает счётчики dev_score с нуля по исходным таблицам (для сверки)."""
     from apps.projects.models import Project, Task
     from apps.skills.models import Skill
 
-    stats = stats or ensure_user_stats(user)
-
-    avg_skill_level = (
-        Skill.objects.filter(user=user).aggregate(v=Avg("level")).get("v")
-        or 0
+    skills = Skill.objects.filter(user=user).aggregate(
+        level_sum=Sum("level"),
+        count=Count("id"),
+        mastered=Count("id", filter=Q(status=Skill.Status.MASTERED)),
     )
-    avg_skill_level = int(avg_skill_level)
+    return {
+        "skill_level_sum": int(skills["level_sum"] or 0),
+        "skill_count": int(skills["count"] or 0),
+        "tasks_done_count": Task.objects.filter(project__user=user, status=Task.Status.DONE).count(),
+        "skills_mastered_count": int(skills["mastered"] or 0),
+        "commercial_projects_count": Project.objects.filter(user=user, is_commercial=True).count(),
+    }
+
+
+def dev_score_breakdown(stats: UserStats) -> DevScoreBreakdown:
+    """dev_score из счётчиков на `UserStats` — без запросов к БД."""
+    skill_count = int(stats.skill_count)
+    avg_skill_level = int(stats.skill_level_sum) // skill_count if skill_count > 0 else 0
 
-    completed_tasks = Task.objects.filter(project__user=user, status=Task.Status.DONE).count()
-    mastered_skills = Skill.objects.filter(user=user, status=Skill.Status.MASTERED).count()
-    commercial_projects = Project.objects.filter(user=user, is_commercial=True).count()
+    completed_tasks = int(stats.tasks_done_count)
+    mastered_skills = int(stats.skills_mastered_count)
+    commercial_projects = int(stats.commercial_projects_count)
 
     dev_score = (
         int(stats.xp)
@@ -165,15 +788,6 @@ def recalculate_dev_score(*, user, stats: UserStats | None = None, save: bool =
         + commercial_projects * 300
     )
 
-    rank = rank_for_dev_score(dev_score)
-
-    if save:
-        stats.dev_score = dev_score
-        stats.rank = rank
-        stats.level = max(stats.level, 1)
-        stats.xp_to_next_level = stats.level * 100
-        stats.save(update_fields=["dev_score", "rank", "level", "xp_to_next_level", "updated_at"])
-
     return DevScoreBreakdown(
         total_xp=int(stats.xp),
         avg_skill_level=avg_skill_level,
@@ -181,44 +795,68 @@ def recalculate_dev_score(*, user, stats: UserStats | None = None, save: bool =
         mastered_skills=mastered_skills,
         commercial_projects=commercial_projects,
         dev_score=dev_score,
-        rank=rank,
+        rank=rank_for_dev_score(dev_score),
     )
 
 
-@transaction.atomic
-def allocate_stat_points(*, user, delta: dict[str, int]) -> UserStats:
+@requires_transaction
+def recalculate_dev_score(*, user, stats: UserStats | None = None, save: bool = True) -> DevScoreBreakdown:
+    stats = stats or ensure_user_stats(user)
+    breakdown = dev_score_breakdown(stats)
+
+    if save:
+        stats.dev_score = breakdown.dev_score
+        stats.rank = breakdown.rank
+        stats.level = max(stats.level, 1)
+        stats.xp_to_next_level = get_level_curve().xp_to_next_level(stats.level)
+        stats.save(update_fields=["dev_score", "rank", "level", "xp_to_next_level", "updated_at"])
+        invalidate_dashboard(stats.user_id)
+
+    return breakdown
+
+
+@use_case
+def reconcile_dev_counters(*, user, fix: bool = True) -> dict[str, tuple[int, int]]:
+    """Пересобирает счётчики dev_score с нуля.
+
+    Возвращает расхождения {field: (stored, actual)}. При fix=True записывает
+    актуальные значения и пересчитывает dev_score/rank.
+    """
     stats = ensure_user_stats(user)
-    stats = UserStats.objects.select_for_update().get(pk=stats.pk)
+    actual = count_dev_counters(user=user)
+
+    drift = {
+        field: (int(getattr(stats, field)), value)
+        for field, value in actual.items()
+        if int(getattr(stats, field)) != value
+    }
 
-    inc_strength = int(delta.get("strength", 0) or 0)
-    inc_agility = int(delta.get("agility", 0) or 0)
-    inc_intelligence = int(delta.get("intelligence", 0) or 0)
-    inc_vitality = int(delta.get("vitality", 0) or 0)
+    if fix and drift:
+        for field, value in actual.items():
+            setattr(stats, field, value)
+        stats.save(update_fields=[*DEV_COUNTER_FIELDS, "updated_at"])
+        recalculate_dev_score(user=user, stats=stats)
 
-    for v in (inc_strength, inc_agility, inc_intelligence, inc_vitality):
+    return drift
+
+
+@use_case
+def allocate_stat_points(*, user, delta: dict[str, int]) -> UserStats:
+    """Распределяет свободные очки одним условным UPDATE (WHERE stat_points >= total)."""
+    increments = {field: int(delta.get(field, 0) or 0) for field in HERO_ATTRIBUTES}
+
+    for v in increments.values():
         if v < 0:
             raise ValueError("Нельзя распределять отрицательные значения")
 
-    total = inc_strength + inc_agility + inc_intelligence + inc_vitality
+    total = sum(increments.values())
     if total <= 0:
-        return stats
+        return get_user_stats_readonly(user)
 
-    if total > int(stats.stat_points):
-        raise ValueError("Недостаточно свободных очков")
+    values = {field: F(field) + inc for field, inc in increments.items() if inc}
+    values["stat_points"] = F("stat_points") - total
 
-    stats.strength += inc_strength
-    stats.agility += inc_agility
-    stats.intelligence += inc_intelligence
-    stats.vitality += inc_vitality
-    stats.stat_points -= total
-    stats.save(
-        update_fields=[
-            "strength",
-            "agility",
-            "intelligence",
-            "vitality",
-            "stat_points",
-            "updated_at",
-        ]
-    )
+    stats = update_stats_returning(user_id=user.pk, values=values, stat_points__gte=total)
+    if stats is None:
+        raise ValueError("Недостаточно свободных очков")
     return stats
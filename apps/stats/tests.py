@@ -1,3 +1,616 @@
-from django.test import TestCase
+import json
+from datetime import date, datetime, time, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.testing import QueryBudgetTestCase
+
+from .ingest import INGEST_MAX_EVENTS, BoundedStream, IngestParseError, ingest_xp_events, iter_json_array
+from .levels import LEVEL_TABLE_SIZE, LevelCurve, TriangularCurve
+from .models import UserStats, XPDailyRollup, XPEvent, XPOutbox
+from .outbox import DrainResult, drain_outbox_batch
+from .services import (
+	DEV_COUNTER_FIELDS,
+	add_xp,
+	allocate_stat_points,
+	audit_xp_page,
+	award_xp_event,
+	award_xp_events_bulk,
+	count_dev_counters,
+	dev_score_breakdown,
+	effective_streak,
+	rebuild_user_stats,
+	reconcile_dev_counters,
+	record_activity_days,
+)
+
+
+class StatsQueryBudgetTests(QueryBudgetTestCase):
+	def test_hero(self):
+		self.assertMaxQueries(2, "get", reverse("hero"))
+
+	def test_hero_allocate(self):
+		self.assertMaxQueries(2, "post", reverse("hero-allocate"), {"strength": 1, "vitality": 1})
+
+	def test_analytics_summary(self):
+		self.assertMaxQueries(3, "get", reverse("analytics-summary"))
+
+	def test_xp_events_bulk(self):
+		# Число запросов не должно расти с размером пакета (одна пачка — до INGEST_WRITE_CHUNK строк).
+		events = [
+			{"kind": "github_commit", "amount": 10, "source_type": "github", "source_id": f"sha-{i}"}
+			for i in range(200)
+		]
+		self.assertMaxQueries(10, "post", reverse("xp-events-bulk"), events)
+
+	def test_xp_events_bulk_duplicates(self):
+		events = [{"kind": "github_pr", "amount": 30, "source_type": "github", "source_id": f"pr-{i}"} for i in range(50)]
+		self.client.post(reverse("xp-events-bulk"), events, format="json")
+		# Пустой INSERT ... ON CONFLICT DO NOTHING + одно чтение уже записанных событий.
+		self.assertMaxQueries(4, "post", reverse("xp-events-bulk"), events)
+
+
+class XPEventIdempotencyTests(TestCase):
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(username="idem", email="idem@example.com", password="x")
+
+	def test_duplicate_source_is_one_statement_without_award(self):
+		event, _ = award_xp_event(user=self.user, kind="github_pr", amount=30, source_type="github", source_id="pr-1")
+		# Повтор: INSERT ... ON CONFLICT DO NOTHING + чтение события и статов.
+		with self.assertNumQueries(3):
+			again, stats = award_xp_event(user=self.user, kind="github_pr", amount=30, source_type="github", source_id="pr-1")
+		self.assertEqual(again.pk, event.pk)
+		self.assertEqual(stats.xp, 30)
+		self.assertEqual(XPEvent.objects.filter(user=self.user).count(), 1)
+
+	def test_duplicate_inside_outer_transaction_does_not_break_it(self):
+		award_xp_event(user=self.user, kind="github_pr", amount=30, source_type="github", source_id="pr-2")
+		with transaction.atomic():
+			award_xp_event(user=self.user, kind="github_pr", amount=30, source_type="github", source_id="pr-2")
+			award_xp_event(user=self.user, kind="workout", amount=10)
+		self.assertEqual(UserStats.objects.get(user=self.user).xp, 40)
+
+	def test_bulk_reports_created_and_duplicates(self):
+		award_xp_event(user=self.user, kind="github_commit", amount=5, source_type="github", source_id="sha-0")
+		rows = [{"kind": "github_commit", "amount": 5, "source_type": "github", "source_id": f"sha-{i}"} for i in range(3)]
+		result = award_xp_events_bulk(user=self.user, events=rows + rows[:1])
+		self.assertEqual([created for _, created in result.results], [False, True, True, False])
+		self.assertTrue(all(event.pk for event, _ in result.results))
+		self.assertEqual(result.xp_awarded, 10)
+		self.assertEqual(UserStats.objects.get(user=self.user).xp, 15)
+
+
+@override_settings(XP_OUTBOX_ENABLED=True)
+class XPOutboxTests(QueryBudgetTestCase):
+	def test_workout_create_writes_only_event_and_outbox(self):
+		xp = UserStats.objects.get(user=self.user).xp
+		payload = {"type": "run", "duration": 45, "intensity": 6}
+		# Токен, Workout, XPEvent, XPOutbox и чтение статов для ответа award_xp_event.
+		self.assertMaxQueries(5, "post", reverse("workouts-list"), payload, status=201)
+		self.assertEqual(XPOutbox.objects.filter(user=self.user).count(), 1)
+		self.assertEqual(UserStats.objects.get(user=self.user).xp, xp)
+
+	def test_drain_applies_effects_once(self):
+		xp = UserStats.objects.get(user=self.user).xp
+		award_xp_event(user=self.user, kind=XPEvent.Kind.WORKOUT, amount=40)
+		award_xp_events_bulk(user=self.user, events=[{"kind": "github_commit", "amount": 5, "source_type": "github", "source_id": "x"}])
+
+		result = drain_outbox_batch(batch_size=10)
+		self.assertEqual((result.claimed, result.processed, result.failed), (2, 2, 0))
+		self.assertEqual(UserStats.objects.get(user=self.user).xp, xp + 45)
+		self.assertTrue(XPDailyRollup.objects.filter(user=self.user, kind="github_commit", xp=5).exists())
+		self.assertFalse(XPOutbox.objects.exists())
+		self.assertEqual(drain_outbox_batch(batch_size=10).claimed, 0)
+
+	def test_failed_batch_is_kept_with_attempts(self):
+		award_xp_event(user=self.user, kind=XPEvent.Kind.WORKOUT, amount=40)
+		with mock.patch("apps.stats.services.add_xp", side_effect=RuntimeError("boom")):
+			result = drain_outbox_batch(batch_size=10, max_attempts=1)
+		self.assertEqual(result.failed, 1)
+		row = XPOutbox.objects.get(user=self.user)
+		self.assertEqual((row.attempts, row.last_error), (1, "RuntimeError: boom"))
+		# attempts >= max_attempts: строку больше не берём.
+		self.assertEqual(drain_outbox_batch(batch_size=10, max_attempts=1).claimed, 0)
+
+
+@override_settings(XP_OUTBOX_ENABLED=True, RAIDS_AUTO_DAMAGE=True)
+class OutboxBossDamageTests(TestCase):
+	def test_attack_before_drain_charges_boss_once(self):
+		from apps.raids.models import BossDamage
+		from apps.raids.services import attack_boss, ensure_active_boss
+
+		user = get_user_model().objects.create_user(username="outboxboss", email="outboxboss@example.com", password="x")
+		boss = ensure_active_boss(user=user)
+		event, _ = award_xp_event(user=user, kind=XPEvent.Kind.WORKOUT, amount=100)
+
+		# Атака успевает раньше воркера и поглощает событие; push из outbox не должен ударить второй раз.
+		self.assertEqual(attack_boss(user=user)["damage"], 100)
+		result = drain_outbox_batch(batch_size=10)
+		self.assertEqual((result.processed, result.failed), (1, 0))
+
+		boss.refresh_from_db()
+		self.assertEqual((boss.total_damage, boss.hp_current), (100, boss.hp_max - 100))
+		self.assertEqual(BossDamage.objects.filter(xp_event=event).count(), 1)
+		self.assertEqual(UserStats.objects.get(user=user).xp, 100)
+
+
+class OutboxWorkerLoopTests(SimpleTestCase):
+	BATCHES = [
+		DrainResult(claimed=2, processed=0, failed=2),
+		DrainResult(claimed=3, processed=3, failed=0),
+		DrainResult(claimed=0, processed=0, failed=0),
+	]
+
+	def _run(self, **options) -> tuple[mock.Mock, str]:
+		out = StringIO()
+		with mock.patch(
+			"apps.stats.management.commands.run_outbox_worker.drain_outbox_batch", side_effect=self.BATCHES
+		) as drain:
+			call_command("run_outbox_worker", threads=1, poll=0, stdout=out, **options)
+		return drain, out.getvalue()
+
+	def test_once_keeps_draining_after_batch_of_failures(self):
+		drain, out = self._run(once=True)
+		self.assertEqual(drain.call_count, 3)
+		self.assertIn("batches=2 processed=3 failed=2", out)
+
+
+class RebuildStatsTests(TestCase):
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(username="rebuild", email="rebuild@example.com", password="x")
+		for amount in (150, 250, 600):
+			award_xp_event(user=self.user, kind=XPEvent.Kind.WORKOUT, amount=amount)
+
+	def _snapshot(self):
+		return UserStats.objects.values("xp", "level", "xp_to_next_level", "stat_points", "dev_score", "rank").get(user=self.user)
+
+	def test_rebuild_matches_incremental_awards(self):
+		expected = self._snapshot()
+		UserStats.objects.filter(user=self.user).update(xp=0, level=1, xp_to_next_level=100, stat_points=0, dev_score=0, rank="E")
+
+		result = rebuild_user_stats(user_ids=[self.user.pk], chunk_size=2)
+		self.assertEqual((result.users, result.events, result.changed), (1, 3, 1))
+		self.assertEqual(self._snapshot(), expected)
+		self.assertEqual(rebuild_user_stats(user_ids=[self.user.pk]).changed, 0)
+
+	def test_command_reports_rate_and_keeps_allocated_points(self):
+		UserStats.objects.filter(user=self.user).update(strength=3, xp=0)
+		out = StringIO()
+		call_command("rebuild_stats", users=[self.user.pk], workers=1, stdout=out)
+		self.assertIn("events/s", out.getvalue())
+		stats = UserStats.objects.get(user=self.user)
+		self.assertEqual(stats.xp, 1000)
+		self.assertEqual(stats.stat_points, (stats.level - 1) * 5 - 2)
+
+
+class AuditXPTests(TestCase):
+	def setUp(self):
+		User = get_user_model()
+		self.users = [User.objects.create_user(username=f"audit{i}", email=f"audit{i}@example.com", password="x") for i in range(3)]
+		for user in self.users:
+			award_xp_event(user=user, kind=XPEvent.Kind.WORKOUT, amount=400)
+
+	def test_pages_report_only_drift(self):
+		UserStats.objects.filter(user=self.users[1]).update(xp=50)
+		pages = []
+		after = 0
+		while True:
+			page = audit_xp_page(after_user_id=after, limit=2)
+			if page.last_user_id is None:
+				break
+			pages.append(page)
+			after = page.last_user_id
+		self.assertEqual([p.scanned for p in pages], [2, 1])
+		self.assertEqual([(d.user_id, d.stored, d.expected) for p in pages for d in p.drift], [(self.users[1].pk, 50, 400)])
+
+	def test_pending_outbox_events_are_not_drift(self):
+		with override_settings(XP_OUTBOX_ENABLED=True):
+			award_xp_event(user=self.users[0], kind=XPEvent.Kind.WORKOUT, amount=40)
+		self.assertEqual(audit_xp_page(limit=10).drift, [])
+
+	def test_fix_rewrites_xp_and_level(self):
+		expected = UserStats.objects.values("xp", "level", "dev_score", "rank").get(user=self.users[2])
+		UserStats.objects.filter(user=self.users[2]).update(xp=5000, level=10, dev_score=5000, rank="C")
+		out = StringIO()
+		call_command("audit_xp", fix=True, chunk=1, stdout=out)
+		self.assertIn("drifted=1", out.getvalue())
+		self.assertEqual(UserStats.objects.values("xp", "level", "dev_score", "rank").get(user=self.users[2]), expected)
+		self.assertEqual(audit_xp_page(limit=10).drift, [])
+
+
+class AddXPLevelUpTests(TestCase):
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(username="leveler", email="leveler@example.com", password="x")
+
+	def _levels(self):
+		return UserStats.objects.values_list("xp", "level", "stat_points", "xp_to_next_level").get(user=self.user)
+
+	def test_multi_level_jump_in_one_award(self):
+		# 1000 XP — ровно порог 5-го уровня: +4 уровня и 20 очков за одно начисление.
+		stats = add_xp(user=self.user, amount=1000)
+		self.assertEqual((stats.level, stats.stat_points), (5, 20))
+		self.assertEqual(self._levels(), (1000, 5, 20, 500))
+
+	def test_awards_around_boundary_level_up_once(self):
+		add_xp(user=self.user, amount=99)
+		self.assertEqual(self._levels(), (99, 1, 0, 100))
+		add_xp(user=self.user, amount=1)
+		self.assertEqual(self._levels(), (100, 2, 5, 200))
+		add_xp(user=self.user, amount=199)
+		self.assertEqual(self._levels(), (299, 2, 5, 200))
+		add_xp(user=self.user, amount=1)
+		self.assertEqual(self._levels(), (300, 3, 10, 300))
+
+	def test_level_already_raised_by_concurrent_award_is_not_paid_twice(self):
+		# Параллельное начисление уже подняло уровень и выдало очки: условие level < new_level не сработает.
+		add_xp(user=self.user, amount=90)
+		UserStats.objects.filter(user=self.user).update(level=2, stat_points=5, xp_to_next_level=200)
+		add_xp(user=self.user, amount=20)
+		self.assertEqual(self._levels(), (110, 2, 5, 200))
+
+
+class StreakTests(TestCase):
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(username="streaker", email="streaker@example.com", password="x")
+		self.day = date(2026, 3, 2)
+
+	def _award_on(self, day: date, amount: int = 10):
+		# created_at — auto_now_add: подменяем «сейчас», чтобы событие легло в нужный день.
+		moment = timezone.make_aware(datetime.combine(day, time(12)))
+		with mock.patch("django.utils.timezone.now", return_value=moment):
+			award_xp_event(user=self.user, kind=XPEvent.Kind.WORKOUT, amount=amount)
+
+	def _streak(self):
+		return UserStats.objects.values_list("streak_current", "streak_best", "last_active_day").get(user=self.user)
+
+	def test_consecutive_days_raise_current_and_best(self):
+		for offset in range(3):
+			self._award_on(self.day + timedelta(days=offset))
+		self.assertEqual(self._streak(), (3, 3, self.day + timedelta(days=2)))
+
+	def test_gap_resets_current_and_keeps_best(self):
+		self._award_on(self.day)
+		self._award_on(self.day + timedelta(days=1))
+		self._award_on(self.day + timedelta(days=3))
+		self.assertEqual(self._streak(), (1, 2, self.day + timedelta(days=3)))
+		# День раньше last_active_day не трогает стрик — его учитывает только пересборка.
+		record_activity_days(user=self.user, days=[self.day + timedelta(days=2)])
+		self.assertEqual(self._streak(), (1, 2, self.day + timedelta(days=3)))
+
+	def test_same_day_awards_count_once(self):
+		for offset in (0, 0, 1, 1, 1):
+			self._award_on(self.day + timedelta(days=offset))
+		self.assertEqual(self._streak(), (2, 2, self.day + timedelta(days=1)))
+		record_activity_days(user=self.user, days=[self.day + timedelta(days=1)] * 3)
+		self.assertEqual(self._streak(), (2, 2, self.day + timedelta(days=1)))
+
+	def test_effective_streak_is_zero_after_missed_day(self):
+		self._award_on(self.day)
+		self._award_on(self.day + timedelta(days=1))
+		stats = UserStats.objects.get(user=self.user)
+		self.assertEqual(effective_streak(stats, today=self.day + timedelta(days=1)), 2)
+		self.assertEqual(effective_streak(stats, today=self.day + timedelta(days=2)), 0)
+		with mock.patch("django.utils.timezone.localdate", return_value=self.day + timedelta(days=3)):
+			self.assertEqual(effective_streak(stats), 0)
+
+
+class AllocateStatPointsTests(TestCase):
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(username="allocator", email="allocator@example.com", password="x")
+		add_xp(user=self.user, amount=100)
+
+	def _attributes(self):
+		return UserStats.objects.values("stat_points", "strength", "agility", "intelligence", "vitality").get(user=self.user)
+
+	def test_allocates_and_spends_points(self):
+		before = self._attributes()
+		stats = allocate_stat_points(user=self.user, delta={"strength": 2, "vitality": 3})
+		self.assertEqual(stats.stat_points, 0)
+		after = self._attributes()
+		self.assertEqual((after["strength"] - before["strength"], after["vitality"] - before["vitality"]), (2, 3))
+
+	def test_not_enough_points_leaves_row_unchanged(self):
+		before = self._attributes()
+		with self.assertRaisesMessage(ValueError, "Недостаточно свободных очков"):
+			allocate_stat_points(user=self.user, delta={"strength": 3, "agility": 3})
+		self.assertEqual(self._attributes(), before)
+
+	def test_negative_delta_is_rejected(self):
+		before = self._attributes()
+		with self.assertRaises(ValueError):
+			allocate_stat_points(user=self.user, delta={"strength": 6, "agility": -1})
+		self.assertEqual(self._attributes(), before)
+
+
+def _commit(i: int) -> dict:
+	return {"kind": "github_commit", "amount": 5, "source_type": "github", "source_id": f"sha{i}"}
+
+
+class IngestParserTests(SimpleTestCase):
+	def _parse(self, body: bytes, *, chunk_size: int = 3) -> list:
+		return [value for _, value in iter_json_array(BytesIO(body), chunk_size=chunk_size)]
+
+	def test_array_split_across_chunks(self):
+		# Кусок по 3 байта режет и числа, и двухбайтовые символы UTF-8.
+		body = json.dumps([{"n": 12345, "s": "привет"}, 67890, [1, 2]], ensure_ascii=False).encode()
+		self.assertEqual(self._parse(b"  " + body + b" \n"), [{"n": 12345, "s": "привет"}, 67890, [1, 2]])
+		self.assertEqual(self._parse(b"[ ]"), [])
+
+	def test_trailing_data_after_array_is_rejected(self):
+		items = iter_json_array(BytesIO(b'[1, 2] {"x": 1}'), chunk_size=4)
+		self.assertEqual([next(items)[1], next(items)[1]], [1, 2])
+		with self.assertRaisesMessage(IngestParseError, "Лишние данные"):
+			next(items)
+
+	def test_truncated_array(self):
+		for body in (b"[1, 2", b'[1, {"a": ', b"[1,"):
+			with self.subTest(body=body), self.assertRaises(IngestParseError):
+				self._parse(body)
+
+	def test_non_utf8_body(self):
+		with self.assertRaisesMessage(IngestParseError, "UTF-8"):
+			self._parse('["тест"]'.encode("cp1251"))
+
+	def test_bounded_stream(self):
+		self.assertEqual(BoundedStream(BytesIO(b"12345"), 5).read(), b"12345")
+		with self.assertRaisesMessage(IngestParseError, "больше 4 байт"):
+			BoundedStream(BytesIO(b"12345"), 4).read()
+		stream = BoundedStream(BytesIO(b"12\n345\n"), 5)
+		self.assertEqual(stream.readline(), b"12\n")
+		with self.assertRaises(IngestParseError):
+			stream.readline()
+
+
+class IngestAPITests(TestCase):
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(username="ingest", email="ingest@example.com", password="x")
+		self.client = APIClient()
+		self.client.force_authenticate(self.user)
+		self.url = reverse("xp-events-bulk")
+
+	def _post(self, body: bytes, content_type: str = "application/json"):
+		return self.client.post(self.url, data=body, content_type=content_type)
+
+	def _statuses(self, response) -> list[str]:
+		return [row["status"] for row in response.json()["data"]["results"]]
+
+	def test_json_array(self):
+		response = self._post(json.dumps([_commit(1), _commit(2), _commit(1)]).encode())
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(self._statuses(response), ["created", "created", "duplicate"])
+		self.assertEqual(XPEvent.objects.filter(user=self.user).count(), 2)
+
+	def test_ndjson_with_bad_line_among_good(self):
+		body = b"\n".join([json.dumps(_commit(1)).encode(), b"{not json", b"", json.dumps(_commit(2)).encode()])
+		response = self._post(body, "application/x-ndjson")
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(self._statuses(response), ["created", "rejected", "created"])
+		self.assertEqual(response.json()["data"]["results"][1]["index"], 1)
+
+	def test_truncated_array_keeps_parsed_items(self):
+		body = json.dumps([_commit(1), _commit(2)]).encode()[:-20]
+		response = self._post(body)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(self._statuses(response), ["created", "rejected"])
+		self.assertEqual(XPEvent.objects.filter(user=self.user).count(), 1)
+
+	def test_trailing_garbage_is_reported(self):
+		response = self._post(json.dumps([_commit(1)]).encode() + b"garbage")
+		self.assertEqual(self._statuses(response), ["created", "rejected"])
+
+	def test_non_utf8_body_is_bad_request(self):
+		response = self._post(b'[{"source_id": "\xff\xfe"}]')
+		self.assertEqual(response.status_code, 400)
+		self.assertFalse(XPEvent.objects.filter(user=self.user).exists())
+
+	def test_body_over_byte_limit(self):
+		body = json.dumps([_commit(i) for i in range(20)]).encode()
+		with override_settings(XP_INGEST_MAX_BYTES=len(body) - 1):
+			self.assertEqual(self._post(body).status_code, 400)
+		with override_settings(XP_INGEST_MAX_BYTES=len(body)):
+			self.assertEqual(self._post(body).status_code, 200)
+
+	def test_stream_over_byte_limit_without_content_length(self):
+		body = json.dumps([_commit(i) for i in range(20)]).encode()
+		# Chunked-тело без Content-Length: предел срабатывает посреди массива.
+		stream = BoundedStream(BytesIO(body), len(body) // 2)
+		result = ingest_xp_events(user=self.user, items=iter_json_array(stream, chunk_size=64))
+		self.assertEqual(result["results"][-1]["status"], "rejected")
+		self.assertIn("байт", result["results"][-1]["errors"]["non_field_errors"][0])
+		self.assertLess(result["created"], 20)
+
+	def test_event_cap(self):
+		items = ((i, _commit(i)) for i in range(INGEST_MAX_EVENTS + 1))
+		result = ingest_xp_events(user=self.user, items=items)
+		self.assertTrue(result["truncated"])
+		self.assertEqual(result["created"], INGEST_MAX_EVENTS)
+		self.assertEqual(XPEvent.objects.filter(user=self.user).count(), INGEST_MAX_EVENTS)
+
+
+class DevCountersTests(TestCase):
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(username="devcount", email="devcount@example.com", password="x")
+		self.client = APIClient()
+		self.client.force_authenticate(self.user)
+
+	def _stats(self) -> UserStats:
+		return UserStats.objects.get(user=self.user)
+
+	def assertCountersMatchTables(self):
+		stats = self._stats()
+		self.assertEqual({field: getattr(stats, field) for field in DEV_COUNTER_FIELDS}, count_dev_counters(user=self.user))
+		breakdown = dev_score_breakdown(stats)
+		self.assertEqual((stats.dev_score, stats.rank), (breakdown.dev_score, breakdown.rank))
+
+	def _post(self, basename: str, payload: dict) -> dict:
+		response = self.client.post(reverse(f"{basename}-list"), payload, format="json")
+		self.assertEqual(response.status_code, 201, response.content)
+		return response.json()["data"]
+
+	def test_counters_follow_project_and_skill_changes(self):
+		from apps.projects.models import Project
+		from apps.projects.services import update_project
+
+		skill = self._post("skills", {"category": "Backend", "name": "Django", "level": 50})
+		self._post("skills", {"category": "Backend", "name": "SQL", "level": 85})
+		response = self.client.patch(reverse("skills-detail", args=[skill["id"]]), {"level": 90}, format="json")
+		self.assertEqual(response.status_code, 200)
+
+		project = self._post("projects", {"name": "Client", "is_commercial": True})
+		self._post("tasks", {"project": project["id"], "title": "Done", "status": "done", "difficulty": 2})
+		task = self._post("tasks", {"project": project["id"], "title": "Todo", "difficulty": 3})
+		self.client.post(reverse("tasks-complete", args=[task["id"]]))
+		self.client.post(reverse("tasks-complete", args=[task["id"]]))
+
+		stats = self._stats()
+		self.assertEqual(
+			{field: getattr(stats, field) for field in DEV_COUNTER_FIELDS},
+			{"skill_level_sum": 175, "skill_count": 2, "tasks_done_count": 2, "skills_mastered_count": 2, "commercial_projects_count": 1},
+		)
+		self.assertCountersMatchTables()
+
+		with transaction.atomic():
+			update_project(project=Project.objects.get(pk=project["id"]), validated_data={"is_commercial": False})
+		self.assertEqual(self._stats().commercial_projects_count, 0)
+		self.assertCountersMatchTables()
+
+	def test_reconcile_fixes_drift(self):
+		self._post("skills", {"category": "Backend", "name": "Django", "level": 85})
+		self._post("projects", {"name": "Client", "is_commercial": True})
+		expected = UserStats.objects.values(*DEV_COUNTER_FIELDS, "dev_score", "rank").get(user=self.user)
+
+		UserStats.objects.filter(user=self.user).update(tasks_done_count=7, skill_level_sum=0, dev_score=0)
+		drift = reconcile_dev_counters(user=self.user, fix=False)
+		self.assertEqual(drift, {"tasks_done_count": (7, 0), "skill_level_sum": (0, 85)})
+		self.assertEqual(self._stats().tasks_done_count, 7)
+
+		self.assertEqual(reconcile_dev_counters(user=self.user), drift)
+		self.assertEqual(UserStats.objects.values(*DEV_COUNTER_FIELDS, "dev_score", "rank").get(user=self.user), expected)
+		self.assertEqual(reconcile_dev_counters(user=self.user), {})
+
+
+def _legacy_level(xp: int) -> int:
+	# Цикл из add_xp до замкнутой формулы: порог уровня L — 100 * (1 + ... + (L - 1)).
+	def required(level: int) -> int:
+		return 0 if level <= 1 else ((level - 1) * level // 2) * 100
+
+	level = 1
+	while xp >= required(level + 1):
+		level += 1
+	return level
+
+
+class TriangularCurveTests(SimpleTestCase):
+	def setUp(self):
+		self.curve = TriangularCurve(step=100)
+
+	def _boundary_xps(self, levels) -> list[int]:
+		xps = [0, 1]
+		for level in levels:
+			threshold = self.curve.threshold(level)
+			xps += [threshold - 1, threshold, threshold + 1]
+		return [xp for xp in xps if xp >= 0]
+
+	def test_level_matches_legacy_loop_around_every_table_boundary(self):
+		for xp in self._boundary_xps(range(1, LEVEL_TABLE_SIZE + 3)):
+			with self.subTest(xp=xp):
+				expected = _legacy_level(xp)
+				self.assertEqual(self.curve.level_for_xp(xp), expected)
+				# Базовый путь (bisect по таблице + поиск за ней) даёт тот же ответ.
+				self.assertEqual(LevelCurve.level_for_xp(self.curve, xp), expected)
+				self.assertEqual(self.curve.xp_to_next_level(expected), expected * 100)
+
+	def test_threshold_matches_legacy_formula(self):
+		for level in (0, 1, 2, 3, LEVEL_TABLE_SIZE, LEVEL_TABLE_SIZE + 1, 10_000):
+			with self.subTest(level=level):
+				legacy = 0 if level <= 1 else ((level - 1) * level // 2) * 100
+				self.assertEqual(self.curve.threshold(level), legacy)
+
+	def test_large_values(self):
+		for xp in (10**9, 10**12 - 1, 10**12):
+			with self.subTest(xp=xp):
+				self.assertEqual(self.curve.level_for_xp(xp), _legacy_level(xp))
+		# Там, где цикл уже слишком долгий: уровень — единственный L с threshold(L) <= xp < threshold(L + 1).
+		for xp in (10**18, 2**63 - 1, 10**30):
+			with self.subTest(xp=xp):
+				level = self.curve.level_for_xp(xp)
+				self.assertLessEqual(self.curve.threshold(level), xp)
+				self.assertLess(xp, self.curve.threshold(level + 1))
+				self.assertEqual(LevelCurve.level_for_xp(self.curve, xp), level)
+
+	def test_negative_xp_is_level_one(self):
+		self.assertEqual(self.curve.level_for_xp(-50), 1)
+
+
+class AnalyticsWindowTests(TestCase):
+	# 2026-01-01 — четверг: первые три дня попадают в неделю с понедельником 2025-12-29.
+	ROLLUPS = [
+		(date(2025, 12, 31), "workout", 99),
+		(date(2026, 1, 1), "workout", 10),
+		(date(2026, 1, 2), "github_commit", 20),
+		(date(2026, 1, 3), "workout", 5),
+		(date(2026, 1, 5), "workout", 10),
+		(date(2026, 1, 6), "workout", 10),
+		(date(2026, 1, 6), "github_commit", 7),
+		(date(2026, 1, 7), "workout", 10),
+		(date(2026, 1, 8), "workout", 10),
+		(date(2026, 2, 2), "workout", 50),
+	]
+
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(username="analytics", email="analytics@example.com", password="x")
+		XPDailyRollup.objects.bulk_create(
+			[XPDailyRollup(user=self.user, day=day, kind=kind, xp=xp, events=1) for day, kind, xp in self.ROLLUPS]
+		)
+		self.client = APIClient()
+		self.client.force_authenticate(self.user)
+
+	def _summary(self, **params) -> dict:
+		response = self.client.get(reverse("analytics-summary"), params)
+		self.assertEqual(response.status_code, 200, response.content)
+		return response.json()["data"]
+
+	def test_week_buckets_start_on_monday(self):
+		data = self._summary(**{"from": "2026-01-01", "to": "2026-02-28", "granularity": "week"})
+		self.assertEqual(
+			data["xp_by_period"],
+			[
+				{"period": "2025-12-29", "xp": 35, "events": 3},
+				{"period": "2026-01-05", "xp": 47, "events": 5},
+				{"period": "2026-02-02", "xp": 50, "events": 1},
+			],
+		)
+		self.assertEqual(data["xp_total"], 132)
+
+	def test_month_buckets(self):
+		data = self._summary(**{"from": "2025-12-01", "to": "2026-02-28", "granularity": "month"})
+		self.assertEqual(
+			data["xp_by_period"],
+			[
+				{"period": "2025-12-01", "xp": 99, "events": 1},
+				{"period": "2026-01-01", "xp": 82, "events": 8},
+				{"period": "2026-02-01", "xp": 50, "events": 1},
+			],
+		)
+		self.assertEqual(sum(row["xp"] for row in data["xp_by_period"]), data["xp_total"])
+
+	def test_window_streak_is_clipped_to_window(self):
+		# 31.12–03.01 — четыре дня подряд, но окно начинается 01.01; 05.01–08.01 — тоже четыре.
+		self.assertEqual(self._summary(**{"from": "2026-01-01", "to": "2026-01-31"})["streak_best_window"], 4)
+		self.assertEqual(self._summary(**{"from": "2026-01-01", "to": "2026-01-07"})["streak_best_window"], 3)
+		self.assertEqual(self._summary(**{"from": "2026-01-06", "to": "2026-01-07"})["streak_best_window"], 2)
+		self.assertEqual(self._summary(**{"from": "2026-01-09", "to": "2026-02-01"})["streak_best_window"], 0)
+
+	def test_invalid_window(self):
+		url = reverse("analytics-summary")
+		self.assertEqual(self.client.get(url, {"from": "2026-02-01", "to": "2026-01-01"}).status_code, 400)
+		self.assertEqual(self.client.get(url, {"from": "2024-01-01", "to": "2026-01-01"}).status_code, 400)
+		self.assertEqual(self.client.get(url, {"granularity": "year"}).status_code, 400)
@@ -1,24 +1,30 @@
 from __future__ import annotations
 
-from datetime import datetime, time, timedelta
+from datetime import timedelta
+from itertools import chain
 
-from django.db.models import Sum
-from django.db.models.functions import TruncDate
 from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import XPEvent
-from .serializers import AllocateStatsSerializer, AnalyticsSummarySerializer, HeroStatsSerializer
-from .services import allocate_stat_points, ensure_user_stats
+from .ingest import BoundedStream, IngestParseError, ingest_max_bytes, ingest_xp_events, iter_json_array, iter_ndjson
+from .models import XPDailyRollup
+from .serializers import (
+	AllocateStatsSerializer,
+	AnalyticsQuerySerializer,
+	AnalyticsSummarySerializer,
+	HeroStatsSerializer,
+	XPEventIngestSerializer,
+)
+from .services import allocate_stat_points, effective_streak, get_user_stats_readonly
 
 
 class HeroAPIView(APIView):
     serializer_class = HeroStatsSerializer
 
     def get(self, request):
-        stats = ensure_user_stats(request.user)
+        stats = get_user_stats_readonly(request.user)
         return Response(HeroStatsSerializer(stats).data)
 
 
@@ -38,53 +44,112 @@ class HeroAllocateAPIView(APIView):
 class AnalyticsSummaryAPIView(APIView):
 	serializer_class = AnalyticsSummarySerializer
 
-	def get(self, request):
-		# Последние 30 дней по событиям XP (честный источник)
-		today = timezone.localdate()
-		start_day = today - timedelta(days=29)
-		start_dt = timezone.make_aware(datetime.combine(start_day, time.min))
-
-		base_qs = XPEvent.objects.filter(user=request.user, created_at__gte=start_dt)
-
-		by_day = (
-			base_qs.annotate(day=TruncDate("created_at"))
-			.values("day")
-			.annotate(xp=Sum("amount"))
-			.order_by("day")
-		)
-		xp_by_day = [{"date": str(x["day"]), "xp": int(x["xp"] or 0)} for x in by_day]
-
-		by_kind = base_qs.values("kind").annotate(xp=Sum("amount")).order_by("-xp")
-		xp_by_kind = [{"kind": x["kind"], "xp": int(x["xp"] or 0)} for x in by_kind]
-
-		# Streak: сколько дней подряд до сегодня (включая) был XP>0
-		day_to_xp = {x["date"]: x["xp"] for x in xp_by_day}
-		streak_current = 0
-		for i in range(0, 365):
-			d = today - timedelta(days=i)
-			key = str(d)
-			if day_to_xp.get(key, 0) > 0:
-				streak_current += 1
-			else:
-				break
+	@staticmethod
+	def _period_start(day, granularity: str):
+		if granularity == "week":
+			return day - timedelta(days=day.weekday())
+		if granularity == "month":
+			return day.replace(day=1)
+		return day
 
-		# Best streak за 30 дней
-		best = 0
+	def get(self, request):
+		query = AnalyticsQuerySerializer(data=request.query_params)
+		query.is_valid(raise_exception=True)
+		date_from = query.validated_data["from"]
+		date_to = query.validated_data["to"]
+		granularity = query.validated_data["granularity"]
+
+		# Один range-запрос по дневным агрегатам вместо скана сырых XPEvent.
+		rows = XPDailyRollup.objects.filter(
+			user=request.user, day__gte=date_from, day__lte=date_to
+		).values_list("day", "kind", "xp", "events")
+
+		day_totals: dict = {}
+		period_totals: dict = {}
+		kind_totals: dict[str, int] = {}
+		for day, kind, xp, events in rows:
+			day_totals[day] = day_totals.get(day, 0) + int(xp)
+			kind_totals[kind] = kind_totals.get(kind, 0) + int(xp)
+			bucket = period_totals.setdefault(self._period_start(day, granularity), [0, 0])
+			bucket[0] += int(xp)
+			bucket[1] += int(events)
+
+		xp_by_day = [{"date": str(day), "xp": xp} for day, xp in sorted(day_totals.items())]
+		xp_by_period = [
+			{"period": str(period), "xp": xp, "events": events}
+			for period, (xp, events) in sorted(period_totals.items())
+		]
+		xp_by_kind = [
+			{"kind": kind, "xp": xp} for kind, xp in sorted(kind_totals.items(), key=lambda x: x[1], reverse=True)
+		]
+
+		# Лучший стрик внутри окна.
+		best_window = 0
 		cur = 0
-		for i in range(29, -1, -1):
-			d = today - timedelta(days=i)
-			key = str(d)
-			if day_to_xp.get(key, 0) > 0:
+		day = date_from
+		while day <= date_to:
+			if day_totals.get(day, 0) > 0:
 				cur += 1
-				best = max(best, cur)
+				best_window = max(best_window, cur)
 			else:
 				cur = 0
+			day += timedelta(days=1)
+
+		# Текущий и лучший за всё время — из сохранённого индекса на UserStats.
+		stats = get_user_stats_readonly(request.user)
 
 		return Response(
 			{
+				"date_from": str(date_from),
+				"date_to": str(date_to),
+				"granularity": granularity,
+				"xp_total": sum(day_totals.values()),
 				"xp_by_day": xp_by_day,
+				"xp_by_period": xp_by_period,
 				"xp_by_kind": xp_by_kind,
-				"streak_current": int(streak_current),
-				"streak_best_30d": int(best),
+				"streak_current": effective_streak(stats),
+				"streak_best": int(stats.streak_best),
+				"streak_best_window": int(best_window),
+				"streak_best_30d": int(best_window),
+				"last_active_day": str(stats.last_active_day) if stats.last_active_day else None,
 			}
 		)
+
+
+class XPEventBulkAPIView(APIView):
+	"""Пакетная загрузка XP-событий из внешних источников (GitHub commits/PR).
+
+	Принимает JSON-массив или NDJSON (`Content-Type: application/x-ndjson`),
+	до 10k событий и XP_INGEST_MAX_BYTES байт. Тело разбирается потоково; результат — статус по каждой строке.
+	"""
+
+	serializer_class = XPEventIngestSerializer
+
+	NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+	def post(self, request):
+		stream = request.stream
+		if stream is None:
+			raise ValidationError({"non_field_errors": ["Пустое тело запроса"]})
+		max_bytes = ingest_max_bytes()
+		try:
+			content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+		except ValueError:
+			content_length = 0
+		if content_length > max_bytes:
+			raise ValidationError({"non_field_errors": [f"Тело запроса больше {max_bytes} байт"]})
+		stream = BoundedStream(stream, max_bytes)
+
+		content_type = (request.content_type or "").split(";")[0].strip().lower()
+		if content_type in self.NDJSON_CONTENT_TYPES:
+			items = iter_ndjson(stream)
+		else:
+			items = iter_json_array(stream)
+			# Начало массива проверяем до записи: мусор вместо JSON — это 400, а не пустой отчёт.
+			try:
+				first = next(items, None)
+			except IngestParseError as e:
+				raise ValidationError({"non_field_errors": [str(e)]})
+			items = chain([first], items) if first is not None else iter(())
+
+		return Response(ingest_xp_events(user=request.user, items=items))
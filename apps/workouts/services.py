@@ -1,14 +1,14 @@
 from __future__ import annotations
 
-from django.db import transaction
-
+from apps.core.transactions import use_case
+from apps.dashboard.cache import invalidate_dashboard
 from apps.stats.services import award_xp_event
 from apps.stats.models import XPEvent
 
 from .models import Workout
 
 
-@transaction.atomic
+@use_case
 def create_workout(*, user, validated_data: dict) -> Workout:
     workout = Workout.objects.create(user=user, **validated_data)
     xp = int(workout.duration) * int(workout.intensity)
@@ -26,4 +26,6 @@ def create_workout(*, user, validated_data: dict) -> Workout:
         },
         occurred_at=workout.created_at,
     )
+    # workouts_this_week меняется даже без XP (duration=0).
+    invalidate_dashboard(user.pk)
     return workout
@@ -1,3 +1,12 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from apps.core.testing import QueryBudgetTestCase
+
+
+class WorkoutQueryBudgetTests(QueryBudgetTestCase):
+	def test_list(self):
+		self.assertMaxQueries(2, "get", reverse("workouts-list"))
+
+	def test_create(self):
+		payload = {"type": "run", "duration": 45, "intensity": 6}
+		self.assertMaxQueries(6, "post", reverse("workouts-list"), payload, status=201)
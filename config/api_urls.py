@@ -3,16 +3,16 @@ from drf_spectacular.views import SpectacularAPIView
 from rest_framework.routers import DefaultRouter
 
 from apps.dashboard.views import DashboardAPIView
-from apps.finance.views import FinanceRecordViewSet
+from apps.finance.views import FinanceRecordViewSet, FinanceSummaryAPIView
 from apps.logs.views import LearningLogViewSet
 from apps.projects.views import ProjectViewSet, TaskViewSet
 from apps.skills.views import SkillNodeViewSet, SkillTrackViewSet, SkillViewSet
 from apps.workouts.views import WorkoutViewSet
-from apps.core.views import SystemAPIView
+from apps.core.views import SystemAPIView, SystemMetricsAPIView
 from apps.stats.views import HeroAPIView, HeroAllocateAPIView
 from apps.focus.views import FocusSessionViewSet
 from apps.raids.views import BossAPIView, BossAttackAPIView, BossNextAPIView
-from apps.stats.views import AnalyticsSummaryAPIView
+from apps.stats.views import AnalyticsSummaryAPIView, XPEventBulkAPIView
 from apps.ai.views import AIActAPIView, AIChatAPIView, AIProfileAPIView
 
 
@@ -37,6 +37,7 @@ urlpatterns = [
     path("", include("apps.accounts.urls")),
     path("hero/", HeroAPIView.as_view(), name="hero"),
     path("hero/allocate/", HeroAllocateAPIView.as_view(), name="hero-allocate"),
+    path("xp-events/bulk/", XPEventBulkAPIView.as_view(), name="xp-events-bulk"),
     path("analytics/summary/", AnalyticsSummaryAPIView.as_view(), name="analytics-summary"),
     path("ai/chat/", AIChatAPIView.as_view(), name="ai-chat"),
     path("ai/act/", AIActAPIView.as_view(), name="ai-act"),
@@ -45,7 +46,9 @@ urlpatterns = [
     path("boss/attack/", BossAttackAPIView.as_view(), name="boss-attack"),
     path("boss/next/", BossNextAPIView.as_view(), name="boss-next"),
     path("system/", SystemAPIView.as_view(), name="system"),
+    path("system/metrics/", SystemMetricsAPIView.as_view(), name="system-metrics"),
     path("dashboard/", DashboardAPIView.as_view(), name="dashboard"),
+    path("finance/summary/", FinanceSummaryAPIView.as_view(), name="finance-summary"),
     path("schema/", SpectacularAPIView.as_view(), name="schema"),
     path("", include(router.urls)),
 ]
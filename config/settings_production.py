@@ -0,0 +1,48 @@
+"""Продакшен-профиль: `DJANGO_SETTINGS_MODULE=config.settings_production`.
+
+Всё, что зависит от окружения (DATABASE_URL, пул, хосты), читается в config.settings;
+здесь — только то, что в проде должно быть жёстко.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .env import env_bool, env_int, env_str
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+DEBUG = False
+
+SECRET_KEY = env_str('DJANGO_SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('DJANGO_SECRET_KEY обязателен в продакшене')
+
+if not env_str('DATABASE_URL'):
+    raise ImproperlyConfigured('DATABASE_URL обязателен в продакшене (PostgreSQL)')
+
+# Без пула держим соединения между запросами и проверяем их перед использованием.
+if 'pool' not in DATABASES['default'].get('OPTIONS', {}):
+    DATABASES['default']['CONN_MAX_AGE'] = env_int('DB_CONN_MAX_AGE', 60)
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = env_bool('DB_CONN_HEALTH_CHECKS', True)
+
+# Кеш должен быть общим для всех процессов. Без CACHE_URL — таблица в БД
+# (`manage.py createcachetable`); Redis/Memcached — через CACHE_URL.
+if not env_str('CACHE_URL'):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'django_cache'}}
+
+SESSION_COOKIE_SECURE = True
+CSRF_COOKIE_SECURE = True
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+
+# DEBUG=False уже отключает сбор connection.queries; логгер SQL тоже глушим,
+# чтобы LOGGING из окружения случайно не включил его на DEBUG.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'root': {'handlers': ['console'], 'level': 'WARNING'},
+    'loggers': {
+        'django.db.backends': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
@@ -16,6 +16,7 @@ type BossDto = {
   rank: string;
   hp_max: number;
   hp_current: number;
+  total_damage: number;
   status: "active" | "defeated";
   started_at: string;
   defeated_at: string | null;
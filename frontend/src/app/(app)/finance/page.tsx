@@ -4,7 +4,7 @@ import useSWR from "swr";
 import { useMemo, useState } from "react";
 
 import { apiGet, apiPost, apiDelete } from "@/lib/api";
-import type { FinanceDto, Paginated } from "@/lib/types";
+import type { FinanceDto, FinanceSummaryDto, Paginated } from "@/lib/types";
 import { useAuth } from "@/lib/auth";
 import { Card, CardBody, CardHeader } from "@/components/ui/Card";
 import { Input } from "@/components/ui/Input";
@@ -15,6 +15,9 @@ import { EmptyState } from "@/components/EmptyState";
 export default function FinancePage() {
   const { token } = useAuth();
   const { data, mutate } = useSWR(token ? ["finance", token] : null, () => apiGet<Paginated<FinanceDto>>("/finance/", token!));
+  const { data: summary, mutate: mutateSummary } = useSWR(token ? ["finance-summary", token] : null, () =>
+    apiGet<FinanceSummaryDto>("/finance/summary/?group=category", token!)
+  );
 
   const [type, setType] = useState<FinanceDto["type"]>("expense");
   const [category, setCategory] = useState("Еда");
@@ -25,13 +28,13 @@ export default function FinancePage() {
     if (!token) return;
     await apiPost<FinanceDto>("/finance/", { type, category, amount, description }, token);
     setDescription("");
-    await mutate();
+    await Promise.all([mutate(), mutateSummary()]);
   };
 
   const remove = async (id: number) => {
     if (!token) return;
     await apiDelete<void>(`/finance/${id}/`, token);
-    await mutate();
+    await Promise.all([mutate(), mutateSummary()]);
   };
 
   const balance = useMemo(() => {
@@ -79,6 +82,30 @@ export default function FinancePage() {
         </CardBody>
       </Card>
 
+      {(summary?.categories?.length ?? 0) > 0 && (
+        <Card>
+          <CardHeader>
+            <div className="text-lg font-semibold">По категориям</div>
+            <div className="text-sm text-zinc-400">
+              {summary!.date_from} — {summary!.date_to}: +{summary!.totals.income} / -{summary!.totals.expense}
+            </div>
+          </CardHeader>
+          <CardBody>
+            <div className="grid gap-2">
+              {summary!.categories!.map((c) => (
+                <div key={c.category} className="flex items-center justify-between rounded-xl border border-white/10 p-3">
+                  <div className="text-sm font-semibold">{c.category}</div>
+                  <div className="flex items-center gap-2">
+                    <Badge>{c.net}</Badge>
+                    <Badge>{c.expense_share}%</Badge>
+                  </div>
+                </div>
+              ))}
+            </div>
+          </CardBody>
+        </Card>
+      )}
+
       {(data?.results?.length ?? 0) === 0 ? (
         <EmptyState title="Транзакций пока нет" description="Добавь первую запись дохода/расхода." />
       ) : (
@@ -37,6 +37,8 @@ export type HeroStatsDto = {
   level: number;
   xp: number;
   xp_to_next_level: number;
+  level_xp_start: number;
+  level_xp_end: number;
   rank: string;
   dev_score: number;
   strength: number;
@@ -137,6 +139,35 @@ export type FinanceDto = {
   updated_at: string;
 };
 
+export type FinanceTotalsDto = {
+  income: string;
+  expense: string;
+  net: string;
+  count: number;
+};
+
+export type FinanceCategorySummaryDto = FinanceTotalsDto & {
+  category: string;
+  expense_share: string;
+};
+
+export type FinanceMonthSummaryDto = FinanceTotalsDto & {
+  month: string;
+  income_delta: string | null;
+  expense_delta: string | null;
+  net_delta: string | null;
+  categories: { category: string; income: string; expense: string; net: string }[];
+};
+
+export type FinanceSummaryDto = {
+  date_from: string;
+  date_to: string;
+  group: "category" | "month";
+  totals: FinanceTotalsDto;
+  categories?: FinanceCategorySummaryDto[];
+  months?: FinanceMonthSummaryDto[];
+};
+
 export type LearningLogDto = {
   id: number;
   title: string;
@@ -148,12 +179,14 @@ export type LearningLogDto = {
 export type SystemDto = {
   ranks: Array<{ code: string; title: string; min_dev_score: number }>;
   xp_rules: {
+    level_curve: string;
     level_formula: string;
     task: { formula: string };
     workout: { formula: string };
     learning_log: { fixed: number };
     skill: { per_level: number; mastered_bonus: number };
   };
+  level_thresholds: number[];
 };
 
 export type FocusSessionDto = {